@@ -0,0 +1,84 @@
+"""
+Benchmark: listing card extraction on saved result pages.
+
+Compares the old full-tree walk (BeautifulSoup html.parser, every <a>,
+find_parent('div').get_text() per link) with src/card_extract.py on each
+available backend.
+
+    python benchmark_card_extraction.py saved/carwale_swift.html saved/spinny_swift.html
+    python benchmark_card_extraction.py            # synthetic CarWale/Spinny-sized pages
+
+Save pages with the browser's "Save page as" or curl; the marker is picked
+from the file name (spinny -> /buy-used-cars/, otherwise /used/).
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from src.card_extract import BACKENDS, extract_cards
+
+ROUNDS = 5
+
+
+def legacy_cards(html, link_marker):
+    """The extraction path before src/card_extract.py."""
+    soup = BeautifulSoup(html, "html.parser")
+    cards = []
+    for link in soup.find_all("a", href=True):
+        if link_marker not in link["href"]:
+            continue
+        parent = link.find_parent("div")
+        cards.append((link["href"], link.get_text("\n", strip=True),
+                      parent.get_text("\n", strip=True) if parent else ""))
+    return cards
+
+
+def synthetic_page(site, cards=60):
+    """A results page shaped like the real ones: nav chrome, scripts, nested cards."""
+    marker = "/buy-used-cars/" if site == "spinny" else "/used/"
+    nav = "".join(f'<li><a href="/news/article-{i}/">News story {i}</a></li>' for i in range(150))
+    body = []
+    for i in range(cards):
+        specs = "".join(f"<span>spec {j}</span>" for j in range(25))
+        body.append(f"""
+        <div class="card"><div class="img"><a href="{marker}maruti-suzuki-swift-2020-{i}/"><img src="x.jpg"></a></div>
+          <div class="info"><a href="{marker}maruti-suzuki-swift-2020-{i}/">2020 Maruti Suzuki Swift VXI</a>
+            <div class="price">₹ {5 + i % 4}.{i % 10}5 Lakh</div><div>{20 + i},000 km</div>{specs}
+            <a href="/dealer/{i}/">Dealer {i}</a></div></div>""")
+    script = "<script>window.__STATE__ = {" + ",".join(f'"k{i}": {i}' for i in range(3000)) + "}</script>"
+    return f"<html><head>{script}</head><body><ul>{nav}</ul><div id='results'>{''.join(body)}</div></body></html>"
+
+
+def timed(fn, rounds=ROUNDS):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(paths):
+    if paths:
+        pages = [(Path(p).name, Path(p).read_text(encoding="utf-8", errors="ignore")) for p in paths]
+    else:
+        pages = [("synthetic_carwale.html", synthetic_page("carwale")), ("synthetic_spinny.html", synthetic_page("spinny"))]
+
+    print(f"📊 Card extraction, best of {ROUNDS} rounds")
+    for name, html in pages:
+        marker = "/buy-used-cars/" if "spinny" in name.lower() else "/used/"
+        base, base_cards = timed(lambda: legacy_cards(html, marker))
+        print(f"   {name} ({len(html) / 1024:.0f} KB, {len(base_cards)} listing links)")
+        print(f"      legacy bs4 walk : {base * 1000:8.1f} ms")
+        for backend in BACKENDS:
+            elapsed, cards = timed(lambda: list(extract_cards(html, marker, backend=backend)))
+            same = [tuple(c) for c in cards] == base_cards
+            print(f"      {backend:<15} : {elapsed * 1000:8.1f} ms  ({base / elapsed:4.1f}x, "
+                  f"{'same cards' if same else 'DIFFERENT cards'})")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
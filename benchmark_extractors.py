@@ -0,0 +1,80 @@
+"""
+Benchmark: price / year / km extraction.
+
+Compares the per-engine regexes that src/extractors.py replaced (one pattern
+per field, some compiled on every call) with the shared single-pass scanner.
+
+    python benchmark_extractors.py snippets.txt    # snippets separated by blank lines
+    python benchmark_extractors.py                 # built-in corpus of card and search-result text
+
+Collect snippets from saved result pages or Custom Search responses (title +
+snippet per entry).
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+from src.extractors import extract
+
+ROUNDS = 5
+REPEAT = 200
+
+CORPUS = [
+    "2020 Maruti Suzuki Swift VXI\n35,000 km · Petrol · Manual\n₹ 6.25 Lakh\nEMI starts at ₹ 12,345/month",
+    "2019 Maruti Swift ZXI\n1,20,000 km\nRs. 5,90,000\nMumbai",
+    "2021 Hyundai Creta SX (O) 1.5 Diesel AT\n22,450 kms · 1st Owner\n₹ 14.75 Lakh Fixed price",
+    "2017 Toyota Fortuner 2.8 4x2 AT\n96,000 km\n₹ 27.5 Lakh\nBook for ₹ 10,000",
+    "Used Hyundai Creta 2020 in Pune - 45,000 km, Petrol, Rs 11,40,000. Well maintained, single owner.",
+    "Hyundai Creta 2024 Price - Creta SX launched at ₹ 16.05 Lakh (ex-showroom). Check on-road price in Delhi.",
+    "Mahindra XUV700 AX7 L 2022 ... priced at ₹ 23.99 Lakh* ex-showroom; top model ₹ 26.04 Lakh.",
+    "BMW X5 xDrive30d 2021 - 38,000 kms driven - ₹ 1.05 Cr - Bangalore",
+    "Tata Nexon EV Max 2023, 12,000 km, INR 16,50,000 negotiable",
+    "Kia Seltos HTX 1.5 2020 vs Hyundai Creta SX: price, mileage 16.8 kmpl, 1.5L petrol compared",
+    "2018 Honda City VX CVT | 62,300 km | Petrol | ₹ 8.4 L | Hyderabad",
+    "Maruti Baleno Alpha 2021 · 28,000 km · Rs. 7.15 Lakh · Chennai · 2nd owner",
+]
+
+
+def legacy(text):
+    """The per-engine path: listing-layer patterns plus the Google-snippet regex compiled per call."""
+    lakh = re.search(r"(?:₹|Rs\.?)\s*(\d+(?:\.\d+)?)\s*(?:Lakhs?|L)\b", text, re.IGNORECASE)
+    rupee = None if lakh else re.search(r"(?:₹|Rs\.?)\s*(\d{1,3}(?:,\d{2,3})+|\d{6,8})\b", text)
+    year = re.search(r"\b(20\d{2})\b", text)
+    km = re.search(r"(\d{1,3}(?:,\d{2,3})+|\d+)\s*km", text, re.IGNORECASE)
+    google = re.compile(r"(\d+(\.\d+)?)\s*(?:Lakh|Lakhs|L)", re.IGNORECASE).findall(text)
+    return lakh, rupee, year, km, google
+
+
+def timed(fn, texts, rounds=ROUNDS):
+    best = float("inf")
+    for _ in range(rounds):
+        re.purge()  # Legacy callers compiled per call; don't let the module cache hide it
+        started = time.perf_counter()
+        for _ in range(REPEAT):
+            for text in texts:
+                fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(paths):
+    if paths:
+        texts = [t.strip() for p in paths for t in Path(p).read_text(encoding="utf-8").split("\n\n") if t.strip()]
+    else:
+        texts = CORPUS
+    calls = REPEAT * len(texts)
+    print(f"📊 Extraction over {len(texts)} snippets x {REPEAT}, best of {ROUNDS} rounds")
+    base = timed(legacy, texts)
+    shared = timed(extract, texts)
+    print(f"   per-engine regexes : {base * 1e6 / calls:7.1f} µs/snippet")
+    print(f"   shared single pass : {shared * 1e6 / calls:7.1f} µs/snippet  ({base / shared:4.1f}x)")
+    print("\n   snippet -> prices (₹), years, km")
+    for text in texts[:len(CORPUS)]:
+        found = extract(text)
+        print(f"   {text.splitlines()[0][:48]:<48} -> {[p.rupees for p in found.prices]}, {found.years}, {found.kms}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
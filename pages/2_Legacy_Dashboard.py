@@ -35,6 +35,9 @@ try:
     from src.engine_smart_scraper import SmartCarScraper
     from src.ensemble_predictor import EnsemblePricePredictor
     from src.utils import format_currency
+    from src.io_recorder import io_session
+    from src.circuit_breaker import all_breakers
+    from src.prewarm import PREWARM_IN_APP, record_request, start_background as start_prewarm
 except (ImportError, ModuleNotFoundError):
     from engine_logic import calculate_logic_price
     from engine_scout import fetch_market_prices
@@ -45,6 +48,9 @@ except (ImportError, ModuleNotFoundError):
     from engine_smart_scraper import SmartCarScraper
     from ensemble_predictor import EnsemblePricePredictor
     from utils import format_currency
+    from io_recorder import io_session
+    from circuit_breaker import all_breakers
+    from prewarm import PREWARM_IN_APP, record_request, start_background as start_prewarm
 import statistics
 
 # Initialize New Engines
@@ -61,6 +67,8 @@ def get_ensemble_predictor():
 # Optional: Engine F (Cars24) - Requires Playwright
 try:
     from src.engine_cars24 import get_cars24_price, session_exists as cars24_session_exists
+    from src.engine_cars24 import schedule_probe as cars24_schedule_probe
+    from src.engine_cars24 import session_health as cars24_session_health
     CARS24_SUPPORTED = True
 except (ImportError, ModuleNotFoundError):
     CARS24_SUPPORTED = False
@@ -257,6 +265,12 @@ def main():
         st.error(f"Configuration Error: Missing API Keys on Server: {', '.join(missing_keys)}")
         st.stop()
 
+    # Park the logged-in Cars24 page and re-check the session off the UI thread
+    if CARS24_SUPPORTED:
+        cars24_schedule_probe()
+    if PREWARM_IN_APP:
+        start_prewarm()
+
     # Centered Header
     st.markdown("<h1>AutoValuation.</h1>", unsafe_allow_html=True)
     st.markdown("<div class='subtitle'>Intelligent Pricing Engine</div>", unsafe_allow_html=True)
@@ -319,10 +333,15 @@ def main():
     st.markdown("")
     if st.button("Calculate Value", type="primary", use_container_width=True):
         st.markdown("")
-        run_valuation(make, model, year, variant, km, condition, owners, fuel, location, remarks, api_key_gemini, api_key_search, search_cx)
+        # Record/replay of external I/O (VALUATION_IO_MODE / VALUATION_IO_ARCHIVE), off by default
+        io_meta = {"make": make, "model": model, "year": year, "variant": variant, "fuel": fuel, "km": km, "city": location}
+        with io_session(meta=io_meta):
+            run_valuation(make, model, year, variant, km, condition, owners, fuel, location, remarks, api_key_gemini, api_key_search, search_cx)
 
 
 def run_valuation(make, model, year, variant, km, condition, owners, fuel, location, remarks, gemini_key, search_key, cx):
+    transmission = "Automatic" if "auto" in variant.lower() or "amt" in variant.lower() or "cvt" in variant.lower() else "Manual"
+    record_request(make, model, year, variant, fuel, transmission, km, location)
     
     with st.spinner("Orchestrating Intelligent Valuation..."):
         
@@ -384,9 +403,12 @@ def run_valuation(make, model, year, variant, km, condition, owners, fuel, locat
         # 8. Engine F: Cars24 (Browser Automation)
         cars24_price = None
         cars24_debug = "Session not configured. Run setup_cars24_session.py first."
-        if CARS24_SUPPORTED and cars24_session_exists():
+        cars24_health = cars24_session_health() if CARS24_SUPPORTED else {"healthy": None}
+        if cars24_health["healthy"] is False:
+            # Known bad session: skip the engine instead of waiting for the login form
+            cars24_debug = cars24_health["reason"]
+        elif CARS24_SUPPORTED and cars24_session_exists():
             try:
-                transmission = "Automatic" if "auto" in variant.lower() or "amt" in variant.lower() or "cvt" in variant.lower() else "Manual"
                 cars24_price, cars24_debug = get_cars24_price(make, model, year, variant, fuel, transmission, km, location)
             except Exception as e:
                 cars24_debug = f"Error: {str(e)}"
@@ -613,6 +635,8 @@ def run_valuation(make, model, year, variant, km, condition, owners, fuel, locat
             st.write(cars24_debug)
             if CARS24_SUPPORTED and not cars24_session_exists():
                 st.warning("Run `python setup_cars24_session.py` to enable")
+            elif CARS24_SUPPORTED and cars24_session_health()["healthy"] is False:
+                st.warning(cars24_session_health()["reason"])
             elif not CARS24_SUPPORTED:
                 st.info("Desktop only feature")
             st.markdown('</div>', unsafe_allow_html=True)
@@ -661,5 +685,11 @@ def run_valuation(make, model, year, variant, km, condition, owners, fuel, locat
     
     st.bar_chart(graph_data, color="#2563EB")
 
+    # Live sources that are currently tripped are skipped until their cool-down ends
+    breakers = all_breakers()
+    tripped = [b for b in breakers if b["state"] != "closed"]
+    with st.expander(f"Live Source Health ({len(tripped)} tripped)" if tripped else "Live Source Health"):
+        st.dataframe(pd.DataFrame(breakers).set_index("name"), use_container_width=True)
+
 if __name__ == "__main__":
     main()
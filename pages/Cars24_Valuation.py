@@ -1,8 +1,23 @@
 import streamlit as st
-import requests
-import json
+import os
+import sys
 import time
 
+# Ensure 'src' is in path for cloud deployments
+src_path = os.path.join(os.getcwd(), 'src')
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+try:
+    from src import webhook_jobs
+except (ImportError, ModuleNotFoundError):
+    import webhook_jobs
+
+# n8n by default; point at `python -m src.webhook_stub` for local testing
+WEBHOOK_BASE = os.getenv("CARS24_WEBHOOK_BASE", "https://jaiswal007.app.n8n.cloud").rstrip("/")
+CAR_DETAILS_URL = f"{WEBHOOK_BASE}/webhook-test/car-details"
+OTP_URL = f"{WEBHOOK_BASE}/webhook/otp-verification"
+
 st.set_page_config(page_title="Cars24 Valuation Automation", page_icon="🚗", layout="wide")
 
 st.title("🚗 Cars24 Instant Valuation (N8n Automation)")
@@ -15,11 +30,54 @@ if "browserWSEndpoint" not in st.session_state:
     st.session_state.browserWSEndpoint = None
 if "valuation_price" not in st.session_state:
     st.session_state.valuation_price = None
+if "job_id" not in st.session_state:
+    st.session_state.job_id = None
 
 def reset_app():
     st.session_state.stage = "input"
     st.session_state.browserWSEndpoint = None
     st.session_state.valuation_price = None
+    st.session_state.job_id = None
+
+@st.fragment(run_every=2)
+def job_status(message):
+    """Poll the background webhook job; only this fragment reruns while it is in flight."""
+    job = webhook_jobs.get(st.session_state.job_id)
+    if job is None:
+        st.session_state.job_id = None
+        st.rerun()
+    elif job["status"] in ("queued", "running"):
+        st.info(f"{message} ({int(time.time() - job['submitted_at'])}s)")
+    elif job["status"] == "done":
+        st.session_state.job_id = None
+        on_job_done(job["result"])
+        st.rerun()
+    else:
+        st.session_state.job_id = None
+        st.session_state.job_error = (job["error"], job["result"])
+        st.rerun()
+
+def on_job_done(data):
+    if st.session_state.stage == "input":
+        # Webhook 1 answered: the remote browser is waiting for the OTP
+        endpoint = data.get("browserWSEndpoint") if isinstance(data, dict) else None
+        if endpoint:
+            st.session_state.browserWSEndpoint = endpoint
+            st.session_state.stage = "otp"
+        else:
+            st.session_state.job_error = ("Failed to start browser session. No endpoint returned.", data)
+    else:
+        # Expecting direct price or json with price
+        price = data.get("price", "N/A") if isinstance(data, dict) else data
+        st.session_state.valuation_price = price
+        st.session_state.stage = "result"
+
+def show_job_error():
+    error = st.session_state.pop("job_error", None)
+    if error:
+        st.error(error[0])
+        if error[1]:
+            st.write("Response:", error[1])
 
 # --- Stage 1: Input Form ---
 if st.session_state.stage == "input":
@@ -60,30 +118,13 @@ if st.session_state.stage == "input":
                     "mobile": mobile
                 }
                 
-                with st.spinner("🚀 Automating Cars24 Input... (This may take 30-60s)"):
-                    try:
-                        # Webhook 1
-                        url = "https://jaiswal007.app.n8n.cloud/webhook-test/car-details"
-                        response = requests.post(url, json=payload, timeout=120)
-                        
-                        if response.status_code == 200:
-                            data = response.json()
-                            endpoint = data.get("browserWSEndpoint")
-                            
-                            if endpoint:
-                                st.session_state.browserWSEndpoint = endpoint
-                                st.session_state.stage = "otp"
-                                st.success("OTP Sent! Browser session active.")
-                                st.rerun()
-                            else:
-                                st.error("Failed to start browser session. No endpoint returned.")
-                                st.write("Response:", data)
-                        else:
-                            st.error(f"Webhook Failed: {response.status_code}")
-                            st.write(response.text)
-                            
-                    except Exception as e:
-                        st.error(f"Connection Error: {e}")
+                # Webhook 1 runs in the background; the fragment below polls it
+                st.session_state.job_id = webhook_jobs.submit(CAR_DETAILS_URL, payload, timeout=120)
+                st.rerun()
+
+    show_job_error()
+    if st.session_state.job_id:
+        job_status("🚀 Automating Cars24 Input... (This may take 30-60s)")
 
 # --- Stage 2: OTP Verification ---
 elif st.session_state.stage == "otp":
@@ -102,28 +143,13 @@ elif st.session_state.stage == "otp":
                     "browserWSEndpoint": st.session_state.browserWSEndpoint
                 }
                 
-                with st.spinner("🔐 Verifying & Fetching Valuation..."):
-                    try:
-                        # Webhook 2
-                        url = "https://jaiswal007.app.n8n.cloud/webhook/otp-verification"
-                        response = requests.post(url, json=payload, timeout=60)
-                        
-                        if response.status_code == 200:
-                            # Expecting direct price or json with price
-                            try:
-                                res_json = response.json()
-                                price = res_json.get("price", "N/A")
-                            except:
-                                price = response.text
-                                
-                            st.session_state.valuation_price = price
-                            st.session_state.stage = "result"
-                            st.rerun()
-                        else:
-                            st.error(f"OTP Verification Failed: {response.status_code}")
-                            st.write(response.text)
-                    except Exception as e:
-                        st.error(f"Error: {e}")
+                # Webhook 2
+                st.session_state.job_id = webhook_jobs.submit(OTP_URL, payload, timeout=60)
+                st.rerun()
+
+        show_job_error()
+        if st.session_state.job_id:
+            job_status("🔐 Verifying & Fetching Valuation...")
 
 # --- Stage 3: Result Display ---
 elif st.session_state.stage == "result":
@@ -146,4 +172,4 @@ elif st.session_state.stage == "result":
 
 # Debug / Footer
 st.markdown("---")
-st.caption("Automation Status: Active | N8n Cloud")
+st.caption(f"Automation Status: Active | {'N8n Cloud' if 'n8n.cloud' in WEBHOOK_BASE else WEBHOOK_BASE}")
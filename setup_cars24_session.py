@@ -10,7 +10,6 @@ Usage:
 """
 
 import json
-import time
 from pathlib import Path
 from playwright.sync_api import sync_playwright
 
@@ -61,11 +60,11 @@ def setup_session():
         # Wait for user to complete login
         input()
         
-        # Save cookies
-        cookies = context.cookies()
+        # Save the full storage state (cookies + localStorage), not just cookies
+        state = context.storage_state()
         
         with open(SESSION_FILE, 'w') as f:
-            json.dump(cookies, f, indent=2)
+            json.dump(state, f, indent=2)
         
         print()
         print(f"✅ Session saved to: {SESSION_FILE}")
@@ -85,18 +84,22 @@ def verify_session():
     
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
         
-        # Load saved cookies
+        # Load saved storage state (older session files hold only a cookie list)
         with open(SESSION_FILE, 'r') as f:
-            cookies = json.load(f)
-        context.add_cookies(cookies)
+            state = json.load(f)
+        if isinstance(state, list):
+            state = {"cookies": state, "origins": []}
+        context = browser.new_context(storage_state=state)
         
         page = context.new_page()
-        page.goto("https://www.cars24.com/sell-used-cars")
+        page.goto("https://www.cars24.com/sell-used-cars", wait_until="domcontentloaded")
         
-        # Check if we're logged in (look for user profile or similar)
-        time.sleep(2)
+        # Wait until either the sell flow or a login prompt has rendered
+        try:
+            page.wait_for_selector(":text('Start with your car brand'), input[type='tel']", timeout=10000)
+        except Exception:
+            pass
         
         # If there's no login prompt, session is likely valid
         login_required = page.query_selector("input[type='tel']") is not None
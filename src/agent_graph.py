@@ -5,6 +5,7 @@ import json
 import re
 
 from dotenv import load_dotenv
+from src.circuit_breaker import guarded_get
 
 load_dotenv()
 
@@ -48,7 +49,7 @@ class ValuationAgent:
                     "q": q,
                     "num": 10 # Increase to 10 to find prices
                 }
-                resp = requests.get(url, params=params, timeout=10)
+                resp = guarded_get(url, params=params, timeout=10)
                 json_data = resp.json() # Renamed to json_data to avoid conflict
                 
                 if "items" in json_data:
@@ -0,0 +1,489 @@
+"""
+Shared Chromium Browser Pool.
+
+Every Playwright engine used to call sync_playwright() + chromium.launch() per
+scrape, so one dashboard valuation started four or more Chromium processes.
+The pool keeps one long-lived browser per process, driven by the async
+Playwright API on a dedicated background thread. Engines submit page jobs from
+any thread (Streamlit runs each session in its own thread); each job gets a
+fresh, isolated context that is closed when the job finishes.
+
+Usage:
+    async def job(page):
+        await page.goto(url)
+        return await page.content()
+
+    html = get_browser_pool().run(job, user_agent=UA)
+"""
+
+import asyncio
+import atexit
+import os
+import threading
+from typing import Awaitable, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+try:
+    from playwright.async_api import async_playwright
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    async_playwright = None
+    PLAYWRIGHT_AVAILABLE = False
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from src.io_recorder import active_session, attach_context
+
+# Pool limits (overridable from the environment)
+MAX_CONCURRENT_PAGES = int(os.getenv("BROWSER_POOL_MAX_PAGES", "4"))
+RECYCLE_AFTER_PAGES = int(os.getenv("BROWSER_POOL_RECYCLE_PAGES", "50"))
+MEMORY_CEILING_MB = int(os.getenv("BROWSER_POOL_MEMORY_MB", "1500"))
+# Low-memory hosts (Streamlit Cloud) can force one renderer; pages then run one at a time
+SINGLE_PROCESS = os.getenv("BROWSER_POOL_SINGLE_PROCESS") == "1"
+
+CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-gpu',
+    '--disable-dev-shm-usage',
+    '--disable-setuid-sandbox',
+    '--no-first-run',
+]
+if SINGLE_PROCESS:
+    CHROMIUM_ARGS += ['--no-zygote', '--single-process']
+
+DEFAULT_JOB_TIMEOUT = 60
+
+# ---------------- Request blocking ----------------
+# Listing pages pull in images, fonts, video, ads and analytics we never read.
+# Every context aborts these before they hit the network; sites can opt back in.
+BLOCKING_ENABLED = os.getenv("BROWSER_POOL_BLOCKING", "1") != "0"
+
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+BLOCKED_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "googleadservices.com",
+    "googlesyndication.com", "doubleclick.net", "adservice.google.com",
+    "facebook.net", "connect.facebook.net", "analytics.twitter.com",
+    "hotjar.com", "clarity.ms", "newrelic.com", "nr-data.net", "sentry.io",
+    "segment.io", "segment.com", "mixpanel.com", "amplitude.com",
+    "clevertap-prod.com", "wzrkt.com", "moengage.com", "webengage.com",
+    "branch.io", "appsflyer.com", "criteo.com", "criteo.net", "taboola.com",
+    "outbrain.com", "amazon-adsystem.com", "bing.com", "quantserve.com",
+    "scorecardresearch.com", "onesignal.com", "izooto.com", "youtube.com",
+)
+
+# Per-site exceptions: resource types / domains that must still load
+SITE_ALLOWLISTS = {
+    "carwale": {"types": set(), "domains": ("carwale.com", "aeplcdn.com")},
+    "spinny": {"types": set(), "domains": ("spinny.com",)},
+    # Brand and model tiles on the sell flow are images; clicks target their labels
+    "cars24": {"types": {"image"}, "domains": ("cars24.com", "cars24.team")},
+}
+
+
+def _host_matches(host: str, domains) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+def should_block(resource_type: str, url: str, site: Optional[str] = None) -> bool:
+    """True if a request of this type/URL should be aborted for the given site."""
+    allow = SITE_ALLOWLISTS.get(site or "", {})
+    if resource_type in BLOCKED_RESOURCE_TYPES - allow.get("types", set()):
+        return True
+    host = urlsplit(url).hostname or ""
+    if _host_matches(host, allow.get("domains", ())):
+        return False
+    return _host_matches(host, BLOCKED_DOMAINS)
+
+
+# ---------------- Readiness ----------------
+# Each step waits on the selector that proves the data is present, with a short
+# ceiling, instead of networkidle + fixed sleeps. On timeout the job carries on
+# with whatever rendered.
+READINESS_SPECS = {
+    "carwale": {"selector": '[data-track-label="ListingCard"], .o-cpnuEd, .used-car-card', "timeout": 8000},
+    "spinny": {"selector": '[data-testid="car-card"], .car-card', "timeout": 8000},
+    "cars24": {"selector": ":text('Start with your car brand'), button:has-text('brand')", "timeout": 10000},
+}
+
+NAVIGATION_TIMEOUT = 20000
+
+SITE_HOSTS = {"carwale.com": "carwale", "spinny.com": "spinny", "cars24.com": "cars24"}
+
+
+def site_for_url(url: str) -> Optional[str]:
+    host = urlsplit(url).hostname or ""
+    for domain, site in SITE_HOSTS.items():
+        if _host_matches(host, (domain,)):
+            return site
+    return None
+
+
+async def wait_ready(page, spec_name: Optional[str]) -> bool:
+    """Wait for the readiness selector of a spec; False if the ceiling was hit."""
+    spec = READINESS_SPECS.get(spec_name or "")
+    if not spec:
+        return True
+    try:
+        await page.wait_for_selector(spec["selector"], timeout=spec["timeout"])
+        return True
+    except Exception:
+        return False
+
+
+async def goto_ready(page, url: str, spec_name: Optional[str] = None,
+                     timeout: int = NAVIGATION_TIMEOUT) -> bool:
+    """Navigate (DOM content loaded only) and wait for the page's readiness selector."""
+    await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+    return await wait_ready(page, spec_name or site_for_url(url))
+
+
+PageJob = Callable[..., Awaitable]
+
+
+class BrowserUnavailable(Exception):
+    """Raised when Chromium cannot be launched (missing binary, sandbox, OOM)."""
+
+
+class _BrowserSlot:
+    """A launched browser plus the bookkeeping needed to recycle it."""
+
+    def __init__(self, browser, processes=()):
+        self.browser = browser
+        self.processes = list(processes)  # psutil handles of this browser's root process(es)
+        self.pages_served = 0
+        self.in_flight = 0
+        self.retiring = False
+
+
+class BrowserPool:
+    """
+    Process-wide owner of a Chromium instance.
+    Caps concurrent pages and recycles the browser after N pages or a memory ceiling.
+    """
+
+    def __init__(self, headless: bool = True, max_pages: int = MAX_CONCURRENT_PAGES,
+                 recycle_after: int = RECYCLE_AFTER_PAGES,
+                 memory_ceiling_mb: int = MEMORY_CEILING_MB):
+        self.headless = headless
+        self.max_pages = 1 if SINGLE_PROCESS else max(1, max_pages)
+        self.recycle_after = recycle_after
+        self.memory_ceiling_mb = memory_ceiling_mb
+
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._playwright = None
+        self._slot = None
+        self._semaphore = None
+        self._launch_lock = None
+        self.launches = 0
+        self.pages_total = 0
+        self.blocked_total = 0
+        self._warm = {}        # name -> {"slot", "context", "page", "version"}
+        self._warm_locks = {}  # name -> asyncio.Lock (one job at a time per warm page)
+
+    # ---------------- Event loop thread ----------------
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            ready = threading.Event()
+
+            def _run():
+                self._loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self._loop)
+                self._semaphore = asyncio.Semaphore(self.max_pages)
+                self._launch_lock = asyncio.Lock()
+                ready.set()
+                self._loop.run_forever()
+
+            self._thread = threading.Thread(target=_run, name="browser-pool", daemon=True)
+            self._thread.start()
+            ready.wait()
+
+    # ---------------- Browser lifecycle ----------------
+
+    @staticmethod
+    def _child_pids() -> set:
+        if psutil is None:
+            return set()
+        try:
+            return {p.pid for p in psutil.Process().children(recursive=True)}
+        except Exception:
+            return set()
+
+    def _memory_mb(self, slot: Optional[_BrowserSlot] = None) -> float:
+        """
+        RSS of one browser's process tree (default: the current browser). A
+        retiring browser still finishing its pages is not counted against its
+        replacement. 0 when psutil is unavailable.
+        """
+        slot = slot or self._slot
+        if psutil is None or slot is None:
+            return 0.0
+        total = 0
+        for root in slot.processes:
+            try:
+                for proc in [root] + root.children(recursive=True):
+                    total += proc.memory_info().rss
+            except Exception:
+                continue  # Exited between the listing and the read
+        return total / (1024 * 1024)
+
+    def _needs_recycle(self, slot: _BrowserSlot) -> bool:
+        if slot.pages_served >= self.recycle_after:
+            return True
+        return bool(self.memory_ceiling_mb) and self._memory_mb(slot) > self.memory_ceiling_mb
+
+    async def _acquire_browser(self) -> _BrowserSlot:
+        async with self._launch_lock:
+            slot = self._slot
+            if slot is not None and (slot.retiring or not slot.browser.is_connected()):
+                slot = None
+            if slot is not None and self._needs_recycle(slot):
+                print(f"♻️ Browser pool: recycling browser after {slot.pages_served} pages")
+                slot.retiring = True
+                if slot.in_flight == 0:
+                    await self._close_slot(slot)
+                slot = None
+            if slot is None:
+                slot = self._slot = _BrowserSlot(*await self._launch())
+            slot.in_flight += 1
+            slot.pages_served += 1
+            return slot
+
+    async def _launch(self):
+        """A new browser plus the processes it started (for its memory check)."""
+        if not PLAYWRIGHT_AVAILABLE:
+            raise BrowserUnavailable("Playwright package not installed")
+        try:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            before = self._child_pids()
+            browser = await self._playwright.chromium.launch(headless=self.headless, args=CHROMIUM_ARGS)
+        except Exception as e:
+            raise BrowserUnavailable(str(e)) from e
+        self.launches += 1
+        # Roots of the new process tree: new PIDs whose parent is not new (Chromium under the driver)
+        processes = []
+        new = self._child_pids() - before
+        for pid in new:
+            try:
+                proc = psutil.Process(pid)
+                if proc.ppid() not in new:
+                    processes.append(proc)
+            except Exception:
+                continue
+        return browser, processes
+
+    async def _release(self, slot: _BrowserSlot):
+        slot.in_flight -= 1
+        if slot.retiring and slot.in_flight == 0:
+            await self._close_slot(slot)
+
+    async def _close_slot(self, slot: _BrowserSlot):
+        try:
+            await slot.browser.close()
+        except Exception:
+            pass
+        if self._slot is slot:
+            self._slot = None
+
+    # ---------------- Jobs ----------------
+
+    async def _install_blocking(self, context, site: Optional[str]):
+        async def _route(route):
+            request = route.request
+            if should_block(request.resource_type, request.url, site):
+                self.blocked_total += 1
+                await route.abort("blockedbyclient")
+            else:
+                await route.fallback()
+
+        # Registered after the record/replay hook so it runs first
+        await context.route("**/*", _route)
+
+    async def _page_job(self, job: PageJob, site: Optional[str], context_options: Dict, io=None):
+        async with self._semaphore:
+            slot = await self._acquire_browser()
+            context = None
+            try:
+                context = await slot.browser.new_context(**context_options)
+                await attach_context(context, io)
+                if BLOCKING_ENABLED:
+                    await self._install_blocking(context, site)
+                page = await context.new_page()
+                self.pages_total += 1
+                return await job(page)
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+                await self._release(slot)
+
+    async def _close_warm(self, name: str):
+        entry = self._warm.pop(name, None)
+        if entry is not None:
+            try:
+                await entry["context"].close()
+            except Exception:
+                pass
+
+    async def _warm_job(self, name: str, job: PageJob, version, site: Optional[str],
+                        context_options: Dict, io=None):
+        async with self._semaphore:
+            lock = self._warm_locks.setdefault(name, asyncio.Lock())
+            async with lock:
+                slot = await self._acquire_browser()
+                try:
+                    entry = self._warm.get(name)
+                    # Rebuild when the browser was recycled, the page died or the state changed
+                    if entry is not None and (entry["slot"] is not slot or entry["version"] != version
+                                              or entry["page"].is_closed()):
+                        await self._close_warm(name)
+                        entry = None
+                    if entry is None:
+                        context = await slot.browser.new_context(**context_options)
+                        await attach_context(context, io)
+                        if BLOCKING_ENABLED:
+                            await self._install_blocking(context, site)
+                        page = await context.new_page()
+                        entry = self._warm[name] = {"slot": slot, "context": context,
+                                                    "page": page, "version": version}
+                        self.pages_total += 1
+                    return await job(entry["page"])
+                finally:
+                    await self._release(slot)
+
+    def run_warm(self, name: str, job: PageJob, version=None,
+                 timeout: Optional[float] = DEFAULT_JOB_TIMEOUT,
+                 site: Optional[str] = None, **context_options):
+        """
+        Like run(), but on a long-lived context+page kept under `name` between calls.
+        The job receives the page where the previous job left it; jobs for the same
+        name run one at a time. A different `version` (e.g. a new storage state)
+        or a recycled browser rebuilds the context.
+        """
+        self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("BrowserPool.run_warm() called from inside a page job")
+        future = asyncio.run_coroutine_threadsafe(
+            self._warm_job(name, job, version, site, context_options, active_session()), self._loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def drop_warm(self, name: str):
+        """Close the warm context kept under `name` (next run_warm rebuilds it)."""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close_warm(name), self._loop).result(10)
+
+    def run(self, job: PageJob, timeout: Optional[float] = DEFAULT_JOB_TIMEOUT,
+            site: Optional[str] = None, **context_options):
+        """
+        Run `await job(page)` on a fresh context and return its result.
+        `site` selects the request-blocking allowlist (carwale, spinny, cars24).
+        Blocks the calling thread; raises BrowserUnavailable if Chromium cannot start.
+        """
+        self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("BrowserPool.run() called from inside a page job")
+        # The record/replay session is per thread: capture it here, not on the loop thread
+        future = asyncio.run_coroutine_threadsafe(self._page_job(job, site, context_options, active_session()),
+                                                  self._loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    async def _gather_jobs(self, jobs: Dict[str, Dict], deadline: float, io=None) -> Dict:
+        tasks = {
+            name: asyncio.ensure_future(self._page_job(spec["job"], spec.get("site"), spec.get("context", {}), io))
+            for name, spec in jobs.items()
+        }
+        done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+        results = {}
+        for name, task in tasks.items():
+            if task in pending:
+                results[name] = TimeoutError(f"{name} missed the {deadline}s deadline")
+            elif task.exception() is not None:
+                results[name] = task.exception()
+            else:
+                results[name] = task.result()
+        return results
+
+    def run_many(self, jobs: Dict[str, Dict], deadline: float = DEFAULT_JOB_TIMEOUT) -> Dict:
+        """
+        Run several page jobs concurrently, each on its own page of the same browser.
+        `jobs` maps name -> {"job": fn, "site": str, "context": {...}}. Returns
+        name -> result, or the exception raised (TimeoutError past the combined deadline).
+        """
+        self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("BrowserPool.run_many() called from inside a page job")
+        future = asyncio.run_coroutine_threadsafe(self._gather_jobs(jobs, deadline, active_session()), self._loop)
+        # Small grace period so cancelled pages can close their contexts
+        return future.result(deadline + 5)
+
+    def stats(self) -> Dict:
+        slot = self._slot
+        return {
+            "launches": self.launches,
+            "pages_total": self.pages_total,
+            "requests_blocked": self.blocked_total,
+            "pages_current_browser": slot.pages_served if slot else 0,
+            "in_flight": slot.in_flight if slot else 0,
+            "warm_contexts": len(self._warm),
+            "memory_mb": round(self._memory_mb(), 1),
+        }
+
+    def shutdown(self):
+        if self._loop is None:
+            return
+
+        async def _stop():
+            for name in list(self._warm):
+                await self._close_warm(name)
+            if self._slot is not None:
+                await self._close_slot(self._slot)
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(_stop(), self._loop).result(10)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+
+_POOLS: Dict[bool, BrowserPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_browser_pool(headless: bool = True) -> BrowserPool:
+    """Process-wide pool shared by every Playwright engine."""
+    with _POOLS_LOCK:
+        if headless not in _POOLS:
+            _POOLS[headless] = BrowserPool(headless=headless)
+        return _POOLS[headless]
+
+
+@atexit.register
+def _shutdown_pools():
+    for pool in list(_POOLS.values()):
+        pool.shutdown()
@@ -0,0 +1,87 @@
+"""
+Single-pass Listing Card Extraction.
+
+The HTTP scrapers used to build a full BeautifulSoup tree, walk every <a> and
+call find_parent('div').get_text() per candidate, re-walking large subtrees
+for each link. Here only anchors whose href carries the listing marker are
+visited (one XPath query on lxml's C parser), and each card container's text
+is extracted once, even when several links share it.
+
+lxml is optional: without it the same walk runs on BeautifulSoup.
+
+    for card in extract_cards(html, "/used/"):
+        card.href, card.link_text, card.card_text
+"""
+
+from typing import Iterator, List, NamedTuple, Optional
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+from bs4 import BeautifulSoup
+
+
+class Card(NamedTuple):
+    href: str
+    link_text: str
+    card_text: str  # Text of the nearest enclosing <div> ("" when the link has none)
+
+
+def _join(parts, sep: str) -> str:
+    return sep.join(p.strip() for p in parts if p and p.strip())
+
+
+# Visible text only: bs4's get_text leaves <script>/<style> contents out, so must we
+_TEXT_XPATH = ".//text()[not(ancestor::script or ancestor::style)]"
+
+
+def _cards_lxml(html: str, link_marker: str, sep: str) -> Iterator[Card]:
+    if not html or not html.strip():
+        return
+    try:
+        root = lxml.html.fromstring(html)
+    except ValueError:  # str carrying an XML encoding declaration
+        root = lxml.html.fromstring(html.encode("utf-8"))
+    except Exception:  # Empty or non-HTML body
+        return
+    texts = {}
+    for link in root.xpath("//a[@href][contains(@href, $marker)]", marker=link_marker):
+        parents = link.xpath("ancestor::div[1]")
+        card_text = ""
+        if parents:
+            parent = parents[0]
+            if parent not in texts:
+                texts[parent] = _join(parent.xpath(_TEXT_XPATH), sep)
+            card_text = texts[parent]
+        yield Card(link.get("href"), _join(link.xpath(_TEXT_XPATH), sep), card_text)
+
+
+def _cards_bs4(html: str, link_marker: str, sep: str) -> Iterator[Card]:
+    soup = BeautifulSoup(html, "html.parser")
+    texts = {}
+    for link in soup.find_all("a", href=lambda h: h and link_marker in h):
+        parent = link.find_parent("div")
+        card_text = ""
+        if parent is not None:
+            if id(parent) not in texts:
+                texts[id(parent)] = parent.get_text(sep, strip=True)
+            card_text = texts[id(parent)]
+        yield Card(link["href"], link.get_text(sep, strip=True), card_text)
+
+
+def extract_cards(html: str, link_marker: str, sep: str = "\n", backend: Optional[str] = None) -> Iterator[Card]:
+    """
+    Listing links (href containing `link_marker`) with their own text and their
+    card container's text, in document order. Lazy: stop iterating once enough
+    cards have been read. `backend` forces "lxml" or "bs4" (benchmarks, tests).
+    """
+    backend = backend or ("lxml" if LXML_AVAILABLE else "bs4")
+    if backend == "lxml":
+        return _cards_lxml(html, link_marker, sep)
+    return _cards_bs4(html, link_marker, sep)
+
+
+BACKENDS: List[str] = ["lxml", "bs4"] if LXML_AVAILABLE else ["bs4"]
@@ -0,0 +1,117 @@
+"""
+Cars24 Network Capture.
+
+The sell-car flow is a single-page app: every step (brands, years, models,
+variants, states, RTOs, ...) and the final quote arrive as XHR/fetch JSON.
+NetworkCapture listens to those responses on the quote page so the engine can
+read the price straight from the API payload instead of regexing the DOM.
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+from src.browser_pool import site_for_url
+
+# Exact keys (lower-case, "_"/"-" dropped) that carry the quote in Cars24 price
+# payloads, checked in this order. Exact names only: "quoteId", "valuationId"
+# or "priceUpdatedAt" hold ids and timestamps, not rupees.
+PRICE_KEYS = ("price", "quote", "c24quote", "quoteprice", "offerprice", "estimatedprice", "appointmentprice",
+              "finalprice", "valuation", "valuationprice", "amount")
+MIN_PRICE = 10000  # Anything smaller is a count/id, not a car price
+MAX_PRICE = 20000000  # ₹2 Cr: anything larger is an id or a timestamp, not a used-car quote
+API_RESOURCE_TYPES = ("xhr", "fetch")
+
+
+def _as_rupees(value) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = int(value)
+    elif isinstance(value, str):
+        digits = value.replace(",", "").replace("₹", "").strip()
+        if not digits.isdigit():
+            return None
+        number = int(digits)
+    else:
+        return None
+    return number if MIN_PRICE <= number <= MAX_PRICE else None
+
+
+def _key(name: str) -> str:
+    return name.lower().replace("_", "").replace("-", "")
+
+
+def find_price(payload) -> Optional[int]:
+    """
+    First plausible rupee amount under a PRICE_KEYS key, searching the JSON
+    breadth-first so the top-level quote wins over nested per-item prices.
+    """
+    queue = [payload]
+    while queue:
+        node = queue.pop(0)
+        if isinstance(node, dict):
+            keyed = {_key(str(key)): value for key, value in node.items()}
+            for wanted in PRICE_KEYS:
+                price = _as_rupees(keyed.get(wanted))
+                if price:
+                    return price
+            queue.extend(v for v in node.values() if isinstance(v, (dict, list)))
+        elif isinstance(node, list):
+            queue.extend(v for v in node if isinstance(v, (dict, list)))
+    return None
+
+
+class NetworkCapture:
+    """
+    Collects Cars24 API JSON for one quote. Call arm() after the last step so
+    catalogue payloads (which can also mention prices) are never taken as the quote.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.payloads: List[Dict] = []  # {"url", "data", "armed"}
+        self.armed = False
+        self.price: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._tasks = set()
+        self._attached = True
+        page.on("response", self._on_response)
+
+    def arm(self):
+        self.armed = True
+
+    def detach(self):
+        # The warm page is reused across quotes: never leave a listener behind
+        if self._attached:
+            self.page.remove_listener("response", self._on_response)
+            self._attached = False
+        for task in self._tasks:
+            task.cancel()
+
+    def _on_response(self, response):
+        if site_for_url(response.url) != "cars24":
+            return
+        if response.request.resource_type not in API_RESOURCE_TYPES:
+            return
+        task = asyncio.ensure_future(self._read(response))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _read(self, response):
+        if "json" not in (response.headers.get("content-type") or ""):
+            return
+        try:
+            data = await response.json()
+        except Exception:
+            return
+        self.payloads.append({"url": response.url, "data": data, "armed": self.armed})
+        if self.armed and not self.price.done():
+            price = find_price(data)
+            if price:
+                self.price.set_result({"price": price, "url": response.url})
+
+    async def wait_price(self, timeout: float) -> Optional[Dict]:
+        """The captured quote ({"price", "url"}) or None if none arrived in time."""
+        try:
+            return await asyncio.wait_for(asyncio.shield(self.price), timeout)
+        except asyncio.TimeoutError:
+            return None
@@ -0,0 +1,212 @@
+"""
+Cars24 Catalogue Index.
+
+Local map of what the sell-car flow offers at each step
+(brand -> year -> model -> fuel -> transmission -> variant, plus state and city
+lists). It is learned from real quotes: a successful click adds the label that
+was clicked, and the full option list is stored only when it has verifiably
+rendered (see engine_cars24._rendered_options); a failed or timed-out click
+teaches nothing. Nodes expire after CATALOGUE_TTL and are learned again by the
+next quote that reaches them.
+
+The engine uses it to
+  * map user input to the exact Cars24 label ("swift" -> "Swift"), and
+  * fail fast on combinations Cars24 does not offer, instead of burning a
+    5 s click timeout per step.
+"""
+
+import difflib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+CATALOGUE_FILE = Path(__file__).parent.parent / "data" / "cars24_catalogue.json"
+CATALOGUE_TTL = 7 * 24 * 3600  # Cars24 adds models/variants rarely; re-learn weekly
+MIN_YEAR = 2000
+
+STEPS = ("brand", "year", "model", "fuel", "transmission", "variant")
+LOCATION_STEPS = ("state", "rto", "city", "km")
+
+# Variant words that name the gearbox: fuzzy matches must agree on them ("VXI AMT" is not "VXI")
+GEARBOX_TOKENS = {"at", "amt", "cvt", "dct", "dsg", "ivt", "tc", "automatic", "mt", "manual"}
+
+
+class CatalogueError(ValueError):
+    """The requested car is not offered by Cars24 (known from a fresh catalogue node)."""
+
+
+def _node_key(path: Sequence) -> str:
+    return "|".join(str(p).lower().strip() for p in path)
+
+
+def _gearbox(text: str) -> set:
+    return {t for t in text.lower().replace("(", " ").replace(")", " ").split() if t in GEARBOX_TOKENS}
+
+
+def best_option(options: Sequence[str], value, fuzzy: bool = False) -> Optional[str]:
+    """
+    The option `value` refers to: case-insensitive exact match, else (fuzzy)
+    the closest option naming the same gearbox. None when nothing fits.
+    """
+    wanted = str(value).lower().strip()
+    by_lower = {o.lower(): o for o in options}
+    if wanted in by_lower:
+        return by_lower[wanted]
+    if not fuzzy:
+        return None
+    gearbox = _gearbox(wanted)
+    candidates = {o.lower(): o for o in options if _gearbox(o) == gearbox}
+    partial = [o for low, o in candidates.items() if wanted in low or low in wanted]
+    if partial:
+        return min(partial, key=lambda o: abs(len(o) - len(wanted)))
+    close = difflib.get_close_matches(wanted, list(candidates), n=1, cutoff=0.6)
+    return candidates[close[0]] if close else None
+
+
+class Cars24Catalogue:
+    """
+    Nodes: key -> {"options": [...], "complete": bool, "seen_at": ts}.
+    `complete` is True when the list was read off the page, so a value missing
+    from it really is unavailable; merged successes alone only prove presence.
+    """
+
+    def __init__(self, path: Path = CATALOGUE_FILE, ttl: float = CATALOGUE_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.nodes: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r") as f:
+                    self.nodes = json.load(f).get("nodes", {})
+            except Exception as e:
+                print(f"⚠️ Cars24 catalogue unreadable, starting empty: {e}")
+
+    # ---------------- Storage ----------------
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"saved_at": time.time(), "nodes": self.nodes}, f)
+        os.replace(tmp, self.path)
+
+    def _fresh(self, key: str) -> Optional[Dict]:
+        node = self.nodes.get(key)
+        if node and time.time() - node["seen_at"] < self.ttl:
+            return node
+        return None
+
+    def record(self, path: Sequence, options: List[str], complete: bool = False):
+        """Store the options seen at `path` (merged with what a fresh node already knows)."""
+        options = [o.strip() for o in options if o and o.strip()]
+        if not options:
+            return
+        key = _node_key(path)
+        with self._lock:
+            node = self._fresh(key)
+            if node and not complete:
+                known = {o.lower() for o in node["options"]}
+                merged = node["options"] + [o for o in options if o.lower() not in known]
+                node.update(options=merged, seen_at=time.time())
+            else:
+                self.nodes[key] = {"options": list(dict.fromkeys(options)), "complete": complete,
+                                   "seen_at": time.time()}
+            self._save()
+
+    def is_complete(self, path: Sequence) -> bool:
+        node = self._fresh(_node_key(path))
+        return bool(node and node["complete"])
+
+    def options(self, path: Sequence) -> Optional[List[str]]:
+        node = self._fresh(_node_key(path))
+        return list(node["options"]) if node else None
+
+    # ---------------- Lookup ----------------
+
+    def match(self, path: Sequence, value, fuzzy: bool = False) -> Optional[str]:
+        """
+        Exact Cars24 label for `value` under `path`, None when the catalogue does
+        not know this node yet. Raises CatalogueError when a complete node rules it out.
+        """
+        node = self._fresh(_node_key(path))
+        if not node:
+            return None
+        label = best_option(node["options"], value, fuzzy)
+        if label is not None:
+            return label
+        if node["complete"]:
+            where = " ".join(str(p) for p in path) or "Cars24"
+            raise CatalogueError(f"'{value}' is not offered for {where}")
+        return None
+
+    def resolve(self, make: str, year, model: str, fuel: str, transmission: str,
+                variant: str) -> Dict[str, Optional[str]]:
+        """
+        Validate a request step by step. Returns step -> exact label (None where
+        the catalogue has no data yet); raises CatalogueError on an impossible combination.
+        """
+        year = int(year)
+        if not MIN_YEAR <= year <= datetime.now().year:
+            raise CatalogueError(f"Year {year} is outside {MIN_YEAR}-{datetime.now().year}")
+        values = {"brand": make, "year": year, "model": model, "fuel": fuel,
+                  "transmission": transmission, "variant": variant}
+        labels = {}
+        path = []
+        for step in STEPS:
+            label = self.match(path, values[step], fuzzy=(step == "variant"))
+            labels[step] = label
+            # Deeper nodes are keyed on the exact label when known, else the raw input
+            path.append(label if label is not None else values[step])
+        return labels
+
+    def step_path(self, labels: Dict, values: Dict, step: str) -> List:
+        """Catalogue path leading to `step` (the choices made before it)."""
+        if step in LOCATION_STEPS:
+            # Location and km lists do not depend on the car; RTO and city lists depend on the state
+            return ["@" + step] + ([values["state"]] if step in ("rto", "city") else [])
+        path = []
+        for previous in STEPS[:STEPS.index(step)]:
+            path.append(labels.get(previous) or values[previous])
+        return path
+
+    def summary(self) -> Dict:
+        fresh = [k for k in self.nodes if self._fresh(k)]
+        return {"nodes": len(self.nodes), "fresh": len(fresh),
+                "complete": sum(1 for k in fresh if self.nodes[k]["complete"])}
+
+    def prune(self) -> int:
+        """Drop expired nodes; returns how many were removed."""
+        with self._lock:
+            stale = [k for k in self.nodes if not self._fresh(k)]
+            for key in stale:
+                del self.nodes[key]
+            if stale:
+                self._save()
+        return len(stale)
+
+
+_CATALOGUE = None
+_CATALOGUE_LOCK = threading.Lock()
+
+
+def get_catalogue() -> Cars24Catalogue:
+    """Process-wide catalogue shared by every quote."""
+    global _CATALOGUE
+    with _CATALOGUE_LOCK:
+        if _CATALOGUE is None:
+            _CATALOGUE = Cars24Catalogue()
+        return _CATALOGUE
+
+
+if __name__ == "__main__":
+    import sys
+
+    catalogue = get_catalogue()
+    if len(sys.argv) > 1 and sys.argv[1] == "--prune":
+        print(f"🧹 Removed {catalogue.prune()} stale nodes")
+    print(f"📚 Cars24 catalogue: {catalogue.summary()}")
@@ -0,0 +1,70 @@
+"""
+Cars24 Quote Cache.
+
+Cars24 only ever sees bucketed inputs (km range, state, first RTO), so many
+distinct requests map to the same quote. Quotes are cached on exactly what
+the flow submits and reused within QUOTE_TTL, skipping the browser entirely.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+QUOTE_CACHE_FILE = Path(__file__).parent.parent / "data" / "cars24_quotes.json"
+QUOTE_TTL = float(os.getenv("CARS24_QUOTE_TTL", 3 * 24 * 3600))  # Cars24 reprices a few times a week
+
+KEY_FIELDS = ("brand", "year", "model", "fuel", "transmission", "variant", "state", "km_range", "city")
+
+
+def quote_key(**fields) -> str:
+    """Stable key over the bucketed inputs Cars24 actually receives."""
+    return "|".join(str(fields[name]).lower().strip() for name in KEY_FIELDS)
+
+
+class QuoteCache:
+    def __init__(self, path: Path = QUOTE_CACHE_FILE, ttl: float = QUOTE_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r") as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Cars24 quote cache unreadable, starting empty: {e}")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """{"price", "quoted_at"} when a quote younger than the TTL exists."""
+        entry = self.entries.get(key)
+        if entry and time.time() - entry["quoted_at"] < self.ttl:
+            return entry
+        return None
+
+    def put(self, key: str, price: int):
+        with self._lock:
+            now = time.time()
+            # Drop expired quotes while we are rewriting the file anyway
+            self.entries = {k: v for k, v in self.entries.items() if now - v["quoted_at"] < self.ttl}
+            self.entries[key] = {"price": int(price), "quoted_at": now}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp, self.path)
+
+
+_QUOTE_CACHE = None
+_QUOTE_CACHE_LOCK = threading.Lock()
+
+
+def get_quote_cache() -> QuoteCache:
+    """Process-wide quote cache."""
+    global _QUOTE_CACHE
+    with _QUOTE_CACHE_LOCK:
+        if _QUOTE_CACHE is None:
+            _QUOTE_CACHE = QuoteCache()
+        return _QUOTE_CACHE
@@ -0,0 +1,109 @@
+"""
+Cars24 Session Health.
+
+`session_exists()` only proves the file is there. This record tracks what we
+actually know about the saved login: when its auth cookies expire, when a
+quote last succeeded, and the result of the last background probe. Anything
+learned about an older session file is discarded once setup_cars24_session.py
+writes a new one.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+HEALTH_FILE = Path(__file__).parent.parent / ".cars24_health.json"
+PROBE_INTERVAL = 30 * 60  # Re-check a healthy session in the background this often
+AUTH_COOKIE_HINTS = ("token", "auth", "session", "jwt", "login", "user")
+RERUN_SETUP = "Run `python setup_cars24_session.py` to log in again."
+
+
+def cookie_expiry(cookies: List[Dict]) -> Optional[float]:
+    """
+    When the login stops working: the latest expiry among Cars24 auth-looking
+    cookies (any Cars24 cookie if none look like auth). None for session-only cookies.
+    """
+    cars24 = [c for c in cookies if "cars24" in c.get("domain", "") and (c.get("expires") or -1) > 0]
+    auth = [c for c in cars24 if any(h in c.get("name", "").lower() for h in AUTH_COOKIE_HINTS)]
+    pool = auth or cars24
+    return max(c["expires"] for c in pool) if pool else None
+
+
+class SessionHealth:
+    def __init__(self, session_file: Path, path: Path = HEALTH_FILE):
+        self.session_file = Path(session_file)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    # ---------------- Storage ----------------
+
+    def _session_mtime(self) -> Optional[float]:
+        try:
+            return self.session_file.stat().st_mtime
+        except OSError:
+            return None
+
+    def _load(self) -> Dict:
+        record = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r") as f:
+                    record = json.load(f)
+            except Exception:
+                record = {}
+        # A fresh login invalidates everything learned about the previous one
+        if record.get("session_mtime") != self._session_mtime():
+            record = {"session_mtime": self._session_mtime()}
+        return record
+
+    def _update(self, **fields):
+        with self._lock:
+            record = self._load()
+            record.update(fields)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(record, f)
+            os.replace(tmp, self.path)
+
+    # ---------------- Events ----------------
+
+    def record_success(self):
+        self._update(last_success=time.time(), login_required_at=None)
+
+    def record_login_required(self):
+        self._update(login_required_at=time.time())
+
+    def record_probe(self, ok: bool, detail: str = ""):
+        self._update(probed_at=time.time(), probe_ok=ok, probe_detail=detail,
+                     login_required_at=None if ok else time.time())
+
+    # ---------------- Verdict ----------------
+
+    def status(self, cookies: Optional[List[Dict]] = None) -> Dict:
+        """
+        {"healthy": True/False/None (unknown), "reason", plus the raw timestamps}.
+        Only a definite False should stop the engine from running.
+        """
+        if self._session_mtime() is None:
+            return {"healthy": False, "reason": f"No saved session. {RERUN_SETUP}"}
+        record = self._load()
+        expires_at = cookie_expiry(cookies or [])
+        result = {
+            "cookie_expires_at": expires_at,
+            "last_success": record.get("last_success"),
+            "probed_at": record.get("probed_at"),
+        }
+        if expires_at and expires_at < time.time():
+            return dict(result, healthy=False, reason=f"Login cookies expired. {RERUN_SETUP}")
+        if record.get("login_required_at"):
+            return dict(result, healthy=False, reason=f"Cars24 asked for OTP login. {RERUN_SETUP}")
+        if record.get("probe_ok") or record.get("last_success"):
+            return dict(result, healthy=True, reason="Session verified")
+        return dict(result, healthy=None, reason="Session not verified yet")
+
+    def needs_probe(self) -> bool:
+        probed_at = self._load().get("probed_at")
+        return not probed_at or time.time() - probed_at > PROBE_INTERVAL
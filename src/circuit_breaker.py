@@ -0,0 +1,187 @@
+"""
+Circuit Breakers.
+
+One breaker per capability (browser launch) and per host (carwale.com,
+spinny.com, cars24.com, googleapis.com). A breaker opens after
+`failure_threshold` consecutive failures and rejects calls for `cooldown`
+seconds; then a single half-open probe is let through. Success closes it,
+failure re-opens it with a doubled cool-down (capped at MAX_COOLDOWN).
+
+Replaces the old one-way `PLAYWRIGHT_READY` flag: a transient launch failure
+no longer disables live search for the life of the process, and a site that is
+down stops costing a timeout on every request.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+MAX_COOLDOWN = 1800
+
+# name -> (failure_threshold, cooldown seconds)
+BREAKER_SETTINGS = {
+    "browser": (1, 120),       # A failed Chromium launch will fail again right away
+    "carwale.com": (3, 60),
+    "spinny.com": (3, 60),
+    "cars24.com": (2, 300),    # Each failure is a 30+ s browser flow
+    "googleapis.com": (3, 60),
+}
+DEFAULT_SETTINGS = (3, 60)
+
+
+class CircuitOpen(requests.ConnectionError):
+    """Call rejected without trying (a ConnectionError, so existing handlers cover it)."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown: float = 60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error = ""
+        self.probe_in_flight = False
+        self.probe_started = 0.0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True when a call may go ahead (claims the half-open probe slot if due)."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.time() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+            # A probe whose caller never reported back must not wedge the breaker
+            stale_probe = self.probe_in_flight and time.time() - self.probe_started >= self.cooldown
+            if self.state == HALF_OPEN and (not self.probe_in_flight or stale_probe):
+                self.probe_in_flight = True
+                self.probe_started = time.time()
+                print(f"🔌 Circuit {self.name}: half-open, probing")
+                return True
+            self.rejected += 1
+            return False
+
+    def is_open(self) -> bool:
+        """Would a call be rejected right now? (read-only, never claims the probe)"""
+        with self._lock:
+            if self.state == OPEN:
+                return time.time() - self.opened_at < self.cooldown
+            return self.state == HALF_OPEN and self.probe_in_flight
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                print(f"✅ Circuit {self.name}: closed")
+            self.state = CLOSED
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            self.probe_in_flight = False
+
+    def record_failure(self, error=""):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)[:200]
+            if self.state == HALF_OPEN:
+                # Probe failed: back off harder before the next one
+                self.cooldown = min(self.cooldown * 2, MAX_COOLDOWN)
+                self._open()
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def release(self):
+        """Give back a claimed probe slot without a verdict (the call never reached the target)."""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.time()
+        self.probe_in_flight = False
+        print(f"⛔ Circuit {self.name}: open for {self.cooldown:.0f}s ({self.last_error})")
+
+    def reset(self):
+        self.record_success()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            retry_in = max(0.0, self.opened_at + self.cooldown - time.time()) if self.state == OPEN else 0.0
+            return {"name": self.name, "state": self.state, "failures": self.failures,
+                    "retry_in": round(retry_in), "rejected": self.rejected, "last_error": self.last_error}
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker for a capability or host."""
+    with _BREAKERS_LOCK:
+        if name not in _BREAKERS:
+            threshold, cooldown = BREAKER_SETTINGS.get(name, DEFAULT_SETTINGS)
+            _BREAKERS[name] = CircuitBreaker(name, threshold, cooldown)
+        return _BREAKERS[name]
+
+
+def host_key(url: str) -> Optional[str]:
+    """Breaker name for a URL's host (www.carwale.com -> carwale.com), None if unguarded."""
+    host = urlsplit(url).hostname or ""
+    for name in BREAKER_SETTINGS:
+        if host == name or host.endswith("." + name):
+            return name
+    return None
+
+
+def breaker_for_url(url: str) -> Optional[CircuitBreaker]:
+    name = host_key(url)
+    return get_breaker(name) if name else None
+
+
+def all_breakers() -> List[Dict]:
+    """Snapshots of every known breaker (for the UI), guarded hosts first."""
+    for name in BREAKER_SETTINGS:
+        get_breaker(name)
+    with _BREAKERS_LOCK:
+        breakers = list(_BREAKERS.values())
+    return [b.snapshot() for b in breakers]
+
+
+def reset_all():
+    with _BREAKERS_LOCK:
+        breakers = list(_BREAKERS.values())
+    for breaker in breakers:
+        breaker.reset()
+
+
+def guarded_request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    requests.request() behind the host's breaker. Connection errors, timeouts,
+    429 and 5xx count as failures; raises CircuitOpen while the host is tripped.
+    """
+    breaker = breaker_for_url(url)
+    if breaker is None:
+        return requests.request(method, url, **kwargs)
+    if not breaker.allow():
+        raise CircuitOpen(f"{breaker.name} circuit open (retry in {breaker.snapshot()['retry_in']}s)")
+    try:
+        response = requests.request(method, url, **kwargs)
+    except requests.RequestException as e:
+        breaker.record_failure(e)
+        raise
+    if response.status_code == 429 or response.status_code >= 500:
+        breaker.record_failure(f"HTTP {response.status_code}")
+    else:
+        breaker.record_success()
+    return response
+
+
+def guarded_get(url: str, **kwargs) -> requests.Response:
+    return guarded_request("GET", url, **kwargs)
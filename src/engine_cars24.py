@@ -3,20 +3,44 @@ Engine F: Cars24 Valuation Engine
 Uses Playwright browser automation to get accurate valuations from Cars24.
 """
 
+import asyncio
 import os
 import json
 import re
+import threading
+import time
 from pathlib import Path
+from src.browser_pool import BrowserUnavailable, get_browser_pool, goto_ready
+from src.cars24_capture import NetworkCapture
+from src.circuit_breaker import get_breaker
+from src.scrape_worker import get_worker_client, use_worker
+from src.cars24_catalogue import CatalogueError, best_option, get_catalogue
+from src.cars24_quote_cache import get_quote_cache, quote_key
+from src.cars24_session_health import SessionHealth
 try:
-    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+    from playwright.async_api import TimeoutError as PlaywrightTimeout
 except (ImportError, ModuleNotFoundError):
     # This will be handled in main.py, but we define placeholders to avoid name errors
-    sync_playwright = None
     PlaywrightTimeout = Exception
 
 # Session file location
 SESSION_FILE = Path(__file__).parent.parent / ".cars24_session.json"
 
+# Upper bound for one full quote flow on the shared browser pool
+QUOTE_TIMEOUT = 120
+
+SELL_URL = "https://www.cars24.com/sell-used-cars"
+START_SELECTOR = ":text('Start with your car brand'), button:has-text('brand')"
+# Name of the long-lived, logged-in context kept parked on the sell flow
+WARM_CONTEXT = "cars24"
+LOGIN_SELECTOR = "input[type='tel']"
+PRICE_WAIT = 20  # Seconds to wait for the quote response after the last step
+STEP_TIMEOUT = 2000  # Click timeout when the catalogue already knows the exact label
+OPTION_SELECTOR = "button:visible, li:visible, [role='option']:visible"
+SETTLE_DELAY = 0.3  # Gap between the two option reads that must agree before a list counts as rendered
+_OPTIONS_JS = "els => els.map(e => (e.innerText || '').split('\\n')[0].trim())"
+_park_task = None  # Background navigation back to the start step (runs on the pool's loop)
+
 # Mapping for common brand names to Cars24 display names
 BRAND_MAP = {
     "maruti": "Maruti Suzuki",
@@ -104,25 +128,208 @@ def get_km_range(km):
         return "More than 1,00,000 km"
 
 def load_session():
-    """Load saved session cookies."""
+    """
+    Load the saved Cars24 session as a Playwright storage state
+    ({"cookies": [...], "origins": [...]}). Older session files that hold only a
+    cookie list are wrapped so they keep working.
+    """
     if SESSION_FILE.exists():
         try:
             with open(SESSION_FILE, 'r') as f:
-                return json.load(f)
+                state = json.load(f)
         except:
             return None
+        if isinstance(state, list):
+            state = {"cookies": state, "origins": []}
+        return state
     return None
 
-def save_session(cookies):
-    """Save session cookies for future use."""
+def save_session(state):
+    """Save the session (full storage state, or a legacy cookie list) for future use."""
     with open(SESSION_FILE, 'w') as f:
-        json.dump(cookies, f)
+        json.dump(state, f)
     print(f"Cars24 session saved to {SESSION_FILE}")
 
 def session_exists():
     """Check if a valid session file exists."""
     return SESSION_FILE.exists()
 
+def _session_version():
+    # A re-run of setup_cars24_session.py rewrites the file: rebuild the warm context
+    try:
+        return SESSION_FILE.stat().st_mtime
+    except OSError:
+        return None
+
+async def _reset_to_start(page):
+    """
+    Put the warm page on the brand step of the sell flow.
+    Returns True when the page was already parked there (no navigation needed).
+    """
+    if _park_task is not None and not _park_task.done():
+        await asyncio.wait([_park_task])
+    parked = page.url.startswith(SELL_URL) and await page.query_selector(START_SELECTOR) is not None
+    if not parked:
+        await goto_ready(page, SELL_URL, "cars24")
+    try:
+        await page.click("text=Start with your car brand", timeout=5000)
+    except:
+        # Try alternative selector
+        await page.click("button:has-text('brand')", timeout=5000)
+    return parked
+
+async def _park(page):
+    """Load the sell flow again after a quote so the next one starts immediately. False when navigation failed."""
+    try:
+        await goto_ready(page, SELL_URL, "cars24")
+        return True
+    except Exception:
+        return False
+
+async def _visible_options(page):
+    """Short labels of the clickable options currently on screen."""
+    try:
+        texts = await page.eval_on_selector_all(OPTION_SELECTOR, _OPTIONS_JS)
+    except Exception:
+        return []
+    return [t for t in dict.fromkeys(texts) if t and len(t) <= 40]
+
+async def _rendered_options(page, must_include):
+    """
+    The full option list, only once it has verifiably rendered: two reads a
+    moment apart agree and include the option about to be clicked. Anything
+    less (still rendering, a different screen) returns [] so the catalogue is
+    never told a partial list is complete.
+    """
+    first = await _visible_options(page)
+    await asyncio.sleep(SETTLE_DELAY)
+    second = await _visible_options(page)
+    if not second or first != second or must_include not in second:
+        return []
+    return second
+
+async def _label_of(element):
+    text = await element.inner_text() or ""
+    return text.split("\n")[0].strip()
+
+async def _login_form(page):
+    try:
+        await page.wait_for_selector(LOGIN_SELECTOR, timeout=PRICE_WAIT * 1000)
+        return True
+    except Exception:
+        return False
+
+async def _price_from_dom(page):
+    """Last resort when no API response carried the quote: read it off the result page."""
+    for selector in (".price-value", "[data-testid*='price']", "[class*='price']"):
+        try:
+            element = await page.query_selector(selector)
+            if element:
+                numbers = re.findall(r"[\d,]+", await element.text_content() or "")
+                if numbers and len(numbers[0].replace(",", "")) >= 5:  # At least 5 digits (10000+)
+                    return int(numbers[0].replace(",", ""))
+        except Exception:
+            continue
+    return None
+
+def _run_warm(job, state):
+    return get_browser_pool().run_warm(
+        WARM_CONTEXT, job, version=_session_version(), timeout=QUOTE_TIMEOUT,
+        site="cars24", storage_state=state,
+    )
+
+def _health():
+    return SessionHealth(SESSION_FILE)
+
+def session_health():
+    """What we know about the saved login (see cars24_session_health.SessionHealth.status)."""
+    state = load_session() or {}
+    return _health().status(state.get("cookies", []))
+
+def warm_up():
+    """
+    Open the logged-in context, park it on the sell flow ahead of the first quote,
+    and record whether Cars24 still accepts the session (the cheap health probe).
+    """
+    if not session_exists():
+        return False
+    if use_worker():
+        # The worker owns Chromium: probe there, it records the result in the shared health file
+        try:
+            return bool(get_worker_client().call("cars24_probe", timeout=QUOTE_TIMEOUT + 30))
+        except Exception as e:
+            print(f"⚠️ Cars24 warm-up failed in the scrape worker: {e}")
+            return False
+
+    async def job(page):
+        # None = inconclusive: only a login form on the page says the session is gone
+        parked = await _park(page)
+        if await page.query_selector(LOGIN_SELECTOR) is not None:
+            return False
+        return True if parked and page.url.startswith(SELL_URL) else None
+
+    try:
+        ok = _run_warm(job, load_session())
+        if ok is None:
+            # Timeout, network blip or outage: says nothing about the login
+            print("⚠️ Cars24 warm-up: sell flow did not load, probe inconclusive")
+            return False
+        _health().record_probe(ok, "sell flow reachable" if ok else "login form shown")
+        return ok
+    except Exception as e:
+        # Browser trouble says nothing about the session itself
+        print(f"⚠️ Cars24 warm-up failed: {e}")
+        return False
+
+_probe_thread = None
+
+def schedule_probe():
+    """
+    Warm up and re-probe the session in the background when the last probe is
+    stale (in the scrape worker when SCRAPE_WORKER=1; see warm_up).
+    """
+    global _probe_thread
+    if not session_exists() or not _health().needs_probe():
+        return
+    if _probe_thread is not None and _probe_thread.is_alive():
+        return
+    _probe_thread = threading.Thread(target=warm_up, name="cars24-probe", daemon=True)
+    _probe_thread.start()
+
+def _state_info(city):
+    state_key = CITY_STATE_MAP.get(city.lower().strip(), "maharashtra")
+    return STATE_RTO_MAP.get(state_key, STATE_RTO_MAP["maharashtra"])
+
+def _resolve_quote(make, model, year, variant, fuel, transmission, km, city):
+    """Catalogue labels and quote-cache key for a request (raises CatalogueError if not offered)."""
+    make_normalized = BRAND_MAP.get(make.lower().strip(), make)
+    state_info = _state_info(city)
+    catalogue = get_catalogue()
+    values = {"brand": make_normalized, "year": year, "model": model, "fuel": fuel,
+              "transmission": transmission, "variant": variant}
+    values.update(state=state_info['state'], rto=f"{state_info['rto_prefix']}-01", city=city, km=get_km_range(km))
+    labels = catalogue.resolve(make_normalized, year, model, fuel, transmission, variant)
+    labels["state"] = catalogue.match(catalogue.step_path(labels, values, "state"), state_info['state'])
+    # RTO, city and km steps are optional: a value the catalogue rules out is skipped, not clicked
+    for step, fuzzy in (("rto", True), ("city", False), ("km", False)):
+        try:
+            labels[step] = catalogue.match(catalogue.step_path(labels, values, step), values[step], fuzzy)
+        except CatalogueError:
+            labels[step] = False
+    key = quote_key(brand=make_normalized, year=year, model=labels["model"] or model, fuel=labels["fuel"] or fuel,
+                    transmission=labels["transmission"] or transmission, variant=labels["variant"] or variant,
+                    state=state_info['state'], km_range=get_km_range(km), city=labels["city"] or city)
+    return labels, key
+
+def cached_quote(make, model, year, variant, fuel, transmission, km, city):
+    """Fresh cached Cars24 quote for these inputs, or None (no browser, no network)."""
+    try:
+        _, key = _resolve_quote(make, model, year, variant, fuel, transmission, km, city)
+    except CatalogueError:
+        return None
+    cached = get_quote_cache().get(key)
+    return cached["price"] if cached else None
+
 def get_cars24_price(make, model, year, variant, fuel, transmission, km, city):
     """
     Main function to get Cars24 valuation.
@@ -140,218 +347,227 @@ def get_cars24_price(make, model, year, variant, fuel, transmission, km, city):
     Returns:
         tuple: (price, debug_info)
     """
-    debug_log = []
+    if use_worker():
+        # Browser runs in the scrape worker process; this is just a thin client
+        try:
+            return tuple(get_worker_client().call(
+                "cars24", timeout=QUOTE_TIMEOUT + 30, make=make, model=model, year=year, variant=variant,
+                fuel=fuel, transmission=transmission, km=km, city=city))
+        except Exception as e:
+            return None, f"Scrape worker error: {e}"
     
-    # Normalize inputs
+    debug_log = []
     make_normalized = BRAND_MAP.get(make.lower().strip(), make)
-    city_lower = city.lower().strip()
-    state_key = CITY_STATE_MAP.get(city_lower, "maharashtra")
-    state_info = STATE_RTO_MAP.get(state_key, STATE_RTO_MAP["maharashtra"])
-    km_range = get_km_range(km)
-    
+    state_info = _state_info(city)
     debug_log.append(f"Searching Cars24 for: {year} {make_normalized} {model} {variant}")
     debug_log.append(f"Location: {city} ({state_info['state']})")
     
+    # Validate against the local catalogue before touching the browser
+    try:
+        labels, key = _resolve_quote(make, model, year, variant, fuel, transmission, km, city)
+    except CatalogueError as e:
+        debug_log.append(f"Not offered on Cars24: {e}")
+        return None, "\n".join(debug_log)
+    km_range = get_km_range(km)
+    catalogue = get_catalogue()
+    values = {"brand": make_normalized, "year": year, "model": model, "fuel": fuel,
+              "transmission": transmission, "variant": variant}
+    values.update(state=state_info['state'], rto=f"{state_info['rto_prefix']}-01", city=city, km=km_range)
+    
+    # Same bucketed inputs -> same Cars24 quote
+    quotes = get_quote_cache()
+    cached = quotes.get(key)
+    if cached:
+        age_hours = (time.time() - cached["quoted_at"]) / 3600
+        debug_log.append(f"Cached quote: ₹{cached['price']:,} ({age_hours:.1f}h old)")
+        return cached["price"], "\n".join(debug_log)
+    
     # Check for saved session
     saved_session = load_session()
     if not saved_session:
         debug_log.append("No saved session found. Run setup_cars24_session.py first.")
         return None, "\n".join(debug_log)
+    health = session_health()
+    if health["healthy"] is False:
+        # Known bad: skip the 30+ second browser run that would end on the login form
+        debug_log.append(health["reason"])
+        return None, "\n".join(debug_log)
     
-    try:
-        with sync_playwright() as p:
-            try:
-                browser = p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-gpu',
-                        '--disable-dev-shm-usage',
-                        '--disable-setuid-sandbox',
-                        '--no-first-run',
-                        '--no-zygote',
-                        '--single-process'
-                    ]
-                )
-            except Exception as e:
-                debug_log.append(f"Playwright Launch Failed: {e}")
-                return None, "\n".join(debug_log)
-                
-            context = browser.new_context()
-            
-            # Load saved cookies
-            context.add_cookies(saved_session)
-            debug_log.append("Loaded saved session cookies")
-            
-            page = context.new_page()
-            page.set_default_timeout(15000)  # 15 second timeout
-            
-            # Navigate to sell page
-            page.goto("https://www.cars24.com/sell-used-cars", wait_until="networkidle")
+    async def job(page):
+        global _park_task
+        # An identical quote may have finished while this one waited for the warm page
+        cached = quotes.get(key)
+        if cached:
+            debug_log.append(f"Cached quote: ₹{cached['price']:,}")
+            return cached["price"]
+        page.set_default_timeout(15000)  # 15 second timeout
+        
+        # Reuse the parked, logged-in page; only navigate when it drifted off the flow
+        if await _reset_to_start(page):
+            debug_log.append("Reused warm Cars24 page")
+        else:
             debug_log.append("Navigated to Cars24")
-            
-            # Click "Start with your car brand"
-            try:
-                page.click("text=Start with your car brand", timeout=5000)
-            except:
-                # Try alternative selector
-                page.click("button:has-text('brand')", timeout=5000)
-            
-            # Step 1: Select Brand
-            try:
-                page.click(f"text={make_normalized}", timeout=5000)
-                debug_log.append(f"Selected brand: {make_normalized}")
-            except:
-                debug_log.append(f"Could not find brand: {make_normalized}")
-                browser.close()
-                return None, "\n".join(debug_log)
-            
-            # Step 2: Select Year
-            try:
-                # Try to use search box if available
-                year_input = page.query_selector("input[placeholder*='year' i], input[placeholder*='search' i]")
-                if year_input:
-                    year_input.fill(str(year))
-                    page.wait_for_timeout(500)
-                page.click(f"text={year}", timeout=5000)
-                debug_log.append(f"Selected year: {year}")
-            except:
-                debug_log.append(f"Could not find year: {year}")
-                browser.close()
-                return None, "\n".join(debug_log)
-            
-            # Step 3: Select Model
-            try:
-                page.click(f"text={model}", timeout=5000)
-                debug_log.append(f"Selected model: {model}")
-            except:
-                debug_log.append(f"Could not find model: {model}")
-                browser.close()
-                return None, "\n".join(debug_log)
-            
-            # Step 4: Select Fuel Type
-            try:
-                page.click(f"text={fuel}", timeout=5000)
-                debug_log.append(f"Selected fuel: {fuel}")
-            except:
-                debug_log.append(f"Could not find fuel type: {fuel}")
-                browser.close()
-                return None, "\n".join(debug_log)
-            
-            # Step 5: Select Transmission
-            try:
-                page.click(f"text={transmission}", timeout=5000)
-                debug_log.append(f"Selected transmission: {transmission}")
-            except:
-                debug_log.append(f"Could not find transmission: {transmission}")
-                browser.close()
-                return None, "\n".join(debug_log)
-            
-            # Step 6: Select Variant (fuzzy match)
-            try:
-                # Try exact match first
-                variant_btn = page.query_selector(f"button:has-text('{variant}')")
-                if variant_btn:
-                    variant_btn.click()
-                else:
-                    # Try partial match - click first available variant
-                    page.click("button:visible", timeout=5000)
-                debug_log.append(f"Selected variant: {variant}")
-            except:
-                debug_log.append(f"Could not find variant: {variant}, using first available")
-            
-            # Step 7: Select State
-            try:
-                page.click(f"text={state_info['state']}", timeout=5000)
-                debug_log.append(f"Selected state: {state_info['state']}")
-            except:
-                debug_log.append(f"Could not find state: {state_info['state']}")
-                browser.close()
-                return None, "\n".join(debug_log)
-            
-            # Step 8: Select RTO (first one for the state)
-            try:
-                rto_prefix = state_info['rto_prefix']
-                page.click(f"text={rto_prefix}-01", timeout=3000)
-                debug_log.append(f"Selected RTO: {rto_prefix}-01")
-            except:
-                # Try clicking first visible RTO button
-                try:
-                    page.click(f"button:has-text('{rto_prefix}')", timeout=3000)
-                except:
-                    debug_log.append("Using default RTO")
-            
-            # Step 9: Select KM Range
-            try:
-                # Try to find matching range
-                page.click(f"text={km_range[:10]}", timeout=5000)  # Match first part
-                debug_log.append(f"Selected KM: {km_range}")
-            except:
-                debug_log.append("Could not select exact KM range")
-            
-            # Step 10: Select City
+        capture = NetworkCapture(page)
+        try:
+            price = await _quote(page, capture)
+            if price:
+                quotes.put(key, price)
+                _health().record_success()
+            return price
+        finally:
+            capture.detach()
+            # Head back to the start of the flow without holding up this quote
+            _park_task = asyncio.ensure_future(_park(page))
+
+    async def _quote(page, capture):
+        async def choose(step, value, timeout=5000, learn_options=True):
+            """
+            Click a catalogue option (exact label when known) and teach the catalogue
+            the label that was actually clicked. Returns that label, None on failure;
+            a failed or timed-out click teaches nothing.
+            """
+            label = labels.get(step)
+            path = catalogue.step_path(labels, values, step)
+            selector = f'text="{label}"' if label else f"text={value}"
             try:
-                page.click(f"text={city}", timeout=5000)
-                debug_log.append(f"Selected city: {city}")
-            except:
-                debug_log.append(f"Could not find city: {city}")
-            
-            # Step 11: Select Intent
+                element = await page.wait_for_selector(selector, timeout=STEP_TIMEOUT if label else timeout)
+                clicked = await _label_of(element) or label or str(value)
+                options = []
+                if learn_options and not catalogue.is_complete(path):
+                    options = await _rendered_options(page, clicked)
+                await element.click(timeout=STEP_TIMEOUT)
+            except Exception:
+                return None
+            catalogue.record(path, options or [clicked], complete=bool(options))
+            labels[step] = clicked
+            return clicked
+
+        # Step 1: Select Brand
+        if not await choose("brand", make_normalized):
+            debug_log.append(f"Could not find brand: {make_normalized}")
+            return None
+        debug_log.append(f"Selected brand: {labels['brand'] or make_normalized}")
+        
+        # Step 2: Select Year
+        # Try to use search box if available
+        year_input = await page.query_selector("input[placeholder*='year' i], input[placeholder*='search' i]")
+        if year_input:
+            await year_input.fill(str(year))
+        # A filtered list is not the full catalogue: only learn the clicked year
+        if not await choose("year", year, learn_options=not year_input):
+            debug_log.append(f"Could not find year: {year}")
+            return None
+        debug_log.append(f"Selected year: {year}")
+        
+        # Steps 3-5: Model, Fuel Type, Transmission
+        for step, value in (("model", model), ("fuel", fuel), ("transmission", transmission)):
+            if not await choose(step, value):
+                debug_log.append(f"Could not find {step}: {value}")
+                return None
+            debug_log.append(f"Selected {step}: {labels[step] or value}")
+        
+        # Step 6: Select Variant (fuzzy match against the offered labels, same gearbox)
+        if not labels["variant"]:
             try:
-                page.click("text=Just checking price", timeout=5000)
-                debug_log.append("Selected intent: Just checking price")
-            except:
+                await page.wait_for_selector(OPTION_SELECTOR, timeout=5000)
+            except Exception:
                 pass
-            
-            # Wait for price to appear
-            page.wait_for_timeout(3000)
-            
-            # Try to extract price from result page
-            price = None
+            labels["variant"] = best_option(await _visible_options(page), variant, fuzzy=True)
+        if not labels["variant"] or not await choose("variant", variant):
+            # A different variant would quote a different car: fail rather than guess
+            debug_log.append(f"Could not find variant: {variant}")
+            return None
+        debug_log.append(f"Selected variant: {labels['variant']}")
+        
+        # Step 7: Select State
+        if not await choose("state", state_info['state']):
+            debug_log.append(f"Could not find state: {state_info['state']}")
+            return None
+        debug_log.append(f"Selected state: {state_info['state']}")
+        
+        # Step 8: Select RTO (first one for the state)
+        rto_prefix = state_info['rto_prefix']
+        if labels["rto"] is not False and await choose("rto", values["rto"], timeout=3000):
+            debug_log.append(f"Selected RTO: {labels['rto']}")
+        else:
+            # Try clicking first visible RTO button
             try:
-                # Look for price elements
-                price_selectors = [
-                    ".price-value",
-                    "[class*='price']",
-                    "text=/₹\s*[\d,]+/",
-                    "[data-testid*='price']"
-                ]
-                
-                for selector in price_selectors:
-                    try:
-                        element = page.query_selector(selector)
-                        if element:
-                            text = element.text_content()
-                            # Extract number from text
-                            numbers = re.findall(r"[\d,]+", text)
-                            if numbers:
-                                price_str = numbers[0].replace(",", "")
-                                if len(price_str) >= 5:  # At least 5 digits (10000+)
-                                    price = int(price_str)
-                                    debug_log.append(f"Found price: ₹{price:,}")
-                                    break
-                    except:
-                        continue
-                
-                if not price:
-                    # Check if we're on login page (session expired)
-                    if page.query_selector("input[type='tel']"):
-                        debug_log.append("Session expired. Please run setup_cars24_session.py again.")
-                    else:
-                        debug_log.append("Could not extract price from page")
-                        # Take screenshot for debugging
-                        page.screenshot(path="/tmp/cars24_debug.png")
-                        
-            except Exception as e:
-                debug_log.append(f"Error extracting price: {str(e)}")
-            
-            browser.close()
-            return price, "\n".join(debug_log)
-            
+                await page.click(f"button:has-text('{rto_prefix}')", timeout=3000)
+            except:
+                debug_log.append("Using default RTO")
+        
+        # Step 9: Select KM Range (skipped when the catalogue knows it is not listed)
+        if labels["km"] is False:
+            debug_log.append(f"KM range not listed: {km_range}")
+        elif await choose("km", km_range[:10]):  # Match first part until the label is known
+            debug_log.append(f"Selected KM: {labels['km']}")
+        else:
+            debug_log.append("Could not select exact KM range")
+        
+        # Step 10: Select City (skipped when the catalogue knows it is not listed)
+        if labels["city"] is False:
+            debug_log.append(f"City not listed for {state_info['state']}: {city}")
+        elif await choose("city", city):
+            debug_log.append(f"Selected city: {labels['city'] or city}")
+        else:
+            debug_log.append(f"Could not find city: {city}")
+        
+        # Step 11: Select Intent (this is what requests the quote)
+        capture.arm()
+        try:
+            await page.click("text=Just checking price", timeout=5000)
+            debug_log.append("Selected intent: Just checking price")
+        except:
+            pass
+        
+        # Quote arrives as JSON once the intent is chosen; stop as soon as it does
+        price = None
+        login = asyncio.ensure_future(_login_form(page))
+        try:
+            await asyncio.wait([capture.price, login], timeout=PRICE_WAIT,
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            login.cancel()
+        
+        if capture.price.done():
+            quote = capture.price.result()
+            price = quote["price"]
+            debug_log.append(f"Found price: ₹{price:,} (from {quote['url']})")
+        elif await page.query_selector(LOGIN_SELECTOR):
+            # Check if we're on login page (session expired)
+            debug_log.append("Session expired. Please run setup_cars24_session.py again.")
+            _health().record_login_required()
+        else:
+            price = await _price_from_dom(page)
+            if price:
+                debug_log.append(f"Found price on page: ₹{price:,} (no API response matched)")
+            else:
+                debug_log.append(f"Could not extract price ({len(capture.payloads)} API responses seen)")
+                # Take screenshot for debugging
+                await page.screenshot(path="/tmp/cars24_debug.png")
+        
+        return price
+
+    browser, site = get_breaker("browser"), get_breaker("cars24.com")
+    if browser.is_open() or not site.allow():
+        debug_log.append("Cars24 temporarily skipped after repeated failures (circuit open)")
+        return None, "\n".join(debug_log)
+    try:
+        price = _run_warm(job, saved_session)
+        browser.record_success()
+        site.record_success()
+        return price, "\n".join(debug_log)
+    except BrowserUnavailable as e:
+        browser.record_failure(e)
+        site.release()  # Nothing was asked of cars24.com
+        debug_log.append(f"Playwright Launch Failed: {e}")
+        return None, "\n".join(debug_log)
     except PlaywrightTimeout as e:
+        site.record_failure(e)
         debug_log.append(f"Timeout error: {str(e)}")
         return None, "\n".join(debug_log)
     except Exception as e:
+        site.record_failure(e)
         debug_log.append(f"Error: {str(e)}")
         return None, "\n".join(debug_log)
 
@@ -1,6 +1,17 @@
 import datetime
-import requests
-import re
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from src.circuit_breaker import guarded_get
+from src.extractors import LAKH, find_prices
+
+# Launch prices don't move: keep Google answers for a month (saves 1-2 paid queries per valuation)
+BASE_PRICE_CACHE_FILE = Path(__file__).parent.parent / "data" / "base_prices.json"
+BASE_PRICE_TTL = float(os.getenv("BASE_PRICE_TTL", 30 * 24 * 3600))
+_BASE_CACHE = None
+_BASE_CACHE_LOCK = threading.Lock()
 
 # Brand Categories and Depreciation Rates (Calibrated for Indian Resale Market)
 BRAND_CATEGORY = {
@@ -57,7 +68,44 @@ def get_segment(make, model):
     key = f"{make} {model}"
     return SEGMENT_MAP.get(key, "Compact SUV")
 
-def get_real_base_price(make, model, variant, year, api_key, cx):
+def base_price_key(make, model, variant, year):
+    return "|".join(str(v).lower().strip() for v in (make, model, variant, year))
+
+def _base_cache():
+    global _BASE_CACHE
+    if _BASE_CACHE is None:
+        _BASE_CACHE = {}
+        if BASE_PRICE_CACHE_FILE.exists():
+            try:
+                with open(BASE_PRICE_CACHE_FILE, "r") as f:
+                    _BASE_CACHE = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Base price cache unreadable, starting empty: {e}")
+    return _BASE_CACHE
+
+def cached_base_price(make, model, variant, year):
+    """Cached search result (price in rupees) younger than BASE_PRICE_TTL, else None."""
+    with _BASE_CACHE_LOCK:
+        entry = _base_cache().get(base_price_key(make, model, variant, year))
+    if entry and time.time() - entry["found_at"] < BASE_PRICE_TTL:
+        return entry["price"]
+    return None
+
+def _store_base_price(make, model, variant, year, price):
+    with _BASE_CACHE_LOCK:
+        cache = _base_cache()
+        cache[base_price_key(make, model, variant, year)] = {"price": price, "found_at": time.time()}
+        BASE_PRICE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = BASE_PRICE_CACHE_FILE.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp, BASE_PRICE_CACHE_FILE)
+
+def get_real_base_price(make, model, variant, year, api_key, cx, refresh=False):
+    if not refresh:
+        cached = cached_base_price(make, model, variant, year)
+        if cached:
+            return cached, "Found via Search (cached)"
     if not api_key or not cx:
         return None, "No API Key"
         
@@ -70,19 +118,17 @@ def get_real_base_price(make, model, variant, year, api_key, cx):
     for q in queries:
         try:
             params = {"key": api_key, "cx": cx, "q": q, "num": 3}
-            response = requests.get(url, params=params)
+            response = guarded_get(url, params=params)
             data = response.json()
             if "items" not in data: continue
                 
-            price_pattern = re.compile(r"(\d+(\.\d+)?)\s*(?:Lakh|Lakhs|L)", re.IGNORECASE)
             for item in data["items"]:
                 snippet = item.get("snippet", "") + " " + item.get("title", "")
-                matches = price_pattern.findall(snippet)
-                for match in matches:
-                    val = float(match[0])
+                for match in find_prices(snippet):
                     # Higher constraint to avoid matching 'used' prices
-                    if 4.5 < val < 200.0:
-                        return int(val * 100000), f"Found via Search"
+                    if 4.5 * LAKH < match.rupees < 200 * LAKH:
+                        _store_base_price(make, model, variant, year, match.rupees)
+                        return match.rupees, f"Found via Search"
         except: continue
     return None, "Search failed"
 
@@ -1,15 +1,6 @@
-import re
 import statistics
-import time
-from typing import List, Dict, Optional
-import requests
-from bs4 import BeautifulSoup
-try:
-    from playwright.sync_api import sync_playwright
-    from src.engine_smart_scraper import PLAYWRIGHT_READY
-except ImportError:
-    sync_playwright = None
-    PLAYWRIGHT_READY = False
+from typing import List, Dict
+from src.listing_source import fetch_until
 
 class MarketResearchEngine:
     """
@@ -17,32 +8,9 @@ class MarketResearchEngine:
     Ported from the user's provided 'FixedMarketSearch' system.
     """
     
-    def __init__(self, headless: bool = True):
-        self.headless = headless
+    def __init__(self):
         self.min_listings_required = 2 
 
-    def _safe_launch(self, playwright):
-        """Helper to safely launch browser with circuit breaker."""
-        # Using the global flag from smart_scraper to synchronize failures
-        from src.engine_smart_scraper import PLAYWRIGHT_READY as PR_GLOBAL
-        if not PR_GLOBAL:
-            return None
-        try:
-            return playwright.chromium.launch(
-                headless=self.headless,
-                args=[
-                    '--no-sandbox',
-                    '--disable-gpu',
-                    '--disable-dev-shm-usage',
-                    '--disable-setuid-sandbox'
-                ]
-            )
-        except Exception as e:
-            print(f"❌ MarketResearch Launch Failed: {e}")
-            # We don't set PR_GLOBAL = False here because we can't easily write to it,
-            # but usually it's set by smart_scraper which runs earlier.
-            return None
-
     def search_specific_car(self, make: str, model: str, year: int, 
                            city: str = "hyderabad") -> Dict:
         """
@@ -52,11 +20,15 @@ class MarketResearchEngine:
         
         all_results = []
         
+        # CarWale + Spinny, paging further only until enough listings pass validation
+        pages = fetch_until(make, model, city, target=self.min_listings_required,
+                            accept=lambda lst: bool(self._validate_listings([self._research_view(lst)], make, model, year)))
+        
         # Strategy 1: CarWale Scrape
-        all_results.extend(self._scrape_carwale(make, model, year, city))
+        all_results.extend(self._shared_listings(pages, 'CarWale'))
         
         # Strategy 2: Spinny Scrape (requires Playwright)
-        all_results.extend(self._scrape_spinny(make, model, year, city))
+        all_results.extend(self._shared_listings(pages, 'Spinny'))
         
         # CRITICAL: Validate all results
         validated = self._validate_listings(all_results, make, model, year)
@@ -85,91 +57,15 @@ class MarketResearchEngine:
             'debug_log': f"Validated {len(validated)} listings after strict filtering."
         }
 
-    def _scrape_carwale(self, make: str, model: str, year: int, city: str) -> List[Dict]:
-        # Requires Playwright
-        from src.engine_smart_scraper import PLAYWRIGHT_READY as PR_GLOBAL
-        if not sync_playwright or not PR_GLOBAL:
-            return []
-            
-        listings = []
-        try:
-            with sync_playwright() as p:
-                browser = self._safe_launch(p)
-                if not browser: return []
-                page = browser.new_page()
-                
-                make_slug = make.lower().replace(' ', '-')
-                model_slug = model.lower().replace(' ', '-')
-                city_slug = city.lower().replace(' ', '-')
-                url = f"https://www.carwale.com/used/{make_slug}-{model_slug}-cars-in-{city_slug}/"
-                
-                print(f"   📍 CarWale: {url}")
-                page.goto(url, wait_until="domcontentloaded", timeout=20000)
-                time.sleep(2)
-                
-                # Extract cards using the robust selector
-                cards = page.query_selector_all('.o-cpnuEd, .used-car-card, [data-track-label="ListingCard"]')
-                print(f"   🎴 CarWale Cards Found: {len(cards)}")
-                
-                for card in cards[:15]:
-                    inner_text = card.inner_text()
-                    # Price
-                    price_match = re.search(r'₹\s*([\d.]+)\s*(?:Lakh|L)', inner_text, re.IGNORECASE)
-                    if not price_match: continue
-                    price = float(price_match.group(1))
-                    
-                    # Year
-                    year_match = re.search(r'\b(20\d{2})\b', inner_text)
-                    car_year = int(year_match.group(1)) if year_match else None
-                    
-                    listings.append({
-                        'source': 'CarWale',
-                        'price': price,
-                        'year': car_year,
-                        'title': inner_text[:100].replace('\n', ' ')
-                    })
-                browser.close()
-        except Exception as e:
-            print(f"   ⚠️ CarWale Playwright Failed: {e}")
-        return listings
+    @staticmethod
+    def _research_view(listing: Dict) -> Dict:
+        return dict(listing, year=listing['year'] or None)
 
-    def _scrape_spinny(self, make: str, model: str, year: int, city: str) -> List[Dict]:
-        # Requires Playwright
-        from src.engine_smart_scraper import PLAYWRIGHT_READY as PR_GLOBAL
-        if not sync_playwright or not PR_GLOBAL:
-            return []
-            
-        listings = []
-        try:
-            with sync_playwright() as p:
-                browser = self._safe_launch(p)
-                if not browser: return []
-                page = browser.new_page()
-                make_slug = make.lower().replace(' ', '-')
-                model_slug = model.lower().replace(' ', '-')
-                city_slug = city.lower().replace(' ', '-')
-                url = f"https://www.spinny.com/buy-used-{make_slug}-{model_slug}-cars-in-{city_slug}/"
-                
-                page.goto(url, wait_until="domcontentloaded", timeout=20000)
-                time.sleep(3)
-                cards = page.query_selector_all('[data-testid="car-card"], .car-card')
-                for card in cards[:15]:
-                    text = card.inner_text()
-                    price_match = re.search(r'₹\s*([\d.]+)\s*(?:Lakh|L)', text, re.IGNORECASE)
-                    if not price_match: continue
-                    price = float(price_match.group(1))
-                    year_match = re.search(r'\b(20\d{2})\b', text)
-                    car_year = int(year_match.group(1)) if year_match else None
-                    listings.append({
-                        'source': 'Spinny',
-                        'price': price,
-                        'year': car_year,
-                        'title': text[:100].replace('\n', ' ')
-                    })
-                browser.close()
-        except:
-            pass
-        return listings
+    def _shared_listings(self, pages: Dict[str, Dict], source: str) -> List[Dict]:
+        """Every card a source returned, over however many pages were read."""
+        page = pages[source]
+        print(f"   📍 {source}: {page['url']} ({page['method']}, {page['pages']} pages, {len(page['listings'])} cards)")
+        return [self._research_view(listing) for listing in page['listings']]
 
     def _validate_listings(self, listings: List[Dict], target_make: str, 
                           target_model: str, target_year: int) -> List[Dict]:
@@ -1,6 +1,6 @@
-import requests
-import re
 import os
+from src.circuit_breaker import guarded_get
+from src.extractors import LAKH, find_prices
 
 def fetch_market_prices(make, model, year, variant, km, api_key, cx, location, remarks=""):
     """
@@ -30,57 +30,43 @@ def fetch_market_prices(make, model, year, variant, km, api_key, cx, location, r
     debug_data = [] # List of {title, price_lakh}
 
     try:
-        response = requests.get(url, params=params)
+        response = guarded_get(url, params=params)
         data = response.json()
         
         if "items" not in data:
             return None, []
             
         prices = []
-        # Regex for price extraction - Stricter to avoid matching mileage + "Location"
-        # We look for Lakh/Lakhs or a standalone L but with word boundaries
-        price_pattern = re.compile(r"\b(\d{1,3}(?:\.\d{1,2})?)\s*(?:Lakh|Lakhs|L)\b", re.IGNORECASE)
         
         for item in data["items"]:
             title = item.get("title", "")
             snippet = item.get("snippet", "")
             full_text = snippet + " " + title
             
-            # Remove commas from full_text to handle 10,00,000 correctly if it appears
-            # But be careful not to mess up the "XX,XXX km" pattern
-            # Actually, let's just match the patterns we want
-            
-            matches = price_pattern.findall(full_text)
+            # Shared extractor reads Lakh/Cr and 10,00,000-style amounts and
+            # never mistakes "96,000 km" for a price
+            # Basic sanity check: 1.5L to 500L (5 Cr)
+            # Increased lower bound to filter out "Downpayment starts at 1 Lakh"
+            matches = find_prices(full_text, int(1.5 * LAKH), 500 * LAKH)
             
             for match in matches:
-                try:
-                    # STRICT RELEVANCE CHECK
-                    title_lower = title.lower()
-                    model_lower = model.lower()
+                # STRICT RELEVANCE CHECK
+                title_lower = title.lower()
+                model_lower = model.lower()
+                
+                # 1. Must contain Model name
+                if model_lower not in title_lower:
+                    continue
                     
-                    # 1. Must contain Model name
-                    if model_lower not in title_lower:
-                        continue
-                        
-                    # 2. Exclude comparisons and reviews
-                    if " vs " in title_lower or "compare" in title_lower or "review" in title_lower:
-                        continue
-                        
-                    val = float(match[0])
-                    # Basic sanity check: 1.5L to 500L (5 Cr)
-                    # Increased lower bound to filter out "Downpayment starts at 1 Lakh"
-                    if 1.5 <= val <= 500.0: 
-                        actual_price = int(val * 100000)
-                        
-                        # Even stricter: If it's a non-luxury 2017 car, ₹96L is impossible.
-                        # We can add a loose bound check if we had base price here, 
-                        # but for now, the stricter regex should solve the "96" vs "96,000 km" issue.
-                        
-                        prices.append(actual_price)
-                        debug_data.append({"title": title[:60] + "...", "raw_price": f"{val} Lakh"})
-                except ValueError:
+                # 2. Exclude comparisons and reviews
+                if " vs " in title_lower or "compare" in title_lower or "review" in title_lower:
                     continue
                     
+                # Even stricter: If it's a non-luxury 2017 car, ₹96L is impossible.
+                # We can add a loose bound check if we had base price here.
+                prices.append(match.rupees)
+                debug_data.append({"title": title[:60] + "...", "raw_price": f"{match.lakh} Lakh"})
+                    
         if not prices:
             return None, debug_data
             
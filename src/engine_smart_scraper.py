@@ -1,168 +1,44 @@
-try:
-    from playwright.sync_api import sync_playwright
-    PLAYWRIGHT_AVAILABLE = True
-except ImportError:
-    PLAYWRIGHT_AVAILABLE = False
-import re
 import statistics
-import time
 from typing import List, Dict
-
-PLAYWRIGHT_READY = True  # Global circuit breaker
+from src.listing_source import fetch_listing_pages, fetch_until
 
 class SmartCarScraper:
     """
-    Intelligent scraper using Playwright to bypass anti-bot measures.
-    Extracts multiple listings and applies statistical cleaning.
+    Market listings from the shared listing layer (store, embedded JSON over
+    HTTP, browser only as its fallback), with statistical cleaning.
     """
     
-    def __init__(self, headless: bool = True):
-        self.headless = headless
-        
-    def _safe_launch(self, playwright):
-        """Helper to safely launch browser with circuit breaker."""
-        global PLAYWRIGHT_READY
-        if not PLAYWRIGHT_READY:
-            return None
-        try:
-            return playwright.chromium.launch(
-                headless=self.headless,
-                args=[
-                    '--no-sandbox',
-                    '--disable-gpu',
-                    '--disable-dev-shm-usage',
-                    '--disable-setuid-sandbox',
-                    '--no-first-run',
-                    '--no-zygote',
-                    '--single-process'
-                ]
-            )
-        except Exception as e:
-            print(f"❌ Playwright Launch Failed: {e}")
-            PLAYWRIGHT_READY = False
-            return None
+    @staticmethod
+    def _in_range(listing: Dict, year: int) -> bool:
+        return not listing['year'] or abs(listing['year'] - year) <= 1 # Tolerance
 
-    def _get_page_content(self, url: str) -> str:
-        if not PLAYWRIGHT_READY: return ""
-        with sync_playwright() as p:
-            browser = self._safe_launch(p)
-            if not browser: return ""
-            page = browser.new_page(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-            try:
-                page.goto(url, wait_until="networkidle", timeout=30000)
-                time.sleep(2) # Allow dynamic content
-                content = page.content()
-                browser.close()
-                return content
-            except Exception as e:
-                print(f"❌ Scraper error for {url}: {e}")
-                browser.close()
-                return ""
+    def _select(self, listings: List[Dict], year: int, max_results: int) -> List[Dict]:
+        """Scraper's own view of the shared listing set: first N cards within ±1 year."""
+        return [listing for listing in listings if self._in_range(listing, year)][:max_results]
 
     def scrape_carwale_listings(self, make: str, model: str, year: int, 
                                 city: str, max_results: int = 10) -> List[Dict]:
-        city_slug = city.lower().replace(' ', '-')
-        make_slug = make.lower().replace(' ', '-')
-        model_slug = model.lower().replace(' ', '-')
-        url = f"https://www.carwale.com/used/{make_slug}-{model_slug}-cars-in-{city_slug}/"
-        
-        if not PLAYWRIGHT_READY: return []
-        
-        with sync_playwright() as p:
-            browser = self._safe_launch(p)
-            if not browser: return []
-            page = browser.new_page(user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36")
-            listings = []
-            
-            try:
-                page.goto(url, wait_until="domcontentloaded", timeout=20000)
-                page.wait_for_selector('[data-track-label="ListingCard"], .o-cpnuEd', timeout=10000)
-                
-                cards = page.query_selector_all('[data-track-label="ListingCard"], .o-cpnuEd')
-                for card in cards[:max_results]:
-                    text = card.inner_text()
-                    
-                    # Parse price
-                    price_match = re.search(r'₹\s*([\d.]+)\s*Lakh', text, re.IGNORECASE)
-                    if not price_match: continue
-                    price = float(price_match.group(1))
-                    
-                    # Parse Year
-                    year_match = re.search(r'\b(20\d{2})\b', text)
-                    f_year = int(year_match.group(1)) if year_match else 0
-                    
-                    # Parse KM
-                    km_match = re.search(r'([\d,]+)\s*km', text, re.IGNORECASE)
-                    km = int(km_match.group(1).replace(',', '')) if km_match else 0
-                    
-                    if f_year and abs(f_year - year) > 1: continue # Tolerance
-                    
-                    listings.append({
-                        'source': 'CarWale',
-                        'price': price,
-                        'year': f_year,
-                        'km': km,
-                        'title': text.split('\n')[0]
-                    })
-                browser.close()
-            except Exception as e:
-                print(f"⚠️ CarWale fail: {e}")
-                browser.close()
-            return listings
+        page = fetch_listing_pages(make, model, city)['CarWale']
+        return self._select(page['listings'], year, max_results)
 
     def scrape_spinny_listings(self, make: str, model: str, year: int,
                                city: str, max_results: int = 10) -> List[Dict]:
-        make_s = make.lower().replace(' ', '-')
-        model_s = model.lower().replace(' ', '-')
-        city_s = city.lower().replace(' ', '-')
-        url = f"https://www.spinny.com/buy-used-{make_s}-{model_s}-cars-in-{city_s}/"
-        
-        if not PLAYWRIGHT_READY: return []
-        
-        with sync_playwright() as p:
-            browser = self._safe_launch(p)
-            if not browser: return []
-            page = browser.new_page()
-            listings = []
-            try:
-                page.goto(url, wait_until="networkidle", timeout=20000)
-                cards = page.query_selector_all('[data-testid="car-card"], .car-card')
-                for card in cards[:max_results]:
-                    text = card.inner_text()
-                    
-                    price_m = re.search(r'₹\s*([\d.]+)\s*(?:Lakh|L)', text, re.IGNORECASE)
-                    if not price_m: continue
-                    price = float(price_m.group(1))
-                    
-                    year_m = re.search(r'\b(20\d{2})\b', text)
-                    f_year = int(year_m.group(1)) if year_m else 0
-                    
-                    km_m = re.search(r'([\d,]+)\s*km', text, re.IGNORECASE)
-                    km = int(km_m.group(1).replace(',', '')) if km_m else 0
-                    
-                    if f_year and abs(f_year - year) > 1: continue
-                    
-                    listings.append({
-                        'source': 'Spinny',
-                        'price': price,
-                        'year': f_year,
-                        'km': km,
-                        'title': text.split('\n')[0]
-                    })
-                browser.close()
-            except Exception as e:
-                print(f"⚠️ Spinny fail: {e}")
-                browser.close()
-            return listings
+        page = fetch_listing_pages(make, model, city)['Spinny']
+        return self._select(page['listings'], year, max_results)
+
+    def scrape_all_sources(self, make: str, model: str, year: int, city: str,
+                           max_results: int = 10) -> List[Dict]:
+        """All listing sources, fetched concurrently by the shared acquisition layer
+        (further result pages only while fewer than max_results cards are in range)."""
+        all_listings = []
+        pages = fetch_until(make, model, city, accept=lambda listing: self._in_range(listing, year), target=max_results)
+        for page in pages.values():
+            all_listings.extend(self._select(page['listings'], year, max_results))
+        return all_listings
 
     def get_market_data(self, make: str, model: str, year: int, 
                        fuel: str, city: str, km_driven: int) -> Dict:
-        if not PLAYWRIGHT_AVAILABLE or not PLAYWRIGHT_READY:
-            return {'success': False, 'message': 'Playwright (Live Search) is currently disabled or unavailable.', 'count': 0}
-            
-        all_listings = []
-        all_listings.extend(self.scrape_carwale_listings(make, model, year, city))
-        all_listings.extend(self.scrape_spinny_listings(make, model, year, city))
+        all_listings = self.scrape_all_sources(make, model, year, city)
         
         # IQR Outlier filter
         if not all_listings:
@@ -193,10 +69,6 @@ class SmartCarScraper:
             }
         }
 
-if __name__ == "__main__":
-    s = SmartCarScraper(headless=True)
-    print(s.get_market_data("Maruti", "Swift", 2020, "Petrol", "Mumbai", 35000))
-
 if __name__ == "__main__":
     scraper = SmartCarScraper()
     print(scraper.get_market_data("Hyundai", "Creta", 2020, "Petrol", "Mumbai", 35000))
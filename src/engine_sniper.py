@@ -1,225 +1,113 @@
-import requests
-from bs4 import BeautifulSoup
-import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait
+from src.listing_source import fetch_listing_pages, source_url
+from src.circuit_breaker import guarded_get
+from src.io_recorder import bind
+from src.extractors import LAKH, YEAR_PATTERN, first_price, first_year
 
-def fetch_closest_match(make, model, year, variant, km, city, api_key_search, search_cx):
+SNIPER_DEADLINE = 30   # Whole engine, direct fetches + Google fallback (seconds)
+GOOGLE_TIMEOUT = 8     # Per fallback query
+
+# Shared pool: a fetch that outlives the deadline keeps filling the listing cache in the background
+_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="sniper")
+
+GOOGLE_SITES = [("carwale.com/used", "CarWale"), ("spinny.com/buy-used-cars", "Spinny")]
+
+
+def _google_candidates(site, source_name, query, year, api_key_search, search_cx, timeout):
+    """Listing candidates from one site-restricted Custom Search query."""
+    url = "https://www.googleapis.com/customsearch/v1"
+    params = {"key": api_key_search, "cx": search_cx, "q": f"site:{site} {query}", "num": 3}
+    resp = guarded_get(url, params=params, timeout=timeout)
+    data = resp.json()
+    candidates = []
+    for item in data.get("items", []):
+        title = item.get("title", "")
+        snippet = item.get("snippet", "")
+        full_text = f"{title} {snippet}"
+        
+        title_years = YEAR_PATTERN.findall(title) or YEAR_PATTERN.findall(snippet)
+        if not title_years or abs(int(title_years[0]) - year) > 1:
+            continue
+        
+        price = first_price(full_text, 1 * LAKH, 200 * LAKH, prefer_unit=True)
+        if price:
+            candidates.append({
+                "price": price,
+                "title": title,
+                "url": item.get("link"),
+                "source": source_name
+            })
+    return candidates
+
+
+def fetch_closest_match(make, model, year, variant, km, city, api_key_search, search_cx, deadline=SNIPER_DEADLINE):
     """
     Engine D: Direct Match (Multi-Source)
-    Targets CarWale and Spinny via Direct URL Scraping + Google Search Fallback.
+    Targets CarWale and Spinny via the shared listing layer + Google Search Fallback.
     Returns: (best_price, sources_dict, match_details_string)
     
     sources_dict format: {"carwale": {"price": int, "url": str}, "spinny": {"price": int, "url": str}}
-    """
     
-    # Clean inputs
-    city_slug = city.lower().replace(" ", "-") if city else "mumbai"
-    
-    # Robust Slug Mapping for CarWale
-    CARWALE_SLUG_MAP = {
-        "maruti": "maruti-suzuki",
-        "mercedes": "mercedes-benz",
-        "mercedes-benz": "mercedes-benz",
-        "land rover": "land-rover",
-        "mg": "mg",
-        "bmw": "bmw",
-        "audi": "audi",
-        "windsor": "windsor-ev"
-    }
-    
-    safe_make = make.lower().strip()
-    make_slug = CARWALE_SLUG_MAP.get(safe_make, safe_make.replace(" ", "-"))
-    model_slug = model.lower().strip().replace(" ", "-")
+    Source pages are fetched concurrently and both Google fallback queries run in
+    parallel; whatever has not answered by `deadline` seconds is left out.
+    """
     
     debug_log = []
     sources = {}
     all_candidates = []
+    ends_at = time.time() + deadline
     
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5"
-    }
-    
-    year_pattern = re.compile(r"\b(20\d{2})\b")
-    
-    # ==================== CARWALE SCRAPING ====================
+    # ==================== CARWALE / SPINNY LISTINGS ====================
+    # Pages come from the shared acquisition layer (fetched once per valuation, sources in parallel)
     carwale_candidates = []
-    carwale_url = f"https://www.carwale.com/used/{city_slug}/{make_slug}-{model_slug}/"
-    debug_log.append(f"CarWale: Attempting {carwale_url}")
-    
-    try:
-        response = requests.get(carwale_url, headers=headers, timeout=5)
-        if response.history:
-            debug_log.append(f"CarWale: Redirected to {response.url}")
-            
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            links = soup.find_all('a', href=True)
-            
-            for link in links:
-                href = link['href']
-                text = link.get_text(" ", strip=True)
-                
-                if "/used/" in href and (make_slug in href or model_slug in href):
-                    full_text = text
-                    parent = link.find_parent('div')
-                    if parent:
-                        full_text += " " + parent.get_text(" ", strip=True)
-                    
-                    title_years = year_pattern.findall(full_text)
-                    if not title_years:
-                        continue
-                        
-                    listing_year = int(title_years[0])
-                    if abs(listing_year - year) > 1:
-                        continue
-
-                    price_matches = re.findall(r"(?:₹|Rs\.?)\s*(\d+(\.\d+)?)\s*(?:Lakh|Lakhs|L)", full_text, re.IGNORECASE)
-                    
-                    found_price = 0
-                    if price_matches:
-                        val = float(price_matches[0][0])
-                        if 1.0 < val < 200.0:
-                            found_price = int(val * 100000)
-                    
-                    if found_price > 0:
-                        carwale_candidates.append({
-                            "price": found_price, 
-                            "title": text, 
-                            "url": "https://www.carwale.com" + href if not href.startswith("http") else href,
-                            "source": "CarWale"
-                        })
-            debug_log.append(f"CarWale: Found {len(carwale_candidates)} matches")
-        else:
-            debug_log.append(f"CarWale: Status {response.status_code}")
-            
-    except Exception as e:
-        debug_log.append(f"CarWale Error: {str(e)}")
-    
-    # ==================== SPINNY SCRAPING ====================
     spinny_candidates = []
-    # Spinny URL pattern: https://www.spinny.com/used-{model}-cars-in-{city}/s/
-    spinny_url = f"https://www.spinny.com/used-{model_slug}-cars-in-{city_slug}/s/"
-    debug_log.append(f"Spinny: Attempting {spinny_url}")
-    
     try:
-        response = requests.get(spinny_url, headers=headers, timeout=5)
-        if response.history:
-            debug_log.append(f"Spinny: Redirected to {response.url}")
-            
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Spinny uses different HTML structure - look for car cards
-            # Try multiple selectors
-            car_cards = soup.find_all('a', href=True)
-            
-            for card in car_cards:
-                href = card['href']
-                text = card.get_text(" ", strip=True)
-                
-                # Spinny listing URLs contain /buy-used-cars/
-                if "/buy-used-cars/" in href and model_slug in href.lower():
-                    full_text = text
-                    parent = card.find_parent('div')
-                    if parent:
-                        full_text += " " + parent.get_text(" ", strip=True)
-                    
-                    title_years = year_pattern.findall(full_text)
-                    if not title_years:
-                        # Also check the URL for year
-                        url_years = year_pattern.findall(href)
-                        if url_years:
-                            title_years = url_years
-                        else:
-                            continue
-                        
-                    listing_year = int(title_years[0])
-                    if abs(listing_year - year) > 1:
-                        continue
-
-                    # Spinny prices may be in different formats
-                    price_matches = re.findall(r"(?:₹|Rs\.?)\s*(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:Lakh|Lakhs|L)?", full_text, re.IGNORECASE)
-                    
-                    found_price = 0
-                    for match in price_matches:
-                        try:
-                            val_str = match.replace(",", "")
-                            val = float(val_str)
-                            # Check if it's in lakhs or actual value
-                            if 1.0 < val < 200.0:
-                                found_price = int(val * 100000)
-                                break
-                            elif 100000 < val < 20000000:
-                                found_price = int(val)
-                                break
-                        except:
-                            continue
-                    
-                    if found_price > 0:
-                        full_url = "https://www.spinny.com" + href if not href.startswith("http") else href
-                        spinny_candidates.append({
-                            "price": found_price, 
-                            "title": text[:100] if text else f"{year} {make} {model}", 
-                            "url": full_url,
-                            "source": "Spinny"
-                        })
-            debug_log.append(f"Spinny: Found {len(spinny_candidates)} matches")
-        else:
-            debug_log.append(f"Spinny: Status {response.status_code}")
-            
-    except Exception as e:
-        debug_log.append(f"Spinny Error: {str(e)}")
+        pages = _EXECUTOR.submit(bind(fetch_listing_pages), make, model, city).result(timeout=deadline)
+    except TimeoutError:
+        debug_log.append(f"Direct fetch exceeded {deadline}s deadline")
+        pages = {source: {"listings": [], "url": source_url(source, make, model, city), "method": "timeout"}
+                 for source in ("CarWale", "Spinny")}
+    carwale_url = pages["CarWale"]["url"]
+    spinny_url = pages["Spinny"]["url"]
+    
+    for source_name, page in pages.items():
+        site_candidates = carwale_candidates if source_name == "CarWale" else spinny_candidates
+        debug_log.append(f"{source_name}: {page['url']} ({page['method']})")
+        
+        for listing in page["listings"]:
+            if not listing["year"] or abs(listing["year"] - year) > 1:
+                continue
+            if not 1.0 < listing["price"] < 200.0:
+                continue
+            site_candidates.append({
+                "price": int(listing["price"] * 100000),
+                "title": listing["title"] or f"{year} {make} {model}",
+                "url": listing["url"] or page["url"],
+                "source": source_name
+            })
+        debug_log.append(f"{source_name}: Found {len(site_candidates)} matches")
 
     # ==================== GOOGLE FALLBACK ====================
-    # If no direct results, use Google to search both sites
-    if not carwale_candidates and not spinny_candidates and api_key_search:
+    # If no direct results, use Google to search both sites (both queries at once)
+    remaining = ends_at - time.time()
+    if not carwale_candidates and not spinny_candidates and api_key_search and remaining > 1:
         debug_log.append("Falling back to Google Search...")
-        
-        for site, site_candidates in [("carwale.com/used", carwale_candidates), ("spinny.com/buy-used-cars", spinny_candidates)]:
-            query = f"site:{site} {make} {model} {city} {year} {variant}"
-            
-            url = "https://www.googleapis.com/customsearch/v1"
-            params = {"key": api_key_search, "cx": search_cx, "q": query, "num": 3}
-            
+        query = f"{make} {model} {city} {year} {variant}"
+        timeout = min(GOOGLE_TIMEOUT, remaining)
+        futures = {_EXECUTOR.submit(bind(_google_candidates), site, source_name, query, year,
+                                    api_key_search, search_cx, timeout): (site, source_name)
+                   for site, source_name in GOOGLE_SITES}
+        done, not_done = wait(futures, timeout=remaining)
+        for future in done:
+            site, source_name = futures[future]
             try:
-                resp = requests.get(url, params=params)
-                data = resp.json()
-                if "items" in data:
-                    price_pattern_google = re.compile(r"(\d+(\.\d+)?)\s*(?:Lakh|Lakhs|L)", re.IGNORECASE)
-                    for item in data["items"]:
-                        title = item.get("title", "")
-                        snippet = item.get("snippet", "")
-                        full_text = f"{title} {snippet}"
-                        
-                        title_years = year_pattern.findall(title)
-                        if not title_years:
-                            title_years = year_pattern.findall(snippet)
-                        
-                        if title_years:
-                            listing_year = int(title_years[0])
-                            if abs(listing_year - year) > 1:
-                                continue
-                        else:
-                            continue
-                        
-                        matches = price_pattern_google.findall(full_text)
-                        for match in matches:
-                            try:
-                                val = float(match[0])
-                                if 1.0 < val < 200.0:
-                                    source_name = "CarWale" if "carwale" in site else "Spinny"
-                                    site_candidates.append({
-                                        "price": int(val * 100000),
-                                        "title": title,
-                                        "url": item.get("link"),
-                                        "source": source_name
-                                    })
-                                    break
-                            except: 
-                                continue
+                site_candidates = carwale_candidates if source_name == "CarWale" else spinny_candidates
+                site_candidates.extend(future.result())
             except Exception as e:
                 debug_log.append(f"Google Search Error ({site}): {str(e)}")
+        for future in not_done:
+            debug_log.append(f"Google Search Error ({futures[future][0]}): deadline exceeded")
 
     # ==================== SCORING & SELECTION ====================
     all_candidates = carwale_candidates + spinny_candidates
@@ -284,16 +172,12 @@ def fetch_closest_match(make, model, year, variant, km, city, api_key_search, se
     
     # Build sources dict
     if best_carwale:
-        # P = P * (0.9 if year_listing > year else 1.0)
-        # We need listing year. Let's re-extract or store it earlier.
-        # Quick fix: re-extract from title since we didn't store it in candidates list earlier (can be improved)
+        # One model year newer than asked: knock 10% off (listing year read from the title)
         p = best_carwale["price"]
-        title_years = year_pattern.findall(best_carwale["title"])
-        if title_years:
-            ly = int(title_years[0])
-            if ly > year:
-                p = int(p * 0.9) # 10% depreciation for 1 year newer
-                best_carwale["scoring_debug"] += " [Depreciated 10%]"
+        ly = first_year(best_carwale["title"])
+        if ly and ly > year:
+            p = int(p * 0.9)
+            best_carwale["scoring_debug"] += " [Depreciated 10%]"
         
         sources["carwale"] = {"price": p, "url": best_carwale["url"]}
         best_carwale["price"] = p # Update for overall compare
@@ -302,12 +186,10 @@ def fetch_closest_match(make, model, year, variant, km, city, api_key_search, se
         
     if best_spinny:
         p = best_spinny["price"]
-        title_years = year_pattern.findall(best_spinny["title"])
-        if title_years:
-            ly = int(title_years[0])
-            if ly > year:
-                p = int(p * 0.9)
-                best_spinny["scoring_debug"] += " [Depreciated 10%]"
+        ly = first_year(best_spinny["title"])
+        if ly and ly > year:
+            p = int(p * 0.9)
+            best_spinny["scoring_debug"] += " [Depreciated 10%]"
                 
         sources["spinny"] = {"price": p, "url": best_spinny["url"]}
         best_spinny["price"] = p
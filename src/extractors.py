@@ -0,0 +1,131 @@
+"""
+Shared Price / Year / KM Extractors.
+
+Each engine used to declare its own price regex (and some recompiled it per
+call), with different Lakh/Crore/comma rules: "5,90,000" was 5 rupees in one
+place and 5.9 Lakh in another. Here one precompiled pattern scans the text
+once and returns typed values:
+
+    extract("2019 Swift ZXI · 1,20,000 km · ₹ 5.9 Lakh")
+    -> Extracted(prices=[Price(rupees=590000, unit='lakh', currency=True)], years=[2019], kms=[120000])
+
+Prices are always in rupees. A number counts as a price when it carries a
+currency marker (₹ / Rs / INR, with or without a Lakh/Cr unit, Indian or
+western digit grouping) or a spelled-out unit ("6.25 Lakh", "1.2 Cr"). A bare
+"L" is only read as Lakh after a currency marker, so "1.2L Petrol" is not a price.
+"""
+
+import re
+from typing import List, NamedTuple, Optional
+
+LAKH = 100000
+CRORE = 10000000
+
+_AMOUNT = r"\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+
+# Two branches, each starting on a literal or a digit so the regex engine
+# skips plain words quickly: a currency-marked amount, or a bare number with an
+# optional km / Lakh / Cr suffix (years are bare numbers, classified in extract)
+SCAN_PATTERN = re.compile(rf"""
+    (?:₹|\bRs\.?|\bINR)\s*(?P<camt>{_AMOUNT})(?:\s*(?P<cunit>crores?\b|cr\b\.?|lakhs?\b|lacs?\b|l\b))?
+  | (?P<num>{_AMOUNT})(?:\s*(?:(?P<km>kms?\b|kilomet(?:er|re)s?\b)|(?P<unit>crores?|cr|lakhs?|lacs?)\b))?
+""", re.IGNORECASE | re.VERBOSE)
+
+YEAR_PATTERN = re.compile(r"\b(20\d{2})\b")
+NUMBER_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+class Price(NamedTuple):
+    rupees: int
+    unit: str       # "crore", "lakh" or "" (plain rupee amount)
+    currency: bool  # Preceded by ₹ / Rs / INR
+
+    @property
+    def lakh(self) -> float:
+        return round(self.rupees / LAKH, 2)
+
+
+class Extracted(NamedTuple):
+    prices: List[Price]
+    years: List[int]
+    kms: List[int]
+
+
+def _price(amount: str, unit: Optional[str], currency: bool) -> Price:
+    value = float(amount.replace(",", ""))
+    unit = (unit or "").lower().rstrip(".")
+    if unit.startswith("cr"):
+        return Price(int(round(value * CRORE)), "crore", currency)
+    if unit:
+        return Price(int(round(value * LAKH)), "lakh", currency)
+    return Price(int(round(value)), "", currency)
+
+
+def _standalone(text: str, start: int, end: int) -> bool:
+    """Same as \\b on both sides: not glued to letters or digits ("A2020", "2020s")."""
+    before = text[start - 1] if start else " "
+    after = text[end] if end < len(text) else " "
+    return not (before.isalnum() or before == "_" or after.isalnum() or after == "_")
+
+
+def extract(text: str) -> Extracted:
+    """Every price, year and km reading in `text`, in order, from a single scan."""
+    prices, years, kms = [], [], []
+    text = text or ""
+    for m in SCAN_PATTERN.finditer(text):
+        camt, cunit, num, km, unit = m.groups()
+        if camt:
+            prices.append(_price(camt, cunit, True))
+        elif km:
+            kms.append(int(float(num.replace(",", ""))))
+        elif unit:
+            prices.append(_price(num, unit, False))
+        elif len(num) == 4 and num[:2] == "20" and _standalone(text, m.start(), m.end()):
+            years.append(int(num))
+    return Extracted(prices, years, kms)
+
+
+def find_prices(text: str, min_rupees: int = 0, max_rupees: Optional[int] = None) -> List[Price]:
+    """Prices in `text` within [min_rupees, max_rupees]."""
+    return [p for p in extract(text).prices
+            if p.rupees >= min_rupees and (max_rupees is None or p.rupees <= max_rupees)]
+
+
+def first_price(text: str, min_rupees: int = 0, max_rupees: Optional[int] = None,
+                prefer_unit: bool = False) -> Optional[int]:
+    """
+    First in-range price in rupees (None when there is none). `prefer_unit`
+    picks a Lakh/Cr figure over plain rupee amounts appearing before it
+    (EMI or booking amounts on listing cards).
+    """
+    prices = find_prices(text, min_rupees, max_rupees)
+    if prefer_unit:
+        prices = [p for p in prices if p.unit] or prices
+    return prices[0].rupees if prices else None
+
+
+def first_year(text: str) -> Optional[int]:
+    m = YEAR_PATTERN.search(text or "")
+    return int(m.group(1)) if m else None
+
+
+def first_km(text: str) -> Optional[int]:
+    kms = extract(text).kms
+    return kms[0] if kms else None
+
+
+def to_rupees(value) -> Optional[int]:
+    """
+    Dataset cells and JSON fields: numbers are rupees as-is; strings may carry a
+    unit ("5.5 Lakh", "1.2 Crore") or just digits ("8,50,000"). None when unreadable.
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return None if value != value else int(value)  # NaN
+    text = str(value)
+    prices = extract(text).prices
+    if prices:
+        return prices[0].rupees
+    m = NUMBER_PATTERN.search(text)
+    return int(float(m.group(0).replace(",", ""))) if m else None
@@ -1,9 +1,9 @@
 import os
-import requests
-import re
 import numpy as np
 from datetime import datetime
 from dotenv import load_dotenv
+from src.circuit_breaker import guarded_get
+from src.extractors import first_price
 
 load_dotenv()
 
@@ -133,7 +133,7 @@ class FormulaEngine:
                 "num": 10  # Get more results to filter better
             }
             
-            resp = requests.get(url, params=params, timeout=10)
+            resp = guarded_get(url, params=params, timeout=10)
             data = resp.json()
             
             if "items" not in data:
@@ -165,47 +165,27 @@ class FormulaEngine:
                     if variant_clean in text_lower:
                         has_variant_match = True
                 
-                # Look for price patterns
-                patterns = [
-                    r'₹\s*([\d,]+\.?\d*)\s*(?:lakh|lac)',  # ₹12.50 Lakh
-                    r'Rs\.?\s*([\d,]+)',                    # Rs 850000
-                    r'INR\s*([\d,]+)',                      # INR 850000
-                    r'([\d,]+)\s*(?:lakh|lac)',             # 12.5 Lakh
-                ]
-                
-                for pattern in patterns:
-                    matches = re.findall(pattern, text, re.IGNORECASE)
-                    for match in matches:
-                        try:
-                            price_num = float(match.replace(',', ''))
-                            
-                            # Convert lakhs to actual rupees
-                            if 'lakh' in text.lower() or 'lac' in text.lower():
-                                if price_num < 100:  # Assume it's in lakhs
-                                    price_num = price_num * 100000
-                            
-                            # Validate range (cars typically 2L - 50L)
-                            if 200000 <= price_num <= 5000000:
-                                # Calculate score for sorting
-                                score = 0
-                                if has_location_match:
-                                    score += 10
-                                if has_variant_match:
-                                    score += 5
-                                
-                                prices_with_urls.append((int(price_num), source_url, title, score))
-                                
-                                match_info = []
-                                if has_location_match:
-                                    match_info.append("location✓")
-                                if has_variant_match:
-                                    match_info.append("variant✓")
-                                match_str = ", ".join(match_info) if match_info else "general"
-                                
-                                print(f"      ✓ {title[:50]}... - ₹{int(price_num):,} [{match_str}]")
-                                break  # Only take first valid price per URL
-                        except:
-                            continue
+                # Shared extractor: ₹12.50 Lakh, Rs 850000, INR 8,50,000, 12.5 Lakh
+                # Validate range (cars typically 2L - 50L); only the first valid price per URL
+                price_num = first_price(text, 200000, 5000000)
+                if price_num:
+                    # Calculate score for sorting
+                    score = 0
+                    if has_location_match:
+                        score += 10
+                    if has_variant_match:
+                        score += 5
+                    
+                    prices_with_urls.append((price_num, source_url, title, score))
+                    
+                    match_info = []
+                    if has_location_match:
+                        match_info.append("location✓")
+                    if has_variant_match:
+                        match_info.append("variant✓")
+                    match_str = ", ".join(match_info) if match_info else "general"
+                    
+                    print(f"      ✓ {title[:50]}... - ₹{price_num:,} [{match_str}]")
             
             if prices_with_urls:
                 # Sort by score (highest first) - location and variant matches appear first
@@ -0,0 +1,115 @@
+"""
+Harvest Listing Index.
+
+The harvester used to append every scraped row to data/cars_database.csv on
+each run, so a listing that stayed up for a month was written thirty times.
+This index (data/harvest_index.db) remembers each listing ID (see
+listing_store.listing_id) with a fingerprint of its price/km and when it was
+first and last seen, so a crawl can tell new and changed listings apart from
+ones already on disk.
+
+    index = get_harvest_index()
+    new, changed = index.diff(rows)       # rows carry 'listing_id'
+    ...write them...
+    index.upsert(rows)                    # then record the crawl
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+INDEX_DB = Path(os.getenv("HARVEST_INDEX_PATH", Path(__file__).parent.parent / "data" / "harvest_index.db"))
+
+# A listing is "changed" when any of these differ from the last crawl
+FINGERPRINT_FIELDS = ("price", "km", "year", "model")
+
+
+def fingerprint(row: Dict) -> str:
+    return "|".join(str(row.get(f, "")) for f in FINGERPRINT_FIELDS)
+
+
+class HarvestIndex:
+    def __init__(self, path: Path = INDEX_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS seen (
+                id TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS seen_last ON seen (last_seen);
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def diff(self, rows: Iterable[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """(new, changed) rows against the index, without recording anything."""
+        new, changed = [], []
+        conn = self._conn()
+        for lid, row in {row["listing_id"]: row for row in rows}.items():
+            known = conn.execute("SELECT fingerprint FROM seen WHERE id = ?", (lid,)).fetchone()
+            if known is None:
+                new.append(row)
+            elif known["fingerprint"] != fingerprint(row):
+                changed.append(row)
+        return new, changed
+
+    def upsert(self, rows: Iterable[Dict], seen_at: Optional[float] = None) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Record a crawl. Returns (new, changed) rows; unchanged listings only get
+        their last_seen bumped. A listing repeated within `rows` counts once (last wins).
+        """
+        now = seen_at or time.time()
+        latest = {row["listing_id"]: row for row in rows}
+        new, changed = [], []
+        with self._conn() as db:
+            for lid, row in latest.items():
+                fp = fingerprint(row)
+                known = db.execute("SELECT fingerprint FROM seen WHERE id = ?", (lid,)).fetchone()
+                if known is None:
+                    new.append(row)
+                    db.execute("INSERT INTO seen VALUES (?, ?, ?, ?)", (lid, fp, now, now))
+                    continue
+                if known["fingerprint"] != fp:
+                    changed.append(row)
+                db.execute("UPDATE seen SET fingerprint = ?, last_seen = ? WHERE id = ?", (fp, now, lid))
+        return new, changed
+
+    def last_seen(self, lid: str) -> Optional[float]:
+        row = self._conn().execute("SELECT last_seen FROM seen WHERE id = ?", (lid,)).fetchone()
+        return row["last_seen"] if row else None
+
+    def stale(self, max_age: float) -> List[str]:
+        """IDs not seen by any crawl in the last `max_age` seconds (likely sold)."""
+        rows = self._conn().execute("SELECT id FROM seen WHERE last_seen < ?", (time.time() - max_age,))
+        return [row["id"] for row in rows]
+
+    def summary(self) -> Dict:
+        row = self._conn().execute("SELECT COUNT(*) AS n, MIN(first_seen) AS oldest, MAX(last_seen) AS newest "
+                                   "FROM seen").fetchone()
+        return dict(row)
+
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_harvest_index() -> HarvestIndex:
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            _INDEX = HarvestIndex()
+        return _INDEX
@@ -0,0 +1,138 @@
+"""
+Checkpointed, Partitioned Harvest Output.
+
+The harvester kept every row in memory and wrote once at the end, so a crash
+or IP block halfway lost the whole crawl. Now each (source, city, make) page
+is flushed as soon as it is parsed, into a date/city partition:
+
+    data/harvest/_run.json                              # run in progress
+    data/harvest/date=2024-06-10/city=mumbai/CarWale_hyundai.parquet
+    data/harvest/date=2024-06-10/_checkpoint.json     # pages already written by that run
+
+The checkpoint belongs to a run, not to the calendar day: until finish() marks
+the run done, a rerun (even after midnight) continues it, skipping its
+checkpointed pages and writing into the partition date it started on. Readers
+load only the partitions they ask for (read_partitions(cities=["pune"])).
+
+Parquet needs pyarrow (in requirements.txt) or fastparquet; without one the
+partitions fall back to CSV, with a warning.
+"""
+
+import json
+import os
+import threading
+from datetime import date as date_cls
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    try:
+        import fastparquet  # noqa: F401
+        PARQUET_AVAILABLE = True
+    except ImportError:
+        PARQUET_AVAILABLE = False
+
+HARVEST_ROOT = Path(os.getenv("HARVEST_OUTPUT_PATH", Path(__file__).parent.parent / "data" / "harvest"))
+FILE_FORMAT = "parquet" if PARQUET_AVAILABLE else "csv"
+RUN_FILE = "_run.json"
+
+
+def page_key(source: str, city: str, make: str) -> str:
+    return f"{source}|{city}|{make}"
+
+
+def _write_json(path: Path, data: Dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=1))
+    os.replace(tmp, path)
+
+
+class PartitionedOutput:
+    """
+    One harvest run's output. With `resume`, an unfinished earlier run is
+    continued (when `run_date` is given, only a run that started that day);
+    otherwise a new run starts on `run_date` (default today).
+    """
+
+    def __init__(self, root: Path = HARVEST_ROOT, run_date: Optional[str] = None, file_format: str = FILE_FORMAT,
+                 resume: bool = True):
+        self.root = Path(root)
+        self.file_format = file_format
+        if file_format == "csv" and not PARQUET_AVAILABLE:
+            print("⚠️ Neither pyarrow nor fastparquet is installed: harvest partitions are written as CSV "
+                  "(pip install pyarrow)")
+        self._run_path = self.root / RUN_FILE
+        current = json.loads(self._run_path.read_text()) if self._run_path.exists() else {}
+        if resume and current and not current.get("finished") and run_date in (None, current["date"]):
+            self.run_id, self.run_date = current["run_id"], current["date"]
+        else:
+            self.run_date = run_date or date_cls.today().isoformat()
+            self.run_id = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+            _write_json(self._run_path, {"run_id": self.run_id, "date": self.run_date, "finished": False})
+        self.run_dir = self.root / f"date={self.run_date}"
+        self.checkpoint_path = self.run_dir / "_checkpoint.json"
+        self._lock = threading.Lock()
+        self._done = set()
+        if self.checkpoint_path.exists():
+            checkpoint = json.loads(self.checkpoint_path.read_text())
+            if checkpoint.get("run_id") == self.run_id:
+                self._done = set(checkpoint.get("pages", []))
+
+    def completed(self, source: str, city: str, make: str) -> bool:
+        return page_key(source, city, make) in self._done
+
+    def write_page(self, source: str, city: str, make: str, rows: List[Dict]) -> Optional[Path]:
+        """Flush one page's rows to its partition, then checkpoint the page (even when empty)."""
+        path = None
+        if rows:
+            part_dir = self.run_dir / f"city={city}"
+            part_dir.mkdir(parents=True, exist_ok=True)
+            path = part_dir / f"{source}_{make}.{self.file_format}"
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            df = pd.DataFrame(rows)
+            if self.file_format == "parquet":
+                df.to_parquet(tmp, index=False)
+            else:
+                df.to_csv(tmp, index=False)
+            os.replace(tmp, path)
+        with self._lock:
+            self._done.add(page_key(source, city, make))
+            _write_json(self.checkpoint_path, {"run_id": self.run_id, "date": self.run_date,
+                                               "pages": sorted(self._done)})
+        return path
+
+    def finish(self):
+        """Mark the run complete: the next PartitionedOutput starts a new run."""
+        _write_json(self._run_path, {"run_id": self.run_id, "date": self.run_date, "finished": True})
+
+    def pages_done(self) -> int:
+        return len(self._done)
+
+    def read(self, cities: Optional[List[str]] = None) -> pd.DataFrame:
+        """Everything written for this run date (optionally only some cities)."""
+        return read_partitions(self.root, dates=[self.run_date], cities=cities)
+
+
+def read_partitions(root: Path = HARVEST_ROOT, dates: Optional[List[str]] = None,
+                    cities: Optional[List[str]] = None) -> pd.DataFrame:
+    """Load harvested rows, touching only the requested date/city partitions."""
+    frames = []
+    for date_dir in sorted(Path(root).glob("date=*")):
+        if dates and date_dir.name.split("=", 1)[1] not in dates:
+            continue
+        for city_dir in sorted(date_dir.glob("city=*")):
+            if cities and city_dir.name.split("=", 1)[1] not in cities:
+                continue
+            for path in sorted(city_dir.iterdir()):
+                if path.suffix == ".parquet":
+                    frames.append(pd.read_parquet(path))
+                elif path.suffix == ".csv":
+                    frames.append(pd.read_csv(path))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -1,10 +1,18 @@
+import argparse
+import asyncio
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 import random
 import time
 import os
-import re
+from urllib.parse import urljoin, urlsplit
+
+from src.card_extract import extract_cards
+from src.circuit_breaker import guarded_get
+from src.extractors import LAKH, first_km, first_price, first_year
+from src.harvest_index import get_harvest_index
+from src.harvest_output import PartitionedOutput
+from src.listing_store import get_listing_store, listing_id
 
 # Database Path
 DB_PATH = "data/cars_database.csv"
@@ -19,6 +27,10 @@ USER_AGENTS = [
 TARGET_CITIES = ["mumbai", "delhi", "bangalore", "hyderabad", "chennai", "pune"]
 TARGET_MAKES = ["maruti-suzuki", "hyundai", "tata", "mahindra", "honda", "toyota", "kia", "mg"]
 
+# Politeness: each host sees at most HOST_RATE requests/sec; MAX_IN_FLIGHT requests overall
+HOST_RATE = float(os.getenv("HARVEST_HOST_RATE", 0.4))
+MAX_IN_FLIGHT = int(os.getenv("HARVEST_MAX_IN_FLIGHT", 6))
+
 def get_random_header():
     return {
         "User-Agent": random.choice(USER_AGENTS),
@@ -27,23 +39,118 @@ def get_random_header():
     }
 
 def clean_price(price_str):
-    """Converts price text (e.g., '₹ 10.5 Lakh') to integer."""
-    try:
-        # Regex for "10.5 Lakh" or "10.5"
-        matches = re.findall(r"(\d+(\.\d+)?)\s*(?:Lakh|Lakhs|L)?", price_str, re.IGNORECASE)
-        if matches:
-            val = float(matches[0][0])
-            if 1.0 < val < 200.0: # Sanity check (1L to 2Cr)
-                return int(val * 100000)
-    except:
-        pass
-    return None
-
-def clean_km(km_str):
+    """Converts price text (e.g., '₹ 10.5 Lakh') to integer rupees."""
+    # Sanity check (1L to 2Cr)
+    return first_price(price_str, 1 * LAKH, 200 * LAKH, prefer_unit=True)
+
+def store_listings(listings):
+    """Keep harvested rows in the listing store so valuations can reuse them."""
+    store = get_listing_store()
+    if store is None or not listings:
+        return
     try:
-        return int(re.sub(r"\D", "", km_str))
-    except:
-        return 0
+        store.add_harvested(listings)
+    except Exception as e:
+        print(f"Listing store write failed: {e}")
+
+def model_from_title(title, year, make):
+    """'2020 Hyundai Creta SX' -> 'creta sx' (first two words after make and year)."""
+    model_str = title.lower().replace(str(year), "").replace(make.replace("-", " "), "").strip()
+    model_parts = model_str.split()
+    return " ".join(model_parts[:2]) if len(model_parts) >= 2 else model_str
+
+CARWALE_PAGE_URL = "https://www.carwale.com/used/{city}/{make}-cars/"
+SPINNY_PAGE_URL = "https://www.spinny.com/buy-used-{make}-cars-in-{city}/"
+
+def parse_carwale_cards(html, city, make, page_url=None):
+    """Listing rows from a CarWale city + make results page (links resolved against `page_url`)."""
+    page_url = page_url or CARWALE_PAGE_URL.format(city=city, make=make)
+    listings = []
+    
+    # This selector is heuristic; CarWale structure is complex.
+    # Class names are obfuscated usually, so we look for listing links and read
+    # their card container once (see src/card_extract.py).
+    for card in extract_cards(html, "used", sep=" "):
+        title = card.link_text
+        
+        # Simple heuristic: if title contains Year and "Used", it's a card
+        if any(str(y) in title for y in range(2010, 2026)):
+            # Extract details from title: "2020 Hyundai Creta SX..."
+            
+            # 1. Year
+            year = first_year(title)
+            if not year: continue
+            
+            # 2. Price (Try to find price in the parent block)
+            full_text = card.card_text or title
+            
+            price = clean_price(full_text)
+            if not price: continue
+            
+            # 3. KM ("10,000 km" / "1,20,000 km")
+            km = first_km(full_text) or 0
+            
+            # 4. Model (Remove Make and Year from title)
+            model = model_from_title(title, year, make)
+            
+            listings.append({
+                "make": make,
+                "model": model,
+                "year": year,
+                "variant": "Base", # Hard to parse without deep link
+                "km": km,
+                "city": city,
+                "price": price,
+                "source": "CarWale",
+                "url": urljoin(page_url, card.href),  # Absolute, like the listing layer: same listing ID
+                "scraped_at": pd.Timestamp.now()
+            })
+    return listings
+
+def parse_spinny_cards(html, city, make, page_url=None):
+    """Listing rows from a Spinny city + make results page (links resolved against `page_url`)."""
+    from src.listing_source import parse_listing_text
+    page_url = page_url or SPINNY_PAGE_URL.format(city=city, make=make)
+    listings = []
+    seen = set()
+    for card in extract_cards(html, "/buy-used-cars/", sep="\n"):
+        if card.href in seen:
+            continue
+        url = urljoin(page_url, card.href)
+        listing = parse_listing_text(card.link_text + "\n" + card.card_text, "Spinny", url)
+        if not listing or not listing["year"]:
+            continue
+        seen.add(card.href)
+        listings.append({
+            "make": make,
+            "model": model_from_title(listing["title"], listing["year"], make),
+            "year": listing["year"],
+            "variant": "Base",
+            "km": listing["km"],
+            "city": city,
+            "price": int(listing["price"] * 100000),
+            "source": "Spinny",
+            "url": url,
+            "scraped_at": pd.Timestamp.now()
+        })
+    return listings
+
+# Sources crawled per (city, make); hosts are rate-limited independently
+HARVEST_SOURCES = {
+    "CarWale": {"url": CARWALE_PAGE_URL, "parse": parse_carwale_cards},
+    "Spinny": {"url": SPINNY_PAGE_URL, "parse": parse_spinny_cards},
+}
+
+def fetch_source_page(source, city, make):
+    """Fetch and parse one results page; raises on HTTP/network failure."""
+    spec = HARVEST_SOURCES[source]
+    url = spec["url"].format(city=city, make=make)
+    response = guarded_get(url, headers=get_random_header(), timeout=10)
+    if response.status_code != 200:
+        raise requests.HTTPError(f"{url}: {response.status_code}")
+    listings = spec["parse"](response.text, city, make, url)
+    store_listings(listings)
+    return listings
 
 def scrape_carwale_city_make(city, make):
     """
@@ -55,95 +162,149 @@ def scrape_carwale_city_make(city, make):
     print(f"Harvesting: {url}...")
     
     try:
-        response = requests.get(url, headers=get_random_header(), timeout=10)
-        if response.status_code != 200:
-            print(f"Failed to fetch {url}: {response.status_code}")
-            return []
-            
-        soup = BeautifulSoup(response.text, 'html.parser')
-        listings = []
-        
-        # This selector is heuristic; CarWale structure is complex.
-        # We look for listing blocks. Class names are obfuscated usually.
-        # We look for links that contain regex patterns.
-        
-        links = soup.find_all('a', href=True)
-        for link in links:
-            href = link['href']
-            title = link.get_text(" ", strip=True)
-            
-            # Simple heuristic: if title contains Year and "Used", it's a card
-            if "used" in href and any(str(y) in title for y in range(2010, 2026)):
-                # Extract details from title: "2020 Hyundai Creta SX..."
-                
-                # 1. Year
-                year_match = re.search(r"\b(20\d{2})\b", title)
-                if not year_match: continue
-                year = int(year_match.group(1))
-                
-                # 2. Price (Try to find price in the parent block)
-                parent = link.find_parent('div')
-                full_text = parent.get_text(" ", strip=True) if parent else title
-                
-                price = clean_price(full_text)
-                if not price: continue
-                
-                # 3. KM (Regex for "10,000 km")
-                km = 0
-                km_match = re.search(r"(\d{1,3}(?:,\d{3})*)\s*km", full_text, re.IGNORECASE)
-                if km_match:
-                    km = clean_km(km_match.group(1))
-                
-                # 4. Model (Remove Make and Year from title)
-                model_str = title.lower().replace(str(year), "").replace(make.replace("-", " "), "").strip()
-                # Use first 2 words as Model estimate
-                model_parts = model_str.split()
-                model = " ".join(model_parts[:2]) if len(model_parts) >= 2 else model_str
-                
-                listings.append({
-                    "make": make,
-                    "model": model,
-                    "year": year,
-                    "variant": "Base", # Hard to parse without deep link
-                    "km": km,
-                    "city": city,
-                    "price": price,
-                    "source": "CarWale",
-                    "scraped_at": pd.Timestamp.now()
-                })
-        
+        listings = fetch_source_page("CarWale", city, make)
         print(f"  -> Found {len(listings)} listings.")
         return listings
-        
     except Exception as e:
         print(f"Error scraping {url}: {e}")
         return []
 
+class HostRateLimiter:
+    """Spaces requests to each host ~1/rate seconds apart (with jitter); hosts don't wait on each other."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = {}
+        self._locks = {}
+
+    async def wait(self, host):
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            slot = max(loop.time(), self._next.get(host, 0.0))
+            self._next[host] = slot + self.interval * random.uniform(0.8, 1.2)
+            await asyncio.sleep(slot - loop.time())
+
+async def harvest_async(cities=TARGET_CITIES, makes=TARGET_MAKES, sources=None,
+                        rate=HOST_RATE, max_in_flight=MAX_IN_FLIGHT, fetch=fetch_source_page, output=None):
+    """
+    Crawl every (source, city, make) page concurrently: hosts in parallel, each
+    host at `rate` requests/sec, at most `max_in_flight` requests overall.
+    With `output` (PartitionedOutput), each page is flushed as it completes and
+    pages already in its checkpoint are skipped. Returns (rows, stats) for this run.
+    """
+    sources = sources or list(HARVEST_SOURCES)
+    limiter = HostRateLimiter(rate)
+    in_flight = asyncio.Semaphore(max_in_flight)
+    stats = {"pages": 0, "failed": 0, "skipped": 0, "listings": 0, "hosts": {}}
+    rows = []
+    started = time.time()
+
+    async def crawl(source, city, make, host_stats):
+        try:
+            listings = await asyncio.to_thread(fetch, source, city, make)
+        except Exception as e:
+            print(f"Error harvesting {source} {city}/{make}: {e}")
+            stats["failed"] += 1
+            host_stats["failed"] += 1
+            return
+        finally:
+            in_flight.release()
+        if output is not None:
+            try:
+                await asyncio.to_thread(output.write_page, source, city, make, listings)
+            except Exception as e:
+                # Not checkpointed, so the next run fetches this page again
+                print(f"Error writing {source} {city}/{make}: {e}")
+        rows.extend(listings)
+        for counter in (stats, host_stats):
+            counter["pages"] += 1
+            counter["listings"] += len(listings)
+        print(f"  -> {source} {city}/{make}: {len(listings)} listings")
+
+    async def dispatch(source):
+        # One dispatcher per host: requests leave exactly on the host's schedule
+        host = urlsplit(HARVEST_SOURCES[source]["url"]).hostname
+        host_stats = stats["hosts"].setdefault(host, {"pages": 0, "failed": 0, "listings": 0})
+        tasks = []
+        for city in cities:
+            for make in makes:
+                if output is not None and output.completed(source, city, make):
+                    stats["skipped"] += 1
+                    continue
+                await in_flight.acquire()
+                await limiter.wait(host)
+                tasks.append(asyncio.create_task(crawl(source, city, make, host_stats)))
+        await asyncio.gather(*tasks)
+
+    await asyncio.gather(*(dispatch(source) for source in sources))
+    elapsed = max(time.time() - started, 1e-6)
+    stats.update(elapsed=round(elapsed, 1), pages_per_sec=round(stats["pages"] / elapsed, 2),
+                 listings_per_sec=round(stats["listings"] / elapsed, 2))
+    return rows, stats
+
+def write_database(rows, path=DB_PATH, index=None):
+    """
+    Upsert harvested rows into the CSV: new listings are appended, changed ones
+    replace their previous row, unchanged ones are not written. Returns (new, changed).
+    The index only records the crawl once the CSV write succeeded, so a failed
+    write is retried by the next run instead of being taken as unchanged.
+    """
+    index = index or get_harvest_index()
+    for row in rows:
+        row["listing_id"] = listing_id(row)
+    new, changed = index.diff(rows)
+    if not new and not changed:
+        index.upsert(rows)  # Bump last_seen
+        return 0, 0
+
+    df = pd.DataFrame(new + changed)
+    header = list(pd.read_csv(path, nrows=0).columns) if os.path.exists(path) else []
+    if header and not changed and set(df.columns) <= set(header):
+        # Common case: only new listings, same columns -> plain append
+        df.reindex(columns=header).to_csv(path, mode='a', header=False, index=False)
+    else:
+        existing = pd.read_csv(path) if header else pd.DataFrame()
+        if header and "listing_id" not in existing.columns:
+            # Rows written before the index existed
+            existing["listing_id"] = [listing_id(r) for r in existing.fillna("").to_dict("records")]
+        if changed and not existing.empty:
+            existing = existing[~existing["listing_id"].isin({r["listing_id"] for r in changed})]
+        pd.concat([existing, df], ignore_index=True).to_csv(path, index=False)
+    index.upsert(rows)
+    return len(new), len(changed)
+
+def harvest(**kwargs):
+    return asyncio.run(harvest_async(**kwargs))
+
 def main():
+    parser = argparse.ArgumentParser(description="Harvest used-car listings for TARGET_CITIES x TARGET_MAKES")
+    parser.add_argument("--rate", type=float, default=HOST_RATE, help="requests/sec per host")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT)
+    parser.add_argument("--sources", nargs="*", default=None, choices=list(HARVEST_SOURCES))
+    parser.add_argument("--fresh", action="store_true",
+                        help="start a new run instead of continuing an unfinished one")
+    args = parser.parse_args()
     print("Starting Car Data Harvester...")
     
-    all_data = []
-    
-    # Load existing to avoid duplicates? For now just append.
-    
-    for city in TARGET_CITIES:
-        for make in TARGET_MAKES:
-            new_data = scrape_carwale_city_make(city, make)
-            all_data.extend(new_data)
-            
-            # Polite Sleep
-            sleep_time = random.uniform(2.0, 5.0)
-            time.sleep(sleep_time)
+    output = PartitionedOutput(resume=not args.fresh)
+    if output.pages_done():
+        print(f"Resuming run {output.run_id}: {output.pages_done()} pages already written to {output.run_dir}")
+    _, stats = harvest(sources=args.sources, rate=args.rate, max_in_flight=args.max_in_flight, output=output)
+    print(f"Crawled {stats['pages']} pages ({stats['failed']} failed, {stats['skipped']} from checkpoint) "
+          f"in {stats['elapsed']}s: {stats['pages_per_sec']} pages/s, {stats['listings_per_sec']} listings/s")
+    if stats["failed"]:
+        print(f"{stats['failed']} pages failed: run again to retry them in this run")
+    else:
+        output.finish()
             
+    # This run's partitions, including pages written by an interrupted earlier attempt
+    all_data = [{k: v for k, v in row.items() if not pd.isna(v)} for row in output.read().to_dict("records")]
     if all_data:
-        df = pd.DataFrame(all_data)
-        # Append to CSV
-        if os.path.exists(DB_PATH):
-            df.to_csv(DB_PATH, mode='a', header=False, index=False)
-        else:
-            df.to_csv(DB_PATH, mode='w', header=True, index=False)
-            
-        print(f"Successfully harvested {len(all_data)} records to {DB_PATH}")
+        # Only new or changed listings touch the CSV (see src/harvest_index.py)
+        new, changed = write_database(all_data)
+        print(f"Harvested {len(all_data)} listings: {new} new, {changed} changed, "
+              f"{len(all_data) - new - changed} unchanged -> {DB_PATH}")
     else:
         print("No data harvested. Possible IP block or DOM change.")
 
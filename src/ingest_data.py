@@ -1,32 +1,19 @@
 import pandas as pd
 import os
 
+from src.extractors import first_km, to_rupees
+
 RAW_PATHS = ["data/cardekho_raw.csv", "data/quikr_cars.csv"]
 DB_PATH = "data/cars_database.csv"
 
 def clean_quikr_price(x):
-    if x == "Ask For Price": return None
-    try:
-        return int(float(str(x).replace(",", "")))
-    except: return None
+    # "Ask For Price" has no digits -> None
+    return to_rupees(x)
 
 
 def clean_currency(x):
-    # Dataset might be in lakhs, e.g. "5.5 Lakh" or just numbers
-    try:
-        if isinstance(x, str):
-            # If "Lakh" in string
-            if "Lakh" in x:
-                val = float(x.replace("Lakh", "").strip())
-                return int(val * 100000)
-            elif "Crore" in x:
-                val = float(x.replace("Crore", "").strip())
-                return int(val * 10000000)
-            else:
-                return int(float(x.replace(",", "")))
-        return int(x)
-    except:
-        return None
+    # Dataset might be in lakhs, e.g. "5.5 Lakh", "1.2 Crore" or just numbers
+    return to_rupees(x)
 
 def normalize_text(x):
     return str(x).lower().replace(" ", "-")
@@ -112,7 +99,7 @@ def process_quikr(df_raw):
     
     df_out['price'] = df_raw['Price'].apply(clean_quikr_price)
     df_out['year'] = pd.to_numeric(df_raw['year'], errors='coerce')
-    df_out['km'] = df_raw['kms_driven'].apply(lambda x: int(str(x).split(" ")[0].replace(",","")) if isinstance(x,str) and "km" in x else 0)
+    df_out['km'] = df_raw['kms_driven'].apply(lambda x: first_km(x) or 0 if isinstance(x, str) else 0)
     
     df_out['make'] = df_raw['company'].astype(str).str.lower()
     # Model is essentially name minus company
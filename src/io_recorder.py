@@ -0,0 +1,443 @@
+"""
+Record / Replay of external I/O for a single valuation.
+
+Listings and search results change by the hour, so a slow or wrong valuation
+cannot be reproduced later. In record mode every `requests` call and every
+Playwright network request made while the session is active is captured into
+a gzipped JSON archive. In replay mode the same traffic is served back from
+the archive with no network access, so the valuation can be profiled offline.
+
+A session belongs to the thread that opened it: only that thread's traffic,
+and work it hands to helper threads through bind() or to the browser pool,
+goes through the archive. Other dashboard sessions and background threads
+(pre-warm, probes) keep talking to the network unrecorded. One session can be
+active per process; a second valuation asking for one runs unrecorded. While
+a session is active, scraping runs in-process even with SCRAPE_WORKER=1
+(see scrape_worker.use_worker), so the browser traffic is captured too.
+
+Usage:
+    # Record from the dashboard
+    VALUATION_IO_MODE=record VALUATION_IO_ARCHIVE=/tmp/creta.json.gz streamlit run main.py
+
+    # Record / replay the scraping engines from the command line
+    python -m src.io_recorder record /tmp/creta.json.gz --make Hyundai --model Creta --year 2020
+    python -m src.io_recorder replay /tmp/creta.json.gz --profile
+"""
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+ARCHIVE_VERSION = 1
+
+# Query parameters that carry secrets (Google API keys) are never written to disk
+REDACTED_PARAMS = {"key"}
+
+# Response headers that do not survive a replay (body is stored decoded)
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie"}
+
+_ACTIVE = None  # Currently installed IOSession (one per process)
+_ACTIVE_LOCK = threading.Lock()
+_THREAD = threading.local()  # .session: the IOSession this thread works for
+_ORIGINAL_SEND = requests.sessions.Session.send
+
+
+def _canonical_url(url: str) -> str:
+    """Sort query params and drop secrets so equivalent requests share a key."""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k not in REDACTED_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path or "/", urlencode(query), ""))
+
+
+def _body_digest(body) -> str:
+    if not body:
+        return ""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha1(body).hexdigest()[:12]
+
+
+def request_key(method: str, url: str, body=None) -> str:
+    """Archive key for a request: METHOD canonical-url [#body-digest]."""
+    key = f"{method.upper()} {_canonical_url(url)}"
+    digest = _body_digest(body)
+    return f"{key} #{digest}" if digest else key
+
+
+class IOArchive:
+    """
+    In-memory archive of recorded exchanges, keyed by request_key().
+    Repeated requests keep every response and are replayed in order.
+    """
+
+    def __init__(self, meta: Optional[Dict] = None):
+        self.meta = dict(meta or {})
+        self.entries: Dict[str, List[Dict]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, exchange: Dict):
+        with self._lock:
+            self.entries.setdefault(key, []).append(exchange)
+
+    def next(self, key: str) -> Optional[Dict]:
+        """Return the next recorded exchange for key (last one repeats)."""
+        with self._lock:
+            recorded = self.entries.get(key)
+            if not recorded:
+                return None
+            idx = self._cursor.get(key, 0)
+            self._cursor[key] = idx + 1
+            return recorded[min(idx, len(recorded) - 1)]
+
+    def save(self, path: str):
+        payload = {
+            "version": ARCHIVE_VERSION,
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+            "meta": self.meta,
+            "entries": self.entries,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "IOArchive":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported archive version: {payload.get('version')}")
+        archive = cls(payload.get("meta"))
+        archive.entries = payload.get("entries", {})
+        return archive
+
+    def summary(self) -> Dict:
+        exchanges = [ex for recorded in self.entries.values() for ex in recorded]
+        return {
+            "requests": len(exchanges),
+            "unique": len(self.entries),
+            "errors": sum(1 for ex in exchanges if ex.get("error")),
+            "bytes": sum(len(ex.get("body", "")) * 3 // 4 for ex in exchanges),
+            "elapsed": round(sum(ex.get("elapsed", 0.0) for ex in exchanges), 2),
+        }
+
+
+def _encode_body(body: bytes) -> str:
+    return base64.b64encode(body or b"").decode("ascii")
+
+
+def _decode_body(body: str) -> bytes:
+    return base64.b64decode(body or "")
+
+
+def _clean_headers(headers) -> Dict[str, str]:
+    return {k: v for k, v in dict(headers or {}).items() if k.lower() not in DROPPED_HEADERS}
+
+
+class IOSession:
+    """A record or replay session bound to one archive file."""
+
+    def __init__(self, mode: str, path: str, meta: Optional[Dict] = None,
+                 replay_latency: bool = False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown I/O mode: {mode}")
+        self.mode = mode
+        self.path = path
+        self.replay_latency = replay_latency
+        self.misses: List[str] = []
+        self.closed = False
+        if mode == "replay":
+            self.archive = IOArchive.load(path)
+        else:
+            self.archive = IOArchive(meta)
+
+    # ---------------- requests ----------------
+
+    def send(self, session, prepared, **kwargs):
+        key = request_key(prepared.method, prepared.url, prepared.body)
+        if self.mode == "record":
+            return self._record_send(session, prepared, key, **kwargs)
+        return self._replay_send(prepared, key)
+
+    def _record_send(self, session, prepared, key, **kwargs):
+        start = time.time()
+        try:
+            response = _ORIGINAL_SEND(session, prepared, **kwargs)
+        except requests.RequestException as e:
+            self.archive.add(key, {
+                "channel": "http",
+                "error": type(e).__name__,
+                "message": str(e),
+                "elapsed": round(time.time() - start, 3),
+            })
+            raise
+        self.archive.add(key, {
+            "channel": "http",
+            "status": response.status_code,
+            "url": _canonical_url(response.url),
+            "redirected": bool(response.history),
+            "headers": _clean_headers(response.headers),
+            "body": _encode_body(response.content),
+            "elapsed": round(time.time() - start, 3),
+        })
+        return response
+
+    def _replay_send(self, prepared, key):
+        exchange = self.archive.next(key)
+        if exchange is None:
+            self.misses.append(key)
+            raise requests.ConnectionError(f"No recorded response for {key}")
+        if self.replay_latency:
+            time.sleep(exchange.get("elapsed", 0.0))
+        if exchange.get("error"):
+            error_cls = getattr(requests.exceptions, exchange["error"], requests.ConnectionError)
+            raise error_cls(exchange.get("message", "Recorded failure"))
+
+        response = requests.Response()
+        response.status_code = exchange["status"]
+        response.headers = CaseInsensitiveDict(exchange.get("headers", {}))
+        response._content = _decode_body(exchange.get("body"))
+        response.url = exchange.get("url", prepared.url)
+        response.request = prepared
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+        if exchange.get("redirected"):
+            response.history = [requests.Response()]
+        return response
+
+    # ---------------- Playwright ----------------
+
+    async def attach(self, context):
+        """Route every request of an (async) Playwright BrowserContext through the archive."""
+        if self.mode == "record":
+            await context.route("**/*", self._record_route)
+        else:
+            await context.route("**/*", self._replay_route)
+
+    async def _record_route(self, route):
+        if self.closed:  # A warm context outliving the session
+            await route.fallback()
+            return
+        request = route.request
+        key = request_key(request.method, request.url, request.post_data_buffer)
+        start = time.time()
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception as e:
+            self.archive.add(key, {
+                "channel": "browser",
+                "error": type(e).__name__,
+                "message": str(e),
+                "elapsed": round(time.time() - start, 3),
+            })
+            await route.abort()
+            return
+        self.archive.add(key, {
+            "channel": "browser",
+            "resource": request.resource_type,
+            "status": response.status,
+            "headers": _clean_headers(response.headers),
+            "body": _encode_body(body),
+            "elapsed": round(time.time() - start, 3),
+        })
+        await route.fulfill(response=response, body=body)
+
+    async def _replay_route(self, route):
+        if self.closed:
+            await route.fallback()
+            return
+        request = route.request
+        key = request_key(request.method, request.url, request.post_data_buffer)
+        exchange = self.archive.next(key)
+        if exchange is None or exchange.get("error"):
+            if exchange is None:
+                self.misses.append(key)
+            await route.abort("internetdisconnected")
+            return
+        if self.replay_latency:
+            await asyncio.sleep(exchange.get("elapsed", 0.0))
+        await route.fulfill(
+            status=exchange["status"],
+            headers=exchange.get("headers", {}),
+            body=_decode_body(exchange.get("body")),
+        )
+
+    def close(self):
+        self.closed = True
+        if self.mode == "record":
+            self.archive.save(self.path)
+            print(f"📼 I/O archive saved to {self.path}: {self.archive.summary()}")
+        elif self.misses:
+            print(f"📼 Replay finished with {len(self.misses)} unrecorded requests")
+
+
+def _patched_send(session, prepared, **kwargs):
+    active = active_session()
+    if active is None:
+        return _ORIGINAL_SEND(session, prepared, **kwargs)
+    return active.send(session, prepared, **kwargs)
+
+
+def active_session() -> Optional[IOSession]:
+    """The record/replay session the current thread works for (None for every other thread)."""
+    session = getattr(_THREAD, "session", None)
+    return session if session is not None and session is _ACTIVE else None
+
+
+def bind(fn):
+    """Wrap `fn` for a helper thread so it runs inside the caller's session (if any)."""
+    session = active_session()
+    if session is None:
+        return fn
+
+    def bound(*args, **kwargs):
+        previous = getattr(_THREAD, "session", None)
+        _THREAD.session = session
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _THREAD.session = previous
+    return bound
+
+
+async def attach_context(context, session: Optional[IOSession] = None):
+    """Hook for the browser pool: routes the context through `session` (captured by the caller) if any."""
+    if session is not None and session is _ACTIVE:
+        await session.attach(context)
+    return context
+
+
+@contextmanager
+def io_session(mode: Optional[str] = None, path: Optional[str] = None,
+               meta: Optional[Dict] = None, replay_latency: Optional[bool] = None):
+    """
+    Activate record/replay for the enclosed block.
+    Defaults come from VALUATION_IO_MODE / VALUATION_IO_ARCHIVE; yields None when off.
+    """
+    global _ACTIVE
+    mode = (mode or os.getenv("VALUATION_IO_MODE", "off")).lower()
+    path = path or os.getenv("VALUATION_IO_ARCHIVE")
+    if replay_latency is None:
+        replay_latency = os.getenv("VALUATION_IO_REPLAY_LATENCY") == "1"
+
+    if mode in ("", "off") or not path:
+        yield None
+        return
+
+    if mode == "record" and os.path.isdir(path):
+        # A directory collects one archive per valuation
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        label = "-".join(str((meta or {}).get(k, "")) for k in ("year", "make", "model")).strip("-")
+        path = os.path.join(path, f"{stamp}-{label or 'valuation'}.json.gz".replace(" ", "_"))
+
+    with _ACTIVE_LOCK:
+        session = None
+        if _ACTIVE is None:
+            session = _ACTIVE = IOSession(mode, path, meta, replay_latency)
+            requests.sessions.Session.send = _patched_send
+    if session is None:
+        # Another valuation is being recorded/replayed: run this one untouched
+        print("📼 Another record/replay session is active: running this valuation unrecorded")
+        yield None
+        return
+    _THREAD.session = session
+    try:
+        yield session
+    finally:
+        _THREAD.session = None
+        with _ACTIVE_LOCK:
+            _ACTIVE = None
+            requests.sessions.Session.send = _ORIGINAL_SEND
+        session.close()
+
+
+def run_scraping_engines(make, model, year, variant, fuel, transmission, km, city,
+                         search_key=None, cx=None) -> Dict:
+    """Run every engine that performs external I/O and time each one."""
+    from src.engine_sniper import fetch_closest_match
+    from src.engine_smart_scraper import SmartCarScraper
+    from src.engine_research import get_market_estimate
+    from src.engine_logic import get_real_base_price
+
+    engines = {
+        "Sniper": lambda: fetch_closest_match(make, model, year, variant, km, city, search_key, cx)[0],
+        "Logic Base Price": lambda: get_real_base_price(make, model, variant, year, search_key, cx)[0],
+        "Scraper": lambda: SmartCarScraper().get_market_data(make, model, year, fuel, city, km).get("statistics"),
+        "Market Research": lambda: get_market_estimate(make, model, year, city).get("median_price"),
+    }
+    try:
+        from src.engine_cars24 import get_cars24_price, session_exists
+        if session_exists():
+            engines["Cars24"] = lambda: get_cars24_price(make, model, year, variant, fuel, transmission, km, city)[0]
+    except (ImportError, ModuleNotFoundError):
+        pass
+
+    results = {}
+    for name, fn in engines.items():
+        start = time.time()
+        try:
+            value = fn()
+        except Exception as e:
+            value = f"Error: {e}"
+        results[name] = {"value": value, "seconds": round(time.time() - start, 2)}
+        print(f"   ⏱️ {name:<18} {results[name]['seconds']:>6.2f}s -> {value}")
+    return results
+
+
+def main(argv=None):
+    import argparse
+    import cProfile
+    import pstats
+
+    parser = argparse.ArgumentParser(description="Record or replay the external I/O of one valuation.")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("archive")
+    parser.add_argument("--make", default="Hyundai")
+    parser.add_argument("--model", default="Creta")
+    parser.add_argument("--year", type=int, default=2020)
+    parser.add_argument("--variant", default="SX")
+    parser.add_argument("--fuel", default="Petrol")
+    parser.add_argument("--transmission", default="Manual")
+    parser.add_argument("--km", type=int, default=50000)
+    parser.add_argument("--city", default="Hyderabad")
+    parser.add_argument("--latency", action="store_true", help="Replay with recorded response times")
+    parser.add_argument("--profile", action="store_true", help="Print the top cProfile entries")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    inputs = {k: getattr(args, k) for k in
+              ("make", "model", "year", "variant", "fuel", "transmission", "km", "city")}
+    if args.mode == "replay":
+        # Replay the exact valuation that was recorded
+        inputs.update({k: v for k, v in IOArchive.load(args.archive).meta.items() if k in inputs})
+
+    print(f"📼 {args.mode.title()}: {inputs}")
+    profiler = cProfile.Profile() if args.profile else None
+    with io_session(args.mode, args.archive, meta=inputs, replay_latency=args.latency):
+        if profiler:
+            profiler.enable()
+        run_scraping_engines(search_key=os.getenv("GOOGLE_SEARCH_API_KEY"),
+                             cx=os.getenv("SEARCH_ENGINE_ID"), **inputs)
+        if profiler:
+            profiler.disable()
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,567 @@
+"""
+Listing Acquisition Layer.
+
+One dashboard valuation used to load the same CarWale and Spinny pages in
+SmartCarScraper, MarketResearchEngine and the Sniper. This module fetches each
+source page once, parses it into a normalized listing set and caches it for the
+duration of a valuation; every engine then applies its own validation and
+statistics to that shared set.
+
+Fetch order per source page: plain HTTP, reading the listings embedded in the
+page as JSON (__NEXT_DATA__, ld+json, window.__STATE__); Chromium only when
+that yields nothing; finally the listing links in the same static HTML.
+
+Pages fetched from the network are also written to the listing store
+(src/listing_store.py); a page whose stored listings are still fresh
+(LISTING_FRESHNESS, longer when pre-warmed) is served from there instead of
+being scraped again.
+
+Engines that need a minimum number of validated listings call fetch_until,
+which reads further results pages only until that many pass validation.
+
+Normalized listing:
+    {'source': 'CarWale', 'price': 6.25 (Lakh), 'year': 2020, 'km': 35000,
+     'title': '2020 Maruti Suzuki Swift VXI', 'url': 'https://...'}
+"""
+
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from src.browser_pool import PLAYWRIGHT_AVAILABLE, BrowserUnavailable, get_browser_pool, goto_ready
+from src.card_extract import extract_cards
+from src.circuit_breaker import get_breaker, guarded_get, host_key
+from src.extractors import LAKH, NUMBER_PATTERN, YEAR_PATTERN, extract
+from src.io_recorder import active_session, bind
+from src.listing_store import get_listing_store
+from src.scrape_worker import get_worker_client, use_worker
+
+# A valuation runs its engines within a few minutes; listings are shared for that window
+LISTING_CACHE_TTL = 600
+EMPTY_CACHE_TTL = 60  # Retry empty/failed pages sooner
+FETCH_DEADLINE = 25   # Combined deadline for all browser pages (seconds)
+HTTP_TIMEOUT = 5
+MAX_CARDS = 30
+MAX_PAGES = 4          # Results pages per source when paginating for enough validated listings
+PAGINATE_BUDGET = 20   # Seconds for the extra pages (page 1 has its own deadlines)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5"
+}
+
+# Robust Slug Mapping for CarWale
+CARWALE_SLUG_MAP = {
+    "maruti": "maruti-suzuki",
+    "mercedes": "mercedes-benz",
+    "mercedes-benz": "mercedes-benz",
+    "land rover": "land-rover",
+    "mg": "mg",
+    "bmw": "bmw",
+    "audi": "audi",
+    "windsor": "windsor-ev"
+}
+
+# Listing sources (name -> how to reach and read its results page)
+LISTING_SOURCES = {
+    "CarWale": {
+        "site": "carwale",
+        "url": "https://www.carwale.com/used/{make}-{model}-cars-in-{city}/",
+        "base": "https://www.carwale.com",
+        "card_selector": '[data-track-label="ListingCard"], .o-cpnuEd, .used-car-card',
+        "link_marker": "/used/",
+        "page_param": "pn",
+        "make_slugs": CARWALE_SLUG_MAP,
+    },
+    "Spinny": {
+        "site": "spinny",
+        "url": "https://www.spinny.com/buy-used-{make}-{model}-cars-in-{city}/",
+        "base": "https://www.spinny.com",
+        "card_selector": '[data-testid="car-card"], .car-card',
+        "link_marker": "/buy-used-cars/",
+        "page_param": "page",
+        "make_slugs": {},
+    },
+}
+
+# Card text + link for every card in a single round trip
+_CARDS_JS = """els => els.map(e => {
+    const a = e.querySelector('a[href]') || e.closest('a[href]');
+    return {text: e.innerText || '', href: a ? a.href : ''};
+})"""
+
+_CACHE: Dict[tuple, Dict] = {}
+_CACHE_LOCK = threading.Lock()
+_KEY_LOCKS: Dict[tuple, threading.Lock] = {}
+
+
+def slugify(value: str) -> str:
+    return value.lower().strip().replace(" ", "-")
+
+
+def make_slugs(source: str, make: str, model: str, city: str) -> Dict[str, str]:
+    safe_make = make.lower().strip()
+    return {
+        "make": LISTING_SOURCES[source]["make_slugs"].get(safe_make, slugify(safe_make)),
+        "model": slugify(model),
+        "city": slugify(city) if city else "mumbai",
+    }
+
+
+def source_url(source: str, make: str, model: str, city: str, page: int = 1) -> str:
+    url = LISTING_SOURCES[source]["url"].format(**make_slugs(source, make, model, city))
+    return url if page <= 1 else f"{url}?{LISTING_SOURCES[source]['page_param']}={page}"
+
+
+def parse_listing_text(text: str, source: str, url: str = "") -> Optional[Dict]:
+    """Normalize one card's text into a listing (None when no price is present)."""
+    found = extract(text)
+    # A Lakh/Cr figure wins over plain amounts (EMI, booking fee) printed before it
+    prices = [p for p in found.prices if p.unit] or [p for p in found.prices if p.rupees >= 10000]
+    if not prices:
+        return None
+
+    year_m = None if found.years else YEAR_PATTERN.search(url)
+    lines = [line.strip() for line in text.split("\n") if line.strip()]
+    return {
+        'source': source,
+        'price': prices[0].lakh,
+        'year': found.years[0] if found.years else int(year_m.group(1)) if year_m else 0,
+        'km': found.kms[0] if found.kms else 0,
+        'title': lines[0][:100] if lines else "",
+        'url': url,
+    }
+
+
+def _absolute(href: str, base: str) -> str:
+    if not href:
+        return ""
+    return href if href.startswith("http") else base + href
+
+
+# ---------------- Browser path ----------------
+
+def _browser_job(source: str, url: str) -> Dict:
+    spec = LISTING_SOURCES[source]
+
+    async def job(page):
+        if not await goto_ready(page, url, spec["site"]):
+            return []
+        cards = await page.eval_on_selector_all(spec["card_selector"], _CARDS_JS)
+        listings = []
+        for card in cards[:MAX_CARDS]:
+            listing = parse_listing_text(card["text"], source, _absolute(card["href"], spec["base"]))
+            if listing:
+                listings.append(listing)
+        return listings
+
+    return {"job": job, "site": spec["site"], "context": {"user_agent": HEADERS["User-Agent"]}}
+
+
+def _fetch_with_browser(urls: Dict[str, str]) -> Dict[str, List[Dict]]:
+    browser = get_breaker("browser")
+    jobs = {source: _browser_job(source, url) for source, url in urls.items()}
+    try:
+        results = get_browser_pool().run_many(jobs, deadline=FETCH_DEADLINE)
+    except Exception as e:
+        print(f"⚠️ Listing fetch fail: {e}")
+        browser.record_failure(e)
+        return {}
+    fetched = {}
+    launched = True
+    for source, result in results.items():
+        site = get_breaker(host_key(urls[source]))
+        if isinstance(result, BrowserUnavailable):
+            print(f"❌ Playwright Launch Failed: {result}")
+            launched = False
+            browser.record_failure(result)
+        elif isinstance(result, Exception):
+            print(f"⚠️ {source} fail: {result}")
+            site.record_failure(result)
+        else:
+            site.record_success()
+            fetched[source] = result
+    if launched:
+        browser.record_success()
+    return fetched
+
+
+# ---------------- HTTP path ----------------
+
+def parse_anchor_cards(html: str, source: str, slugs: Dict[str, str]) -> List[Dict]:
+    """Listings from static HTML: listing links plus the text of their card container."""
+    spec = LISTING_SOURCES[source]
+    listings = []
+    seen = set()
+    for card in extract_cards(html, spec["link_marker"]):
+        href = card.href
+        if href in seen:
+            continue
+        if slugs["model"] not in href.lower() and slugs["make"] not in href.lower():
+            continue
+        full_text = card.link_text
+        if card.card_text:
+            full_text += "\n" + card.card_text
+        listing = parse_listing_text(full_text, source, _absolute(href, spec["base"]))
+        if listing:
+            seen.add(href)
+            listings.append(listing)
+        if len(listings) >= MAX_CARDS:
+            break
+    return listings
+
+
+def _fetch_html(source: str, url: str) -> str:
+    """Raw results page over plain HTTP ("" when blocked or unreachable)."""
+    try:
+        response = guarded_get(url, headers=HEADERS, timeout=HTTP_TIMEOUT)
+        if response.status_code != 200:
+            print(f"⚠️ {source}: Status {response.status_code}")
+            return ""
+        return response.text
+    except Exception as e:
+        print(f"⚠️ {source} HTTP fail: {e}")
+        return ""
+
+
+# ---------------- Embedded JSON path ----------------
+# Next.js / SPA pages ship their listing data inside the HTML; reading it costs
+# one HTTP request instead of a Chromium page.
+
+JSON_SCRIPT_PATTERN = re.compile(
+    r"<script[^>]*type=[\"']application/(?:ld\+)?json[\"'][^>]*>(.*?)</script>", re.IGNORECASE | re.DOTALL)
+STATE_ASSIGN_PATTERN = re.compile(r"window\.__[A-Z_]+__\s*=\s*")
+
+LISTING_PRICE_KEYS = ("price", "listingprice", "sellingprice", "pricenumeric", "carprice", "finalprice", "offerprice")
+LISTING_YEAR_KEYS = ("year", "makeyear", "modelyear", "manufacturingyear", "registrationyear", "vehiclemodeldate")
+LISTING_KM_KEYS = ("km", "kms", "kmdriven", "kmsdriven", "kilometers", "mileage", "mileagefromodometer", "odometer")
+LISTING_TITLE_KEYS = ("title", "name", "carname", "displayname")
+LISTING_URL_KEYS = ("url", "detailurl", "permalink", "href", "link", "slug")
+
+
+def embedded_json_blobs(html: str) -> List:
+    """Every JSON document embedded in the page (script blocks and window.__STATE__ assignments)."""
+    blobs = []
+    for match in JSON_SCRIPT_PATTERN.finditer(html):
+        try:
+            blobs.append(json.loads(match.group(1)))
+        except ValueError:
+            continue
+    decoder = json.JSONDecoder()
+    for match in STATE_ASSIGN_PATTERN.finditer(html):
+        try:
+            blobs.append(decoder.raw_decode(html, match.end())[0])
+        except ValueError:
+            continue
+    return blobs
+
+
+def _field(item: Dict, keys) -> object:
+    lowered = {k.lower(): v for k, v in item.items()}
+    for key in keys:
+        value = lowered.get(key)
+        if isinstance(value, dict):  # {"value": 35000, "unitCode": "KMT"}, {"price": ...}
+            value = value.get("value", value.get("price"))
+        if value not in (None, "", [], {}):
+            return value
+    return None
+
+
+def _json_price_lakh(value) -> Optional[float]:
+    if isinstance(value, str):
+        prices = extract(value).prices
+        if prices and prices[0].unit:
+            return prices[0].lakh
+        m = NUMBER_PATTERN.search(value)
+        if not m:
+            return None
+        value = float(m.group(0).replace(",", ""))
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if value >= 10000:  # Rupees
+        return round(value / LAKH, 2)
+    return float(value) if 0.5 < value < 200 else None
+
+
+def _json_int(value, pattern) -> int:
+    m = pattern.search(str(value)) if value is not None else None
+    return int(float(m.group(0).replace(",", ""))) if m else 0
+
+
+def _listing_from_json(item: Dict, source: str) -> Optional[Dict]:
+    offers = item.get("offers")
+    price = _json_price_lakh(_field(item, LISTING_PRICE_KEYS) or (_field(offers, ("price",)) if isinstance(offers, dict) else None))
+    year = _json_int(_field(item, LISTING_YEAR_KEYS), YEAR_PATTERN)
+    if not price or not year:
+        return None
+    url = _field(item, LISTING_URL_KEYS)
+    return {
+        'source': source,
+        'price': price,
+        'year': year,
+        'km': _json_int(_field(item, LISTING_KM_KEYS), NUMBER_PATTERN),
+        'title': str(_field(item, LISTING_TITLE_KEYS) or "")[:100],
+        'url': _absolute(url, LISTING_SOURCES[source]["base"]) if isinstance(url, str) else "",
+    }
+
+
+def parse_embedded_listings(html: str, source: str, slugs: Dict[str, str]) -> List[Dict]:
+    """Listings from the page's embedded JSON, restricted to the requested model."""
+    listings = []
+    seen = set()
+    stack = list(reversed(embedded_json_blobs(html)))
+    while stack and len(listings) < MAX_CARDS:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+        listing = _listing_from_json(node, source)
+        if listing:
+            text = re.sub(r"[^a-z0-9]+", "-", f"{listing['title']} {listing['url']}".lower())
+            identity = listing['url'] or (listing['title'], listing['price'])
+            if slugs["model"] in text and identity not in seen:
+                seen.add(identity)
+                listings.append(listing)
+            continue
+        stack.extend(reversed(list(node.values())))
+    return listings
+
+
+# ---------------- Shared entry point ----------------
+
+def _cache_key(source: str, slugs: Dict[str, str]) -> tuple:
+    return (source, slugs["make"], slugs["model"], slugs["city"])
+
+
+def _cached(key: tuple) -> Optional[Dict]:
+    entry = _CACHE.get(key)
+    if not entry:
+        return None
+    ttl = LISTING_CACHE_TTL if entry["listings"] else EMPTY_CACHE_TTL
+    return entry if time.time() - entry["fetched_at"] < ttl else None
+
+
+def _stored_pages(make: str, model: str, city: str, sources: List[str]) -> Dict[str, Dict]:
+    store = get_listing_store()
+    # A record/replay session must see the archived traffic, not whatever the live store holds
+    if store is None or not sources or active_session() is not None:
+        return {}
+    try:
+        pages = store.fresh_pages(make, model, city, sources)
+    except Exception as e:
+        print(f"⚠️ Listing store read fail: {e}")
+        return {}
+    for source, page in pages.items():
+        print(f"🗄️ {source}: {len(page['listings'])} stored listings ({(time.time() - page['fetched_at']) / 60:.0f} min old)")
+        page.update(url=source_url(source, make, model, city), method="store")
+    return pages
+
+
+def _store_pages(make: str, model: str, city: str, fetched: Dict[str, List[Dict]],
+                 fresh_for: Optional[float] = None):
+    store = get_listing_store()
+    session = active_session()
+    if store is None or (session is not None and session.mode == "replay"):
+        return  # Replayed pages are not live market data
+    try:
+        for listings in fetched.values():
+            if listings:
+                store.add(listings, make, model, city, fresh_for=fresh_for)
+    except Exception as e:
+        print(f"⚠️ Listing store write fail: {e}")
+
+
+def fetch_listing_pages(make: str, model: str, city: str,
+                        sources: Optional[List[str]] = None, refresh: bool = False,
+                        fresh_for: Optional[float] = None) -> Dict[str, Dict]:
+    """
+    Fetch each source's results page at most once per valuation window.
+    Returns source -> {'listings', 'url', 'method' (json/browser/http/cache/store), 'fetched_at'}.
+    refresh=True skips the cache and the store (scheduled refreshes); `fresh_for`
+    overrides how long the store serves the scraped pages.
+    """
+    if use_worker():
+        return _fetch_via_worker(make, model, city, sources, refresh, fresh_for)
+    # Fixed lock order so overlapping requests cannot deadlock
+    sources = sorted(sources or LISTING_SOURCES)
+    slugs = {source: make_slugs(source, make, model, city) for source in sources}
+    keys = {source: _cache_key(source, slugs[source]) for source in sources}
+
+    with _CACHE_LOCK:
+        locks = [_KEY_LOCKS.setdefault(keys[s], threading.Lock()) for s in sources]
+    # Concurrent callers for the same page wait for the first fetch instead of repeating it
+    for lock in locks:
+        lock.acquire()
+    try:
+        pages = {}
+        missing = {}
+        for source in sources:
+            entry = None if refresh else _cached(keys[source])
+            if entry:
+                pages[source] = dict(entry, method="cache")
+            else:
+                missing[source] = source_url(source, make, model, city)
+        for source, page in ({} if refresh else _stored_pages(make, model, city, list(missing))).items():
+            pages[source] = page
+            del missing[source]
+
+        fetched, methods = {}, {}
+        for source, url in list(missing.items()):
+            if get_breaker(host_key(url)).is_open():
+                # Site keeps failing: don't spend a browser page or HTTP timeout on it
+                print(f"⛔ {source}: circuit open, skipping")
+                fetched[source], methods[source] = [], "circuit_open"
+                del missing[source]
+        htmls = {}
+        if missing:
+            # HTTP first: one request per source (all at once), read the page's embedded JSON
+            with ThreadPoolExecutor(max_workers=len(missing), thread_name_prefix="listing-http") as executor:
+                futures = {source: executor.submit(bind(_fetch_html), source, url) for source, url in missing.items()}
+            htmls = {source: future.result() for source, future in futures.items()}
+            for source, html in htmls.items():
+                listings = parse_embedded_listings(html, source, slugs[source]) if html else []
+                if listings:
+                    fetched[source], methods[source] = listings, "json"
+        browser_todo = {source: url for source, url in missing.items() if source not in fetched}
+        if browser_todo and PLAYWRIGHT_AVAILABLE and get_breaker("browser").allow():
+            # No usable JSON: render the page and read the cards
+            fetched.update(_fetch_with_browser(browser_todo))
+            methods.update({source: "browser" for source in browser_todo if source in fetched})
+        for source in missing:
+            if not fetched.get(source):
+                # Browser unavailable or empty: the static HTML still carries listing links
+                fetched[source] = parse_anchor_cards(htmls.get(source, ""), source, slugs[source])
+                methods[source] = "http"
+
+        _store_pages(make, model, city, {s: fetched[s] for s in fetched if methods[s] in ("json", "browser", "http")},
+                     fresh_for)
+        with _CACHE_LOCK:
+            for source in fetched:
+                entry = {"listings": fetched[source], "url": source_url(source, make, model, city),
+                         "method": methods[source], "fetched_at": time.time()}
+                if methods[source] != "circuit_open":
+                    _CACHE[keys[source]] = entry
+                pages[source] = entry
+        return pages
+    finally:
+        for lock in locks:
+            lock.release()
+
+
+def _fetch_via_worker(make: str, model: str, city: str, sources: Optional[List[str]],
+                      refresh: bool = False, fresh_for: Optional[float] = None) -> Dict[str, Dict]:
+    # The worker process owns the browser, cache and breakers; this side only waits
+    try:
+        return get_worker_client().call("listings", timeout=FETCH_DEADLINE + 30, make=make, model=model,
+                                        city=city, sources=sources, refresh=refresh, fresh_for=fresh_for)
+    except Exception as e:
+        print(f"⚠️ Scrape worker fail: {e}")
+        return {source: {"listings": [], "url": source_url(source, make, model, city),
+                         "method": "worker_error", "fetched_at": time.time()}
+                for source in sorted(sources or LISTING_SOURCES)}
+
+
+def fetch_listings(make: str, model: str, city: str,
+                   sources: Optional[List[str]] = None) -> List[Dict]:
+    """Flattened normalized listings across sources (copies; safe to mutate)."""
+    pages = fetch_listing_pages(make, model, city, sources)
+    return [dict(listing) for page in pages.values() for listing in page["listings"]]
+
+
+def _fetch_extra_page(source: str, make: str, model: str, city: str, page_no: int) -> List[Dict]:
+    """Results page 2+ of one source over HTTP (embedded JSON, else listing links); cached and stored."""
+    slugs = make_slugs(source, make, model, city)
+    key = _cache_key(source, slugs) + (page_no,)
+    with _CACHE_LOCK:
+        entry = _cached(key)
+    if entry:
+        return entry["listings"]
+    url = source_url(source, make, model, city, page_no)
+    if get_breaker(host_key(url)).is_open():
+        return []
+    html = _fetch_html(source, url)
+    listings = (parse_embedded_listings(html, source, slugs) or parse_anchor_cards(html, source, slugs)) if html else []
+    _store_pages(make, model, city, {source: listings})
+    with _CACHE_LOCK:
+        _CACHE[key] = {"listings": listings, "url": url, "method": "http", "fetched_at": time.time()}
+    return listings
+
+
+def _listing_key(listing: Dict) -> tuple:
+    return (listing["url"],) if listing.get("url") else (listing["title"], listing["price"], listing["km"])
+
+
+def fetch_until(make: str, model: str, city: str, accept: Callable[[Dict], bool], target: int,
+                sources: Optional[List[str]] = None, max_pages: int = MAX_PAGES,
+                budget: float = PAGINATE_BUDGET) -> Dict[str, Dict]:
+    """
+    Page through the sources until `target` listings pass `accept` (the calling
+    engine's own validation), `max_pages` pages per source have been read or
+    `budget` seconds are spent. Page 1 comes from fetch_listing_pages (cache,
+    store, JSON, browser); later pages are HTTP only, all sources at once.
+    A source stops early when a page brings nothing new (end of results, or a
+    site that ignores the page parameter).
+    Same shape as fetch_listing_pages, plus 'pages' (read per source) and 'stop'.
+    """
+    pages = {source: dict(page, listings=list(page["listings"]), pages=1)
+             for source, page in fetch_listing_pages(make, model, city, sources).items()}
+    seen = {source: {_listing_key(l) for l in page["listings"]} for source, page in pages.items()}
+    # Nothing came back on page 1 (blocked, circuit open, timed out): later pages won't fare better
+    active = [source for source, page in pages.items() if page["listings"]]
+    ends_at = time.time() + budget
+    page_no, stop = 2, "exhausted"
+
+    def validated():
+        return sum(1 for page in pages.values() for listing in page["listings"] if accept(listing))
+
+    while True:
+        if validated() >= target:
+            stop = "target"
+            break
+        if not active:
+            break
+        if page_no > max_pages:
+            stop = "max_pages"
+            break
+        remaining = ends_at - time.time()
+        if remaining <= 0:
+            stop = "deadline"
+            break
+        executor = ThreadPoolExecutor(max_workers=len(active), thread_name_prefix="listing-page")
+        futures = {executor.submit(bind(_fetch_extra_page), source, make, model, city, page_no): source
+                   for source in active}
+        done, not_done = wait(futures, timeout=remaining)
+        executor.shutdown(wait=False)  # A late page still lands in the cache/store
+        for future in not_done:
+            active.remove(futures[future])
+        for future in done:
+            source = futures[future]
+            try:
+                new = [l for l in future.result() if _listing_key(l) not in seen[source]]
+            except Exception as e:
+                print(f"⚠️ {source} page {page_no} fail: {e}")
+                new = []
+            if not new:
+                active.remove(source)
+                continue
+            seen[source].update(_listing_key(l) for l in new)
+            pages[source]["listings"].extend(dict(l) for l in new)
+            pages[source]["pages"] = page_no
+        page_no += 1
+
+    for page in pages.values():
+        page["stop"] = stop
+    read = ", ".join(f"{source} {page['pages']}" for source, page in pages.items())
+    print(f"📄 {make} {model} {city}: {validated()}/{target} validated listings, pages read: {read} ({stop})")
+    return pages
+
+
+def clear_cache():
+    with _CACHE_LOCK:
+        _CACHE.clear()
@@ -0,0 +1,214 @@
+"""
+Market Listing Store.
+
+Every scraper used to throw its listings away after computing a median. Now
+listings land in a local SQLite store (data/listings.db) indexed on
+(make, model, year, city, source, scraped_at), and the listing layer serves a
+source page from it, without touching the network, while that page is fresh.
+
+Freshness belongs to the page, not to rows: every make/model/city results
+page the listing layer scraped has a `pages` record with its own
+`fresh_until` (LISTING_FRESHNESS after a live scrape, longer for pages
+pre-warmed off-peak, see src/prewarm.py). Harvester rows from make-level
+pages are stored as listings only, so they can never stand in for a model's
+results page. Models match exactly ('swift' never returns 'swift-dzire').
+
+Stored listing (prices in Lakh, like the listing layer):
+    {'source': 'CarWale', 'make': 'maruti-suzuki', 'model': 'swift', 'year': 2020,
+     'city': 'mumbai', 'price': 6.25, 'km': 35000, 'title': '...', 'url': '...',
+     'scraped_at': 1718000000.0}
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+LISTING_DB = Path(os.getenv("LISTING_STORE_PATH", Path(__file__).parent.parent / "data" / "listings.db"))
+LISTING_FRESHNESS = float(os.getenv("LISTING_FRESHNESS", 6 * 3600))
+STORE_ENABLED = os.getenv("LISTING_STORE", "1") == "1"
+
+# Same car, different spellings across the app, the harvester and the sites
+MAKE_ALIASES = {
+    "maruti": "maruti-suzuki",
+    "mercedes": "mercedes-benz",
+}
+
+FIELDS = ("id", "source", "make", "model", "year", "city", "price", "km", "title", "url", "scraped_at")
+
+
+def norm(value) -> str:
+    return str(value or "").lower().strip().replace(" ", "-")
+
+
+def norm_make(make: str) -> str:
+    make = norm(make)
+    return MAKE_ALIASES.get(make, make)
+
+
+def listing_id(row: Dict) -> str:
+    """Stable ID: the listing URL when known, else a hash of what the card shows."""
+    if row.get("url"):
+        return f"{row.get('source', '')}|{row['url']}"
+    content = "|".join(norm(row.get(f)) for f in ("source", "city", "make", "model", "year", "km", "price", "title"))
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:20]
+
+
+class ListingStore:
+    def __init__(self, path: Path = LISTING_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS listings (
+                id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                make TEXT NOT NULL,
+                model TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                city TEXT NOT NULL,
+                price REAL NOT NULL,
+                km INTEGER NOT NULL,
+                title TEXT,
+                url TEXT,
+                scraped_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS listings_lookup
+                ON listings (make, model, year, city, source, scraped_at);
+            CREATE TABLE IF NOT EXISTS pages (
+                source TEXT NOT NULL,
+                make TEXT NOT NULL,
+                model TEXT NOT NULL,
+                city TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                fresh_until REAL NOT NULL,
+                PRIMARY KEY (source, make, model, city)
+            );
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, listings: Iterable[Dict], make: str, model: str, city: str,
+            scraped_at: Optional[float] = None, fresh_for: Optional[float] = None, page: bool = True) -> int:
+        """
+        Upsert listing-layer rows (price in Lakh) for one make/model/city page.
+        With `page`, each source's page is recorded as fresh for `fresh_for`
+        seconds (default LISTING_FRESHNESS).
+        """
+        now = scraped_at or time.time()
+        fresh_until = now + (LISTING_FRESHNESS if fresh_for is None else fresh_for)
+        rows = []
+        for listing in listings:
+            row = {"source": listing.get("source", ""), "make": norm_make(make), "model": norm(model),
+                   "year": int(listing.get("year") or 0), "city": norm(city), "price": float(listing["price"]),
+                   "km": int(listing.get("km") or 0), "title": listing.get("title", ""),
+                   "url": listing.get("url", ""), "scraped_at": now}
+            row["id"] = listing_id(row)
+            rows.append(tuple(row[f] for f in FIELDS))
+        with self._conn() as db:
+            db.executemany(f"""INSERT INTO listings ({", ".join(FIELDS)}) VALUES ({", ".join("?" * len(FIELDS))})
+                               ON CONFLICT(id) DO UPDATE SET price = excluded.price, km = excluded.km,
+                                   year = excluded.year, title = excluded.title, scraped_at = excluded.scraped_at""",
+                           rows)
+            if page:
+                db.executemany("""INSERT INTO pages (source, make, model, city, fetched_at, fresh_until)
+                                  VALUES (?, ?, ?, ?, ?, ?)
+                                  ON CONFLICT(source, make, model, city) DO UPDATE SET
+                                      fetched_at = excluded.fetched_at, fresh_until = excluded.fresh_until""",
+                               [(source, norm_make(make), norm(model), norm(city), now, fresh_until)
+                                for source in {r[1] for r in rows}])
+        return len(rows)
+
+    def add_harvested(self, rows: Iterable[Dict]) -> int:
+        """
+        Upsert harvester rows (price in rupees, each row carries its own make/model/city).
+        They come from make-level pages, so no model page is marked fresh.
+        """
+        count = 0
+        for row in rows:
+            listing = dict(row, price=round(row["price"] / 100000, 2), source=row.get("source", ""))
+            count += self.add([listing], row["make"], row["model"], row["city"], page=False)
+        return count
+
+    def query(self, make: str, model: str, city: Optional[str] = None, year: Optional[int] = None,
+              sources: Optional[List[str]] = None, max_age: Optional[float] = None) -> List[Dict]:
+        """Stored listings of exactly this model, newest first (scraped within `max_age` seconds when given)."""
+        sql = "SELECT * FROM listings WHERE make = ? AND model = ?"
+        params: List = [norm_make(make), norm(model)]
+        if city:
+            sql += " AND city = ?"
+            params.append(norm(city))
+        if year:
+            sql += " AND year = ?"
+            params.append(int(year))
+        if sources:
+            sql += f" AND source IN ({', '.join('?' * len(sources))})"
+            params.extend(sources)
+        if max_age is not None:
+            sql += " AND scraped_at >= ?"
+            params.append(time.time() - max_age)
+        rows = self._conn().execute(sql + " ORDER BY scraped_at DESC", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def fresh_pages(self, make: str, model: str, city: str, sources: List[str],
+                    max_age: Optional[float] = None, fresh_at: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        source -> {'listings', 'fetched_at'} for sources whose results page is
+        still fresh (at `fresh_at`, default now), or was fetched within `max_age`
+        seconds when given. A page serves the listings stored by that scrape.
+        """
+        if not sources:
+            return {}
+        sql = (f"SELECT * FROM pages WHERE make = ? AND model = ? AND city = ? "
+               f"AND source IN ({', '.join('?' * len(sources))})")
+        params: List = [norm_make(make), norm(model), norm(city), *sources]
+        if max_age is not None:
+            sql += " AND fetched_at >= ?"
+            params.append(time.time() - max_age)
+        else:
+            sql += " AND fresh_until >= ?"
+            params.append(time.time() if fresh_at is None else fresh_at)
+        pages: Dict[str, Dict] = {}
+        for record in self._conn().execute(sql, params).fetchall():
+            listings = [{"source": row["source"], "price": row["price"], "year": row["year"], "km": row["km"],
+                         "title": row["title"] or "", "url": row["url"] or ""}
+                        for row in self.query(make, model, city, sources=[record["source"]])
+                        if row["scraped_at"] >= record["fetched_at"]]
+            if listings:
+                pages[record["source"]] = {"listings": listings, "fetched_at": record["fetched_at"]}
+        return pages
+
+    def prune(self, max_age: float) -> int:
+        with self._conn() as db:
+            db.execute("DELETE FROM pages WHERE fetched_at < ?", (time.time() - max_age,))
+            return db.execute("DELETE FROM listings WHERE scraped_at < ?", (time.time() - max_age,)).rowcount
+
+    def summary(self) -> Dict:
+        row = self._conn().execute("SELECT COUNT(*) AS n, MIN(scraped_at) AS oldest, MAX(scraped_at) AS newest "
+                                   "FROM listings").fetchone()
+        return dict(row)
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_listing_store() -> Optional[ListingStore]:
+    """Process-wide store (None when LISTING_STORE=0)."""
+    global _STORE
+    if not STORE_ENABLED:
+        return None
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = ListingStore()
+        return _STORE
@@ -0,0 +1,251 @@
+"""
+Pre-warming Scheduler.
+
+Valuation traffic is concentrated on a few dozen model/city combinations, yet
+the first lookup of the day pays full scrape and search latency. Valuations
+are logged to a request history (data/prewarm.db); during off-peak hours the
+scheduler takes the hottest combinations and refreshes, ahead of demand:
+
+  * listing pages (listing store)            -> served by the listing layer
+  * Google launch prices (engine_logic cache) -> served by the Logic engine
+  * Cars24 quotes (quote cache)               -> served by the Cars24 engine
+
+Pre-warmed listing pages stay fresh in the store for PREWARM_FRESHNESS (24 h
+by default) instead of the 6 h LISTING_FRESHNESS of a live scrape, so a pass at
+1 AM still serves the next day's peak; a pass re-warms anything that would
+expire before midday.
+
+Budgets: PREWARM_CONCURRENCY tasks at once, at most PREWARM_GOOGLE_QUOTA
+Custom Search queries and PREWARM_CARS24_QUOTA Cars24 flows per pass.
+Anything still fresh is skipped, so quota only goes to what would miss.
+
+    python -m src.prewarm --plan     # show what a pass would do
+    python -m src.prewarm --once     # run one pass now (ignores the window)
+    python -m src.prewarm            # daemon: one pass per night in the window
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+HISTORY_DB = Path(__file__).parent.parent / "data" / "prewarm.db"
+HISTORY_DAYS = 14
+PREWARM_HOURS = os.getenv("PREWARM_HOURS", "1-6")  # Local off-peak window, start-end hour
+PREWARM_IN_APP = os.getenv("PREWARM_IN_APP", "0") == "1"  # Run the scheduler inside the Streamlit server
+PREWARM_FRESHNESS = float(os.getenv("PREWARM_FRESHNESS", 24 * 3600))  # Until the next night's pass
+PREWARM_TOP = int(os.getenv("PREWARM_TOP", 30))
+PREWARM_CONCURRENCY = int(os.getenv("PREWARM_CONCURRENCY", 2))
+PREWARM_GOOGLE_QUOTA = int(os.getenv("PREWARM_GOOGLE_QUOTA", 40))
+PREWARM_CARS24_QUOTA = int(os.getenv("PREWARM_CARS24_QUOTA", 10))
+GOOGLE_QUERIES_PER_BASE_PRICE = 2  # get_real_base_price tries up to two queries
+CHECK_INTERVAL = 600
+
+
+# ---------------- Request history ----------------
+
+class RequestHistory:
+    def __init__(self, path: Path = HISTORY_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS requests (
+                              make TEXT, model TEXT, year INTEGER, variant TEXT, fuel TEXT,
+                              transmission TEXT, km INTEGER, city TEXT, requested_at REAL)""")
+            db.execute("CREATE INDEX IF NOT EXISTS requests_time ON requests (requested_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def record(self, make, model, year, variant, fuel, transmission, km, city, requested_at=None):
+        with self._lock, self._connect() as db:
+            db.execute("INSERT INTO requests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       (make, model, int(year), variant, fuel, transmission, int(km), city,
+                        requested_at or time.time()))
+
+    def hot(self, group_by: List[str], days: float = HISTORY_DAYS, limit: int = PREWARM_TOP) -> List[Dict]:
+        """Most requested combinations of `group_by` columns, with the typical km of each."""
+        cols = ", ".join(group_by)
+        with self._connect() as db:
+            rows = db.execute(f"""SELECT {cols}, COUNT(*) AS hits, CAST(AVG(km) AS INTEGER) AS km
+                                  FROM requests WHERE requested_at >= ?
+                                  GROUP BY {cols} ORDER BY hits DESC LIMIT ?""",
+                              (time.time() - days * 86400, limit)).fetchall()
+        return [dict(r) for r in rows]
+
+
+_HISTORY = None
+_HISTORY_LOCK = threading.Lock()
+
+
+def get_history() -> RequestHistory:
+    global _HISTORY
+    with _HISTORY_LOCK:
+        if _HISTORY is None:
+            _HISTORY = RequestHistory()
+        return _HISTORY
+
+
+def record_request(make, model, year, variant, fuel, transmission, km, city):
+    """Log a valuation for the scheduler; never lets a logging problem reach the caller."""
+    try:
+        get_history().record(make, model, year, variant, fuel, transmission, km, city)
+    except Exception as e:
+        print(f"⚠️ Request history write fail: {e}")
+
+
+# ---------------- Scheduler ----------------
+
+def in_window(hours: str = PREWARM_HOURS, now: Optional[datetime] = None) -> bool:
+    """Is `now` inside the 'start-end' hour window (may wrap past midnight)?"""
+    start, end = (int(h) for h in hours.split("-"))
+    hour = (now or datetime.now()).hour
+    return start <= hour < end if start <= end else hour >= start or hour < end
+
+
+class PrewarmScheduler:
+    def __init__(self, history: Optional[RequestHistory] = None, concurrency: int = PREWARM_CONCURRENCY,
+                 google_quota: int = PREWARM_GOOGLE_QUOTA, cars24_quota: int = PREWARM_CARS24_QUOTA,
+                 top: int = PREWARM_TOP):
+        self.history = history or get_history()
+        self.concurrency = concurrency
+        self.google_quota = google_quota
+        self.cars24_quota = cars24_quota
+        self.top = top
+        self.last_run = 0.0
+
+    # Each *_tasks() returns only what would miss its cache right now
+
+    def listing_tasks(self) -> List[Dict]:
+        from src.listing_source import LISTING_SOURCES
+        from src.listing_store import get_listing_store
+        store = get_listing_store()
+        tasks = []
+        # Skip only pages that stay fresh through the coming day's peak
+        peak_end = time.time() + PREWARM_FRESHNESS / 2
+        for combo in self.history.hot(["make", "model", "city"], limit=self.top):
+            sources = list(LISTING_SOURCES)
+            if store and len(store.fresh_pages(combo["make"], combo["model"], combo["city"], sources,
+                                               fresh_at=peak_end)) == len(sources):
+                continue
+            tasks.append({"kind": "listings", **combo})
+        return tasks
+
+    def base_price_tasks(self) -> List[Dict]:
+        from src.engine_logic import cached_base_price
+        tasks = []
+        for combo in self.history.hot(["make", "model", "variant", "year"], limit=self.top):
+            if cached_base_price(combo["make"], combo["model"], combo["variant"], combo["year"]) is None:
+                tasks.append({"kind": "base_price", **combo})
+        return tasks
+
+    def cars24_tasks(self) -> List[Dict]:
+        try:
+            from src.engine_cars24 import cached_quote, session_exists, session_health
+        except ImportError:
+            return []
+        if not session_exists() or session_health()["healthy"] is False:
+            return []
+        tasks = []
+        # Group by 10k km too: Cars24 quotes are bucketed on km
+        for combo in self.history.hot(["make", "model", "year", "variant", "fuel", "transmission", "city",
+                                       "km / 10000"], limit=self.top):
+            if cached_quote(combo["make"], combo["model"], combo["year"], combo["variant"], combo["fuel"],
+                            combo["transmission"], combo["km"], combo["city"]) is None:
+                tasks.append({"kind": "cars24", **combo})
+        return tasks
+
+    def plan(self) -> List[Dict]:
+        """Tasks for one pass, hottest first within each kind, trimmed to the quotas."""
+        base = self.base_price_tasks()[:self.google_quota // GOOGLE_QUERIES_PER_BASE_PRICE]
+        cars24 = self.cars24_tasks()[:self.cars24_quota]
+        return self.listing_tasks() + base + cars24
+
+    def _run_task(self, task: Dict) -> bool:
+        if task["kind"] == "listings":
+            from src.listing_source import fetch_listing_pages
+            pages = fetch_listing_pages(task["make"], task["model"], task["city"], refresh=True,
+                                        fresh_for=PREWARM_FRESHNESS)
+            return any(page["listings"] for page in pages.values())
+        if task["kind"] == "base_price":
+            from src.engine_logic import get_real_base_price
+            price, _ = get_real_base_price(task["make"], task["model"], task["variant"], task["year"],
+                                           os.getenv("GOOGLE_SEARCH_API_KEY"), os.getenv("SEARCH_ENGINE_ID"),
+                                           refresh=True)
+            return price is not None
+        if task["kind"] == "cars24":
+            from src.engine_cars24 import get_cars24_price
+            price, _ = get_cars24_price(task["make"], task["model"], task["year"], task["variant"], task["fuel"],
+                                        task["transmission"], task["km"], task["city"])
+            return price is not None
+        raise ValueError(f"Unknown prewarm task: {task['kind']}")
+
+    def run_once(self) -> Dict[str, Dict[str, int]]:
+        """One pass; returns {kind: {"ok", "failed"}}."""
+        tasks = self.plan()
+        summary = {kind: {"ok": 0, "failed": 0} for kind in ("listings", "base_price", "cars24")}
+        print(f"🔥 Pre-warming {len(tasks)} entries ({self.concurrency} at a time)")
+        started = time.time()
+
+        def run(task):
+            try:
+                ok = self._run_task(task)
+            except Exception as e:
+                print(f"⚠️ Prewarm {task['kind']} {task['make']} {task['model']} fail: {e}")
+                ok = False
+            summary[task["kind"]]["ok" if ok else "failed"] += 1
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="prewarm") as executor:
+            list(executor.map(run, tasks))
+        self.last_run = time.time()
+        print(f"🔥 Pre-warm done in {time.time() - started:.0f}s: {summary}")
+        return summary
+
+    def run_forever(self, hours: str = PREWARM_HOURS):
+        """One pass per off-peak window."""
+        while True:
+            if in_window(hours) and time.time() - self.last_run > 12 * 3600:
+                self.run_once()
+            time.sleep(CHECK_INTERVAL)
+
+
+_scheduler_thread = None
+
+
+def start_background(hours: str = PREWARM_HOURS):
+    """Run the scheduler on a daemon thread (once per process)."""
+    global _scheduler_thread
+    if _scheduler_thread is not None and _scheduler_thread.is_alive():
+        return
+    _scheduler_thread = threading.Thread(target=PrewarmScheduler().run_forever, args=(hours,),
+                                         name="prewarm", daemon=True)
+    _scheduler_thread.start()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Pre-warm caches for popular valuations")
+    parser.add_argument("--plan", action="store_true", help="print the tasks of one pass and exit")
+    parser.add_argument("--once", action="store_true", help="run one pass now, ignoring the window")
+    parser.add_argument("--hours", default=PREWARM_HOURS, help="off-peak window, e.g. 1-6")
+    args = parser.parse_args()
+
+    scheduler = PrewarmScheduler()
+    if args.plan:
+        for task in scheduler.plan():
+            print(f"   {task['kind']:<10} {task['make']} {task['model']} {task.get('city') or task.get('year')} "
+                  f"({task['hits']} requests)")
+    elif args.once:
+        scheduler.run_once()
+    else:
+        print(f"🔥 Pre-warm scheduler: window {args.hours}h, top {scheduler.top} combinations")
+        scheduler.run_forever(args.hours)
@@ -0,0 +1,181 @@
+"""
+Scraping Fleet.
+
+Nightly market refreshes cover TARGET_CITIES x TARGET_MAKES (and, for the
+listing layer, make x model x city). One machine's Chromium is the bottleneck,
+so the refresh is split into jobs on a WorkQueue and any number of nodes drain
+it:
+
+    python -m src.scrape_fleet plan --models data/fleet_models.json
+    python -m src.scrape_fleet node --node-id box-1 --concurrency 4   # on each node
+    python -m src.scrape_fleet stats
+
+Nodes extend their leases while a job runs; a node that dies lets its leases
+expire and the jobs go to another node. Results are upserted by listing
+identity, so a job that runs twice never duplicates rows.
+"""
+
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from src.work_queue import LEASE_SECONDS, SQLiteWorkQueue, WorkQueue
+
+IDLE_POLL = 5  # Seconds between lease attempts when the queue is empty
+
+
+# ---------------- Jobs ----------------
+
+# Handlers raise when nothing could be scraped, so the queue retries them
+# (with backoff) and eventually dead-letters them instead of marking them done.
+
+def _job_harvest(city: str, make: str) -> List[Dict]:
+    """City x make page on every harvest source; fails only when every source fails."""
+    from src.harvester import HARVEST_SOURCES, fetch_source_page
+    rows, errors = [], []
+    for source in HARVEST_SOURCES:
+        try:
+            rows.extend(fetch_source_page(source, city, make))
+        except Exception as e:
+            errors.append(f"{source}: {e}")
+    if len(errors) == len(HARVEST_SOURCES):
+        raise RuntimeError("; ".join(errors))
+    return rows
+
+
+def _job_listings(make: str, model: str, city: str) -> List[Dict]:
+    """Model page on every listing source; fails when no source returned a listing."""
+    from src.listing_source import fetch_listing_pages
+    pages = fetch_listing_pages(make, model, city, refresh=True)
+    rows = [dict(listing, make=make, model=model, city=city)
+            for page in pages.values() for listing in page["listings"]]
+    if not rows:
+        methods = ", ".join(f"{source}: {page.get('method')}" for source, page in sorted(pages.items()))
+        raise RuntimeError(f"No listings from any source ({methods})")
+    return rows
+
+
+FLEET_JOBS = {
+    "harvest": _job_harvest,
+    "listings": _job_listings,
+}
+
+
+def result_key(row: Dict) -> str:
+    """Identity of a scraped listing (same IDs as the listing store)."""
+    from src.listing_store import listing_id
+    return listing_id(row)
+
+
+def plan_refresh(queue: WorkQueue, models: Optional[Dict[str, List[str]]] = None) -> Dict[str, int]:
+    """Enqueue the nightly refresh; returns how many jobs were newly queued per kind."""
+    from src.harvester import TARGET_CITIES, TARGET_MAKES
+    queued = {"harvest": 0, "listings": 0}
+    for city in TARGET_CITIES:
+        for make in TARGET_MAKES:
+            if queue.enqueue("harvest", {"city": city, "make": make}, key=f"harvest:{city}:{make}"):
+                queued["harvest"] += 1
+            for model in (models or {}).get(make, []):
+                if queue.enqueue("listings", {"make": make, "model": model, "city": city},
+                                 key=f"listings:{city}:{make}:{model.lower()}"):
+                    queued["listings"] += 1
+    return queued
+
+
+# ---------------- Node ----------------
+
+class FleetNode:
+    """Leases jobs from the queue and runs up to `concurrency` of them at once."""
+
+    def __init__(self, queue: WorkQueue, node_id: Optional[str] = None, concurrency: int = 2,
+                 lease_seconds: float = LEASE_SECONDS, handlers: Optional[Dict] = None):
+        self.queue = queue
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.handlers = handlers or FLEET_JOBS
+        self._stop = threading.Event()
+
+    def run_job(self, job: Dict) -> bool:
+        """Run one leased job; True when it completed."""
+        started = time.time()
+        renew = threading.Event()
+
+        def heartbeat():
+            # Keep the lease while a slow browser job is still going
+            while not renew.wait(self.lease_seconds / 3):
+                if not self.queue.extend(job["id"], self.node_id, self.lease_seconds):
+                    return
+
+        threading.Thread(target=heartbeat, name=f"lease-{job['id']}", daemon=True).start()
+        try:
+            rows = self.handlers[job["kind"]](**job["payload"])
+            self.queue.upsert_results(job["key"], {result_key(row): row for row in rows})
+            self.queue.complete(job["id"], self.node_id, items=len(rows), busy_seconds=time.time() - started)
+            print(f"✅ {self.node_id}: {job['key']} -> {len(rows)} rows")
+            return True
+        except Exception as e:
+            status = self.queue.fail(job["id"], self.node_id, f"{type(e).__name__}: {e}",
+                                     busy_seconds=time.time() - started)
+            print(f"⚠️ {self.node_id}: {job['key']} failed (attempt {job['attempt']}, now {status}): {e}")
+            return False
+        finally:
+            renew.set()
+
+    def run(self, drain: bool = False):
+        """Work until stop() (or, with drain=True, until no job is ready)."""
+        print(f"🛰️ Fleet node {self.node_id} up ({self.concurrency} slots)")
+        slots = threading.Semaphore(self.concurrency)
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="fleet-job") as executor:
+            while not self._stop.is_set():
+                slots.acquire()
+                jobs = self.queue.lease(self.node_id, limit=1, lease_seconds=self.lease_seconds)
+                if not jobs:
+                    slots.release()
+                    if drain:
+                        break
+                    self._stop.wait(IDLE_POLL)
+                    continue
+                future = executor.submit(self.run_job, jobs[0])
+                future.add_done_callback(lambda _: slots.release())
+
+    def stop(self):
+        self._stop.set()
+
+
+def _print_stats(queue: WorkQueue):
+    print(f"📋 Jobs: {queue.counts()}")
+    for m in queue.node_metrics():
+        print(f"   🛰️ {m['node']}: {m['jobs_done']} done, {m['jobs_failed']} failed, "
+              f"{m['items']} rows, {m['items_per_sec']} rows/s, {m['jobs_per_min']} jobs/min")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed market refresh")
+    parser.add_argument("command", choices=["plan", "node", "stats"])
+    parser.add_argument("--db", default=None, help="queue file (default data/work_queue.db)")
+    parser.add_argument("--models", default=None, help="JSON file of make -> [models] for listing jobs")
+    parser.add_argument("--node-id", default=None)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--drain", action="store_true", help="exit once the queue is empty")
+    args = parser.parse_args()
+
+    queue = SQLiteWorkQueue(args.db) if args.db else SQLiteWorkQueue()
+    if args.command == "plan":
+        models = None
+        if args.models:
+            with open(args.models) as f:
+                models = json.load(f)
+        print(f"📋 Queued: {plan_refresh(queue, models)}")
+    elif args.command == "node":
+        node = FleetNode(queue, args.node_id, args.concurrency)
+        try:
+            node.run(drain=args.drain)
+        except KeyboardInterrupt:
+            node.stop()
+    _print_stats(queue)
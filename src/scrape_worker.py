@@ -0,0 +1,272 @@
+"""
+Out-of-Process Scrape Worker.
+
+Chromium used to live inside the Streamlit server: a browser crash, a memory
+spike or a two-minute Cars24 flow hurt every session. With SCRAPE_WORKER=1 the
+listing layer and the Cars24 engine become thin clients; the actual scraping
+runs in a separate worker process that owns the browser pool.
+
+    client (Streamlit)  --job_queue-->  worker process (browser pool, N threads)
+                        <--result_queue--
+
+Limits enforced by the worker:
+  * WORKER_CONCURRENCY jobs at a time (extra jobs wait in the queue)
+  * WORKER_MEMORY_MB for the worker + its Chromium tree; past it the worker
+    drains in-flight jobs and exits, and the client starts a fresh one.
+A crashed worker fails only the jobs it had started; queued jobs go to its
+replacement.
+"""
+
+import atexit
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import Dict
+
+try:
+    import psutil
+except ImportError:  # Memory limit is skipped without psutil
+    psutil = None
+
+WORKER_ENABLED = os.getenv("SCRAPE_WORKER", "0") == "1"
+WORKER_CONCURRENCY = int(os.getenv("SCRAPE_WORKER_CONCURRENCY", 4))
+WORKER_MEMORY_MB = int(os.getenv("SCRAPE_WORKER_MEMORY_MB", 2000))
+JOB_TIMEOUT = 180
+
+IN_WORKER = False  # True inside the worker process (engines then run locally)
+
+
+class WorkerCrashed(RuntimeError):
+    """The worker process died while running the job."""
+
+
+def use_worker() -> bool:
+    """
+    Should engines hand their scraping to the worker process? Not while this
+    thread is recording/replaying a valuation: the worker's traffic would
+    bypass the archive (see src/io_recorder.py).
+    """
+    from src.io_recorder import active_session
+    return WORKER_ENABLED and not IN_WORKER and active_session() is None
+
+
+# ---------------- Worker side ----------------
+
+def _job_listings(make, model, city, sources=None, refresh=False, fresh_for=None):
+    from src.listing_source import fetch_listing_pages
+    return fetch_listing_pages(make, model, city, sources, refresh, fresh_for)
+
+
+def _job_cars24(**kwargs):
+    from src.engine_cars24 import get_cars24_price
+    return get_cars24_price(**kwargs)
+
+
+def _job_cars24_probe():
+    from src.engine_cars24 import warm_up
+    return warm_up()
+
+
+def _job_ping():
+    return {"pid": os.getpid()}
+
+
+JOB_HANDLERS = {
+    "listings": _job_listings,
+    "cars24": _job_cars24,
+    "cars24_probe": _job_cars24_probe,
+    "ping": _job_ping,
+}
+
+
+def _tree_memory_mb() -> float:
+    if psutil is None:
+        return 0.0
+    try:
+        me = psutil.Process()
+        procs = [me] + me.children(recursive=True)
+        return sum(p.memory_info().rss for p in procs) / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+def worker_main(job_queue, result_queue, concurrency: int, memory_mb: int):
+    """Entry point of the worker process."""
+    global IN_WORKER
+    IN_WORKER = True
+    slots = threading.Semaphore(concurrency)
+    draining = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scrape-job")
+
+    def run(job):
+        try:
+            result = JOB_HANDLERS[job["kind"]](**job["args"])
+            result_queue.put({"type": "done", "id": job["id"], "result": result})
+        except Exception as e:
+            result_queue.put({"type": "error", "id": job["id"], "error": f"{type(e).__name__}: {e}"})
+        finally:
+            if memory_mb and _tree_memory_mb() > memory_mb and not draining.is_set():
+                print(f"♻️ Scrape worker {os.getpid()}: over {memory_mb} MB, draining")
+                draining.set()
+            slots.release()
+
+    print(f"🛠️ Scrape worker {os.getpid()} ready ({concurrency} slots, {memory_mb} MB)")
+    while not draining.is_set():
+        slots.acquire()
+        if draining.is_set():
+            break
+        try:
+            job = job_queue.get(timeout=1)
+        except queue.Empty:
+            slots.release()
+            continue
+        if job is None:  # Shutdown sentinel
+            break
+        result_queue.put({"type": "started", "id": job["id"], "pid": os.getpid()})
+        executor.submit(run, job)
+    executor.shutdown(wait=True)
+    try:
+        from src.browser_pool import get_browser_pool
+        get_browser_pool().shutdown()
+    except Exception:
+        pass
+
+
+# ---------------- Client side ----------------
+
+class ScrapeWorkerClient:
+    """Owns the worker process and resolves job futures from its results."""
+
+    def __init__(self, concurrency: int = WORKER_CONCURRENCY, memory_mb: int = WORKER_MEMORY_MB):
+        self.concurrency = concurrency
+        self.memory_mb = memory_mb
+        self._ctx = multiprocessing.get_context("spawn")
+        self._jobs = None
+        self._results = None
+        self._process = None
+        self._lock = threading.Lock()
+        self._futures: Dict[int, Future] = {}
+        self._queued: Dict[int, Dict] = {}  # job id -> job, until a worker reports it started
+        self._started: Dict[int, int] = {}  # job id -> worker pid
+        self._ids = itertools.count(1)
+        self.restarts = 0
+        threading.Thread(target=self._dispatch, name="scrape-worker-results", daemon=True).start()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                return
+            if self._process is not None:
+                self.restarts += 1
+                self._fail_started(self._process.pid)
+            # Fresh queues per worker: a killed process can leave a shared queue's lock held
+            self._jobs, self._results = self._ctx.Queue(), self._ctx.Queue()
+            for job in self._queued.values():
+                self._jobs.put(job)
+            self._process = self._ctx.Process(
+                target=worker_main, args=(self._jobs, self._results, self.concurrency, self.memory_mb),
+                name="scrape-worker", daemon=True)
+            self._process.start()
+
+    def _fail_started(self, pid):
+        for job_id, worker_pid in list(self._started.items()):
+            if worker_pid == pid:
+                del self._started[job_id]
+                future = self._futures.pop(job_id, None)
+                if future and not future.done():
+                    future.set_exception(WorkerCrashed(f"Scrape worker {pid} exited during the job"))
+
+    def _dispatch(self):
+        while True:
+            results = self._results
+            if results is None:
+                time.sleep(0.2)
+                continue
+            try:
+                message = results.get(timeout=1)
+            except queue.Empty:
+                # Replace a worker that exited (crash or memory drain) while jobs wait on it
+                with self._lock:
+                    process = self._process
+                    waiting = bool(self._futures)
+                if process is not None and not process.is_alive() and waiting:
+                    self._ensure_worker()
+                continue
+            except (EOFError, OSError):
+                continue
+            job_id = message["id"]
+            with self._lock:
+                if message["type"] == "started":
+                    self._queued.pop(job_id, None)
+                    self._started[job_id] = message["pid"]
+                    continue
+                self._started.pop(job_id, None)
+                future = self._futures.pop(job_id, None)
+            if future is None or future.done():
+                continue
+            if message["type"] == "done":
+                future.set_result(message["result"])
+            else:
+                future.set_exception(RuntimeError(message["error"]))
+
+    def submit(self, kind: str, **args) -> Future:
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown scrape job: {kind}")
+        self._ensure_worker()
+        job = {"id": next(self._ids), "kind": kind, "args": args}
+        future = Future()
+        with self._lock:
+            self._futures[job["id"]] = future
+            self._queued[job["id"]] = job
+            self._jobs.put(job)
+        return future
+
+    def call(self, kind: str, timeout: float = JOB_TIMEOUT, **args):
+        """Run a job in the worker and wait for its result."""
+        future = self.submit(kind, **args)
+        try:
+            return future.result(timeout)
+        except FuturesTimeout:
+            # Nobody waits on it any more: drop it (a late result is ignored, a queued job not replayed)
+            with self._lock:
+                for job_id, pending in list(self._futures.items()):
+                    if pending is future:
+                        del self._futures[job_id]
+                        self._queued.pop(job_id, None)
+            raise
+
+    def stats(self) -> Dict:
+        with self._lock:
+            process = self._process
+            pending, running = len(self._futures), len(self._started)
+        return {"pid": process.pid if process else None,
+                "alive": bool(process and process.is_alive()),
+                "pending": pending, "running": running,
+                "restarts": self.restarts}
+
+    def shutdown(self):
+        process = self._process
+        if process is not None and process.is_alive():
+            self._jobs.put(None)
+            process.join(10)
+            if process.is_alive():
+                process.terminate()
+
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_worker_client() -> ScrapeWorkerClient:
+    """Process-wide client (the worker is started on first use)."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = ScrapeWorkerClient()
+            atexit.register(_CLIENT.shutdown)
+        return _CLIENT
@@ -0,0 +1,109 @@
+"""
+Background Webhook Jobs.
+
+The Cars24 automation webhooks can take a minute to answer. Instead of
+blocking a Streamlit script thread on `requests.post`, pages submit a job here
+and poll its status on later reruns. Jobs run on a small shared thread pool, so
+many sessions can have automations in flight at once.
+
+Two webhook styles are supported:
+  * synchronous: 200 with the result body (current n8n flows)
+  * asynchronous: 202 with {"job_id", "status_url"}; the worker then polls
+    status_url until it reports "done" or "failed" (see src/webhook_stub.py)
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from urllib.parse import urljoin
+
+import requests
+
+MAX_WORKERS = int(os.getenv("WEBHOOK_JOB_WORKERS", 16))
+POLL_INTERVAL = 2      # Seconds between status checks against an async webhook
+JOB_RETENTION = 3600   # Finished jobs are forgotten after an hour
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="webhook-job")
+_JOBS: Dict[str, Dict] = {}
+_JOBS_LOCK = threading.Lock()
+
+
+def _set(job_id: str, **fields):
+    with _JOBS_LOCK:
+        _JOBS[job_id].update(fields, updated_at=time.time())
+
+
+def _body(response: requests.Response):
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+
+def _run(job_id: str, url: str, payload: Dict, timeout: float):
+    deadline = time.time() + timeout
+    _set(job_id, status="running")
+    try:
+        response = requests.post(url, json=payload, timeout=timeout)
+        body = _body(response)
+        if response.status_code == 202 and isinstance(body, dict) and body.get("job_id"):
+            # Remote side queued the work: follow its status endpoint until done
+            status_url = urljoin(url, body.get("status_url") or f"/jobs/{body['job_id']}")
+            _set(job_id, remote_id=body["job_id"])
+            while time.time() < deadline:
+                time.sleep(POLL_INTERVAL)
+                remaining = max(1, deadline - time.time())
+                status = requests.get(status_url, timeout=min(10, remaining)).json()
+                if status.get("status") == "done":
+                    _set(job_id, status="done", result=status.get("result"))
+                    return
+                if status.get("status") == "failed":
+                    _set(job_id, status="failed", error=status.get("error", "Remote job failed"))
+                    return
+            _set(job_id, status="failed", error=f"Timed out after {timeout}s")
+        elif response.status_code == 200:
+            _set(job_id, status="done", result=body)
+        else:
+            _set(job_id, status="failed", error=f"Webhook Failed: {response.status_code}", result=body)
+    except Exception as e:
+        _set(job_id, status="failed", error=f"Connection Error: {e}")
+
+
+def _forget_old():
+    cutoff = time.time() - JOB_RETENTION
+    with _JOBS_LOCK:
+        for job_id in [j for j, job in _JOBS.items()
+                       if job["status"] in ("done", "failed") and job["updated_at"] < cutoff]:
+            del _JOBS[job_id]
+
+
+def submit(url: str, payload: Dict, timeout: float = 120) -> str:
+    """Queue a webhook POST and return its job ID immediately."""
+    _forget_old()
+    job_id = uuid.uuid4().hex[:12]
+    with _JOBS_LOCK:
+        _JOBS[job_id] = {"id": job_id, "url": url, "status": "queued", "result": None, "error": None,
+                         "submitted_at": time.time(), "updated_at": time.time()}
+    _EXECUTOR.submit(_run, job_id, url, payload, timeout)
+    return job_id
+
+
+def get(job_id: Optional[str]) -> Optional[Dict]:
+    """Snapshot of a job: status is queued, running, done or failed."""
+    with _JOBS_LOCK:
+        job = _JOBS.get(job_id)
+        return dict(job) if job else None
+
+
+def wait(job_id: str, timeout: float) -> Optional[Dict]:
+    """Block until the job finishes (scripts and tests; pages should poll get())."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = get(job_id)
+        if job is None or job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.1)
+    return get(job_id)
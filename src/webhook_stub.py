@@ -0,0 +1,99 @@
+"""
+Local stand-in for the Cars24 n8n webhooks.
+
+Speaks the asynchronous protocol understood by src/webhook_jobs.py: each POST
+is answered at once with 202 {"job_id", "status_url"} and the job completes
+after a configurable delay. Point the Cars24 page at it with
+
+    python -m src.webhook_stub --port 8765 --delay 20
+    CARS24_WEBHOOK_BASE=http://127.0.0.1:8765 streamlit run main.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+
+class StubState:
+    def __init__(self, delay: float = 5.0, fail_otp: str = "0000"):
+        self.delay = delay
+        self.fail_otp = fail_otp
+        self.jobs: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+
+    def create(self, result: Dict = None, error: str = None) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        with self.lock:
+            self.jobs[job_id] = {"ready_at": time.time() + self.delay, "result": result, "error": error}
+        return job_id
+
+    def status(self, job_id: str) -> Dict:
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return {"status": "unknown"}
+        if time.time() < job["ready_at"]:
+            return {"status": "running"}
+        if job["error"]:
+            return {"status": "failed", "error": job["error"]}
+        return {"status": "done", "result": job["result"]}
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, body: Dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if self.path.endswith("/car-details"):
+                endpoint = f"ws://stub-browser/{uuid.uuid4().hex[:8]}"
+                job_id = state.create(result={"browserWSEndpoint": endpoint, "mobile": payload.get("mobile")})
+            elif self.path.endswith("/otp-verification"):
+                if payload.get("otp") == state.fail_otp:
+                    job_id = state.create(error="Invalid OTP")
+                else:
+                    job_id = state.create(result={"price": f"₹{random.randint(3, 12)},{random.randint(10, 99)},000"})
+            else:
+                self._reply(404, {"error": "unknown webhook"})
+                return
+            self._reply(202, {"job_id": job_id, "status_url": f"/jobs/{job_id}"})
+
+        def do_GET(self):
+            if self.path.startswith("/jobs/"):
+                self._reply(200, state.status(self.path.rsplit("/", 1)[-1]))
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_stub(port: int = 0, delay: float = 5.0) -> ThreadingHTTPServer:
+    """Start the stub on a background thread (port 0 picks a free port)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(StubState(delay)))
+    threading.Thread(target=server.serve_forever, name="webhook-stub", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Cars24 webhooks")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=20.0, help="seconds before each job completes")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(StubState(args.delay)))
+    print(f"🧪 Cars24 webhook stub on http://127.0.0.1:{args.port} (jobs finish after {args.delay}s, OTP 0000 fails)")
+    server.serve_forever()
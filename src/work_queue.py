@@ -0,0 +1,265 @@
+"""
+Work Queue for the scraping fleet.
+
+`WorkQueue` is the interface worker nodes talk to; `SQLiteWorkQueue` is the
+local implementation (one file shared by every node on the machine, or by a
+test). Another backend (Redis, SQS, Postgres) only has to implement the same
+methods.
+
+Semantics:
+  * enqueue() is idempotent on `key`: re-enqueueing a queued or leased job is a
+    no-op, re-enqueueing a finished one queues it again (next refresh).
+  * lease() hands a job to one node for `lease_seconds`; a node that dies
+    simply lets the lease expire and the job is handed out again, unless it
+    already used `max_attempts` (a job that kills its node every time): then
+    it is parked as "dead" instead.
+  * fail() retries with exponential backoff until `max_attempts`, then the job
+    is parked as "dead" with its last error.
+  * upsert_results() writes result rows keyed on their own identity, so a job
+    that runs twice (expired lease, retry) never duplicates data.
+  * Every completion/failure updates per-node throughput metrics.
+"""
+
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+QUEUE_DB = Path(__file__).parent.parent / "data" / "work_queue.db"
+LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 30  # Seconds before the first retry; doubles per attempt
+
+
+class WorkQueue(ABC):
+    """Interface for fleet queues."""
+
+    @abstractmethod
+    def enqueue(self, kind: str, payload: Dict, key: str, max_attempts: int = MAX_ATTEMPTS) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def lease(self, node: str, limit: int = 1, lease_seconds: float = LEASE_SECONDS) -> List[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def extend(self, job_id: int, node: str, lease_seconds: float = LEASE_SECONDS) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def complete(self, job_id: int, node: str, items: int = 0, busy_seconds: float = 0.0) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def fail(self, job_id: int, node: str, error: str, busy_seconds: float = 0.0) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def upsert_results(self, job_key: str, rows: Dict[str, Dict]) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def results(self, job_key: Optional[str] = None) -> List[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def node_metrics(self) -> List[Dict]:
+        raise NotImplementedError
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """WorkQueue on a local SQLite file (WAL mode, safe across processes on one host)."""
+
+    def __init__(self, path: Path = QUEUE_DB, retry_backoff: float = RETRY_BACKOFF):
+        self.path = Path(path)
+        self.retry_backoff = retry_backoff
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT UNIQUE NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                available_at REAL NOT NULL,
+                leased_by TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+            CREATE TABLE IF NOT EXISTS results (
+                result_key TEXT PRIMARY KEY,
+                job_key TEXT NOT NULL,
+                row TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_job ON results (job_key);
+            CREATE TABLE IF NOT EXISTS node_metrics (
+                node TEXT PRIMARY KEY,
+                jobs_done INTEGER NOT NULL DEFAULT 0,
+                jobs_failed INTEGER NOT NULL DEFAULT 0,
+                items INTEGER NOT NULL DEFAULT 0,
+                busy_seconds REAL NOT NULL DEFAULT 0,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );
+        """)
+
+    # ---------------- Connection ----------------
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    class _Tx:
+        def __init__(self, conn):
+            self.conn = conn
+
+        def __enter__(self):
+            # IMMEDIATE: take the write lock up front so two nodes never lease the same job
+            self.conn.execute("BEGIN IMMEDIATE")
+            return self.conn
+
+        def __exit__(self, exc_type, exc, tb):
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+    def _tx(self):
+        return self._Tx(self._conn())
+
+    def _touch_node(self, db, node: str, now: float, **deltas):
+        db.execute("INSERT OR IGNORE INTO node_metrics (node, first_seen, last_seen) VALUES (?, ?, ?)",
+                   (node, now, now))
+        db.execute("""UPDATE node_metrics SET jobs_done = jobs_done + ?, jobs_failed = jobs_failed + ?,
+                      items = items + ?, busy_seconds = busy_seconds + ?, last_seen = ? WHERE node = ?""",
+                   (deltas.get("done", 0), deltas.get("failed", 0), deltas.get("items", 0),
+                    deltas.get("busy", 0.0), now, node))
+
+    # ---------------- Jobs ----------------
+
+    def enqueue(self, kind: str, payload: Dict, key: str, max_attempts: int = MAX_ATTEMPTS) -> bool:
+        now = time.time()
+        with self._tx() as db:
+            row = db.execute("SELECT status FROM jobs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                db.execute("""INSERT INTO jobs (key, kind, payload, max_attempts, available_at, updated_at)
+                              VALUES (?, ?, ?, ?, ?, ?)""",
+                           (key, kind, json.dumps(payload), max_attempts, now, now))
+                return True
+            if row["status"] in ("done", "dead"):
+                db.execute("""UPDATE jobs SET status = 'queued', attempts = 0, payload = ?, available_at = ?,
+                              leased_by = NULL, lease_expires = NULL, last_error = NULL, updated_at = ?
+                              WHERE key = ?""", (json.dumps(payload), now, now, key))
+                return True
+            return False
+
+    def lease(self, node: str, limit: int = 1, lease_seconds: float = LEASE_SECONDS) -> List[Dict]:
+        now = time.time()
+        with self._tx() as db:
+            # Expired leases that used their last attempt: the node died on it every time
+            db.execute("""UPDATE jobs SET status = 'dead', leased_by = NULL, lease_expires = NULL,
+                          last_error = COALESCE(last_error, 'lease expired on every attempt'), updated_at = ?
+                          WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts""",
+                       (now, now))
+            rows = db.execute("""SELECT * FROM jobs
+                                 WHERE (status = 'queued' AND available_at <= ?)
+                                    OR (status = 'leased' AND lease_expires < ?)
+                                 ORDER BY available_at, id LIMIT ?""", (now, now, limit)).fetchall()
+            jobs = []
+            for row in rows:
+                db.execute("""UPDATE jobs SET status = 'leased', leased_by = ?, lease_expires = ?,
+                              attempts = attempts + 1, updated_at = ? WHERE id = ?""",
+                           (node, now + lease_seconds, now, row["id"]))
+                jobs.append({"id": row["id"], "key": row["key"], "kind": row["kind"],
+                             "payload": json.loads(row["payload"]), "attempt": row["attempts"] + 1})
+            if jobs:
+                self._touch_node(db, node, now)
+            return jobs
+
+    def extend(self, job_id: int, node: str, lease_seconds: float = LEASE_SECONDS) -> bool:
+        with self._tx() as db:
+            cur = db.execute("""UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'leased'
+                                AND leased_by = ?""", (time.time() + lease_seconds, job_id, node))
+            return cur.rowcount == 1
+
+    def complete(self, job_id: int, node: str, items: int = 0, busy_seconds: float = 0.0) -> bool:
+        """Mark done. False if the lease had already moved to another node (results still count)."""
+        now = time.time()
+        with self._tx() as db:
+            cur = db.execute("""UPDATE jobs SET status = 'done', lease_expires = NULL, updated_at = ?
+                                WHERE id = ? AND status = 'leased' AND leased_by = ?""", (now, job_id, node))
+            self._touch_node(db, node, now, done=1, items=items, busy=busy_seconds)
+            return cur.rowcount == 1
+
+    def fail(self, job_id: int, node: str, error: str, busy_seconds: float = 0.0) -> str:
+        """Record a failure; returns the job's new status ('queued' for retry, or 'dead')."""
+        now = time.time()
+        with self._tx() as db:
+            row = db.execute("SELECT attempts, max_attempts, leased_by FROM jobs WHERE id = ?",
+                             (job_id,)).fetchone()
+            self._touch_node(db, node, now, failed=1, busy=busy_seconds)
+            if row is None or row["leased_by"] != node:
+                return "stale"
+            if row["attempts"] >= row["max_attempts"]:
+                status, available_at = "dead", now
+            else:
+                status, available_at = "queued", now + self.retry_backoff * 2 ** (row["attempts"] - 1)
+            db.execute("""UPDATE jobs SET status = ?, available_at = ?, leased_by = NULL, lease_expires = NULL,
+                          last_error = ?, updated_at = ? WHERE id = ?""",
+                       (status, available_at, str(error)[:500], now, job_id))
+            return status
+
+    # ---------------- Results ----------------
+
+    def upsert_results(self, job_key: str, rows: Dict[str, Dict]) -> int:
+        now = time.time()
+        with self._tx() as db:
+            db.executemany("""INSERT INTO results (result_key, job_key, row, updated_at) VALUES (?, ?, ?, ?)
+                              ON CONFLICT(result_key) DO UPDATE SET
+                                  job_key = excluded.job_key, row = excluded.row, updated_at = excluded.updated_at""",
+                           [(key, job_key, json.dumps(row, default=str), now) for key, row in rows.items()])
+        return len(rows)
+
+    def results(self, job_key: Optional[str] = None) -> List[Dict]:
+        if job_key is None:
+            rows = self._conn().execute("SELECT row FROM results ORDER BY result_key").fetchall()
+        else:
+            rows = self._conn().execute("SELECT row FROM results WHERE job_key = ? ORDER BY result_key",
+                                        (job_key,)).fetchall()
+        return [json.loads(r["row"]) for r in rows]
+
+    # ---------------- Metrics ----------------
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {"queued": 0, "leased": 0, "done": 0, "dead": 0}
+        counts.update({r["status"]: r["n"] for r in rows})
+        return counts
+
+    def node_metrics(self) -> List[Dict]:
+        metrics = []
+        for r in self._conn().execute("SELECT * FROM node_metrics ORDER BY node").fetchall():
+            busy = r["busy_seconds"] or 0.0
+            metrics.append({
+                "node": r["node"], "jobs_done": r["jobs_done"], "jobs_failed": r["jobs_failed"],
+                "items": r["items"], "busy_seconds": round(busy, 1),
+                "items_per_sec": round(r["items"] / busy, 2) if busy else 0.0,
+                "jobs_per_min": round(r["jobs_done"] * 60 / busy, 2) if busy else 0.0,
+                "last_seen": r["last_seen"],
+            })
+        return metrics
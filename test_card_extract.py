@@ -0,0 +1,58 @@
+from src.card_extract import BACKENDS, extract_cards
+from src.harvester import parse_carwale_cards
+
+PAGE = """
+<html><body>
+<nav><a href="/news/">News</a><a href="/used/">All used cars</a></nav>
+<div class="card">
+  <a href="/used/hyundai-creta-2020-1/"><img src="c.jpg"></a>
+  <a href="/used/hyundai-creta-2020-1/">2020 Hyundai Creta SX</a>
+  <span>₹ 12.5 Lakh</span><span>42,000 km</span>
+</div>
+<div class="card"><div>
+  <a href="/used/hyundai-i20-2019-2/">2019 Hyundai i20 Asta</a></div>
+  <span>₹ 7.1 Lakh</span>
+</div>
+<a href="/used/orphan/">2018 Hyundai Verna</a>
+</body></html>
+"""
+
+
+def test_backends_agree_and_share_card_text():
+    print(f"🚀 Card extraction backends: {BACKENDS}")
+    results = {backend: list(extract_cards(PAGE, "/used/", backend=backend)) for backend in BACKENDS}
+    cards = results[BACKENDS[0]]
+    assert all(r == cards for r in results.values())
+    assert [c.href for c in cards] == ["/used/", "/used/hyundai-creta-2020-1/", "/used/hyundai-creta-2020-1/",
+                                      "/used/hyundai-i20-2019-2/", "/used/orphan/"]
+    assert cards[0].card_text == ""  # Not inside a <div>
+    assert cards[1].card_text == cards[2].card_text and "42,000 km" in cards[1].card_text
+    assert cards[3].card_text == "2019 Hyundai i20 Asta"  # Nearest <div>, like find_parent('div')
+    assert list(extract_cards("", "/used/")) == []
+    print("✅ Same cards on every backend")
+
+
+def test_script_and_style_text_is_not_card_text():
+    page = """<div class="card"><script>var x = "₹ 99 Lakh";</script><style>.p{content:"₹ 1 Lakh"}</style>
+              <a href="/used/kia-seltos-2021-3/">2021 Kia Seltos HTX<script>track("₹ 50 Lakh")</script></a>
+              <span>₹ 13.2 Lakh</span></div>"""
+    results = {backend: list(extract_cards(page, "/used/", backend=backend)) for backend in BACKENDS}
+    cards = results[BACKENDS[0]]
+    assert all(r == cards for r in results.values()), results
+    assert cards[0].link_text == "2021 Kia Seltos HTX"
+    assert "99 Lakh" not in cards[0].card_text and "₹ 13.2 Lakh" in cards[0].card_text
+    print("✅ Inline scripts ignored by every backend")
+
+
+def test_harvester_parses_cards_once():
+    page = """<div><span>₹ 12.5 Lakh</span><a href="/used/hyundai-creta-2020-1/">2020 Hyundai Creta SX</a>
+              <span>42,000 km</span></div>"""
+    rows = parse_carwale_cards(page, "mumbai", "hyundai")
+    assert [(r["model"], r["year"], r["price"], r["km"]) for r in rows] == [("creta sx", 2020, 1250000, 42000)]
+    print("✅ Harvester rows from single-pass extraction")
+
+
+if __name__ == "__main__":
+    test_backends_agree_and_share_card_text()
+    test_script_and_style_text_is_not_card_text()
+    test_harvester_parses_cards_once()
@@ -0,0 +1,75 @@
+import asyncio
+
+from src.cars24_capture import NetworkCapture, find_price
+
+
+class FakeRequest:
+    resource_type = "fetch"
+
+
+class FakeResponse:
+    def __init__(self, url, data):
+        self.url = url
+        self.request = FakeRequest()
+        self.headers = {"content-type": "application/json"}
+        self._data = data
+
+    async def json(self):
+        return self._data
+
+
+class FakePage:
+    def __init__(self):
+        self.listeners = {}
+
+    def on(self, event, fn):
+        self.listeners[event] = fn
+
+    def remove_listener(self, event, fn):
+        del self.listeners[event]
+
+
+def test_find_price_prefers_top_level_quote():
+    payload = {"data": {"appointmentPrice": "5,45,000", "variants": [{"price": 712000}]}, "count": 42}
+    assert find_price(payload) == 545000
+    assert find_price({"items": [{"id": 123456}]}) is None
+
+
+def test_find_price_ignores_ids_timestamps_and_implausible_amounts():
+    # Ids and timestamps only share part of their name with a price key
+    assert find_price({"data": {"quoteId": 98765432}}) is None
+    assert find_price({"valuationId": 55555555}) is None
+    assert find_price({"priceUpdatedAt": 1760000000000, "quote_price": 480000}) == 480000
+    # Above ₹2 Cr is not a used-car quote
+    assert find_price({"price": 98765432}) is None
+    assert find_price({"offer_price": "6,10,000"}) == 610000
+
+
+def test_capture_ignores_catalogue_until_armed():
+    print("🚀 Capturing the Cars24 quote from API responses...")
+
+    async def scenario():
+        page = FakePage()
+        capture = NetworkCapture(page)
+        on_response = page.listeners["response"]
+        # Model list carries ex-showroom prices: must not be taken as the quote
+        on_response(FakeResponse("https://api.cars24.com/models?brand=21", {"models": [{"name": "Swift", "price": 650000}]}))
+        on_response(FakeResponse("https://www.google-analytics.com/collect", {"price": 999999}))
+        await asyncio.sleep(0)
+        capture.arm()
+        on_response(FakeResponse("https://api.cars24.com/valuation", {"quote": {"price": 512000}}))
+        quote = await capture.wait_price(1)
+        capture.detach()
+        return capture, page, quote
+
+    capture, page, quote = asyncio.run(scenario())
+    assert quote["price"] == 512000
+    assert len(capture.payloads) == 2
+    assert "response" not in page.listeners
+    print(f"✅ Quote ₹{quote['price']:,} from {quote['url']}")
+
+
+if __name__ == "__main__":
+    test_find_price_prefers_top_level_quote()
+    test_find_price_ignores_ids_timestamps_and_implausible_amounts()
+    test_capture_ignores_catalogue_until_armed()
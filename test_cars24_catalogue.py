@@ -0,0 +1,72 @@
+import tempfile
+from pathlib import Path
+
+from src.cars24_catalogue import Cars24Catalogue, CatalogueError
+
+
+def test_catalogue_maps_labels_and_fails_fast():
+    print("🚀 Validating Cars24 inputs against a learned catalogue...")
+    catalogue = Cars24Catalogue(Path(tempfile.mkdtemp()) / "catalogue.json")
+
+    # Nothing learned yet: every step is unknown, nothing is rejected
+    labels = catalogue.resolve("Maruti Suzuki", 2020, "swift", "Petrol", "Manual", "VXI")
+    assert all(label is None for label in labels.values())
+
+    catalogue.record([], ["Maruti Suzuki", "Hyundai"], complete=True)
+    catalogue.record(["Maruti Suzuki"], ["2020"])
+    catalogue.record(["Maruti Suzuki", "2020"], ["Swift", "Swift Dzire", "Baleno"], complete=True)
+    catalogue.record(["Maruti Suzuki", "2020", "Swift", "Petrol", "Manual"], ["VXI", "ZXI Plus"], complete=True)
+
+    labels = catalogue.resolve("maruti suzuki", 2020, "swift", "Petrol", "Manual", "vxi")
+    assert labels["brand"] == "Maruti Suzuki"
+    assert labels["model"] == "Swift"
+    assert labels["fuel"] is None
+    assert labels["variant"] == "VXI"
+
+    # Fuzzy variant matching never drops or adds a gearbox
+    catalogue.record(["Maruti Suzuki", "2020", "Swift", "Petrol", "Automatic"], ["VXI", "VXI AMT"], complete=True)
+    assert catalogue.resolve("Maruti Suzuki", 2020, "Swift", "Petrol", "Automatic", "vxi amt")["variant"] == "VXI AMT"
+    assert catalogue.resolve("Maruti Suzuki", 2020, "Swift", "Petrol", "Automatic", "vxi (amt)")["variant"] == "VXI AMT"
+    try:
+        catalogue.resolve("Maruti Suzuki", 2020, "Swift", "Petrol", "Manual", "vxi amt")
+        assert False, "An AMT variant must not resolve to the manual VXI"
+    except CatalogueError as e:
+        print(f"   ⛔ {e}")
+
+    for bad in (("Tesla", 2020, "Model 3"), ("Maruti Suzuki", 2020, "Creta"), ("Maruti Suzuki", 1985, "Swift")):
+        try:
+            catalogue.resolve(bad[0], bad[1], bad[2], "Petrol", "Manual", "VXI")
+            assert False, f"{bad} should be rejected"
+        except CatalogueError as e:
+            print(f"   ⛔ {e}")
+
+    # Survives a restart
+    reloaded = Cars24Catalogue(catalogue.path)
+    assert reloaded.options(["Maruti Suzuki", "2020"]) == ["Swift", "Swift Dzire", "Baleno"]
+    print(f"✅ Catalogue: {reloaded.summary()}")
+
+
+def test_location_steps_index_rto_and_km():
+    print("🚀 Indexing Cars24 RTO and km lists...")
+    catalogue = Cars24Catalogue(Path(tempfile.mkdtemp()) / "catalogue.json")
+    values = {"state": "Maharashtra", "rto": "MH-01", "city": "Pune", "km": "10,000 - 20,000 km"}
+
+    # RTO lists hang off the state, km lists off nothing
+    assert catalogue.step_path({}, values, "rto") == ["@rto", "Maharashtra"]
+    assert catalogue.step_path({}, values, "km") == ["@km"]
+
+    catalogue.record(["@rto", "Maharashtra"], ["MH-01 Mumbai Central", "MH-02 Mumbai West"], complete=True)
+    catalogue.record(["@km"], ["0 - 10,000 km", "10,000 - 20,000 km"], complete=True)
+    assert catalogue.match(["@rto", "Maharashtra"], "MH-01", fuzzy=True) == "MH-01 Mumbai Central"
+    assert catalogue.match(["@km"], values["km"]) == "10,000 - 20,000 km"
+    try:
+        catalogue.match(["@km"], "More than 1,00,000 km")
+        assert False, "A complete km list must rule out a missing range"
+    except CatalogueError as e:
+        print(f"   ⛔ {e}")
+    print("✅ RTO and km options indexed")
+
+
+if __name__ == "__main__":
+    test_catalogue_maps_labels_and_fails_fast()
+    test_location_steps_index_rto_and_km()
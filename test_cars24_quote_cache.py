@@ -0,0 +1,27 @@
+import tempfile
+import time
+from pathlib import Path
+
+from src.cars24_quote_cache import QuoteCache, quote_key
+from src.engine_cars24 import get_km_range
+
+
+def test_near_repeat_requests_share_a_quote():
+    print("🚀 Cars24 quote cache on bucketed inputs...")
+    cache = QuoteCache(Path(tempfile.mkdtemp()) / "quotes.json", ttl=60)
+    base = dict(brand="Maruti Suzuki", year=2020, model="Swift", fuel="Petrol", transmission="Manual",
+                variant="VXI", state="Maharashtra", city="Mumbai")
+
+    cache.put(quote_key(km_range=get_km_range(52000), **base), 512000)
+    # 58,500 km falls in the same Cars24 bucket as 52,000 km
+    hit = QuoteCache(cache.path, ttl=60).get(quote_key(km_range=get_km_range(58500), **dict(base, model="swift")))
+    assert hit and hit["price"] == 512000
+    assert cache.get(quote_key(km_range=get_km_range(61000), **base)) is None
+
+    cache.entries[quote_key(km_range=get_km_range(52000), **base)]["quoted_at"] = time.time() - 120
+    assert cache.get(quote_key(km_range=get_km_range(52000), **base)) is None
+    print("✅ Near-repeat served from cache, expired quote ignored")
+
+
+if __name__ == "__main__":
+    test_near_repeat_requests_share_a_quote()
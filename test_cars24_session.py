@@ -0,0 +1,27 @@
+import json
+import tempfile
+from pathlib import Path
+
+import src.engine_cars24 as cars24
+
+
+def test_load_session_reads_legacy_cookie_list():
+    print("🚀 Loading legacy and storage-state Cars24 session files...")
+    original = cars24.SESSION_FILE
+    session_file = Path(tempfile.mkdtemp()) / ".cars24_session.json"
+    cars24.SESSION_FILE = session_file
+    try:
+        cookies = [{"name": "auth", "value": "x", "domain": ".cars24.com", "path": "/"}]
+        session_file.write_text(json.dumps(cookies))
+        assert cars24.load_session() == {"cookies": cookies, "origins": []}
+
+        state = {"cookies": cookies, "origins": [{"origin": "https://www.cars24.com", "localStorage": []}]}
+        cars24.save_session(state)
+        assert cars24.load_session() == state
+    finally:
+        cars24.SESSION_FILE = original
+    print("✅ Both formats load as a storage state")
+
+
+if __name__ == "__main__":
+    test_load_session_reads_legacy_cookie_list()
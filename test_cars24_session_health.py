@@ -0,0 +1,37 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from src.cars24_session_health import SessionHealth
+
+
+def test_session_health_tracks_expiry_probe_and_relogin():
+    print("🚀 Cars24 session health...")
+    folder = Path(tempfile.mkdtemp())
+    session_file = folder / ".cars24_session.json"
+    health = SessionHealth(session_file, folder / ".cars24_health.json")
+    assert health.status()["healthy"] is False  # No session saved yet
+
+    session_file.write_text("{}")
+    assert health.status()["healthy"] is None and health.needs_probe()
+
+    expired = [{"name": "auth_token", "domain": ".cars24.com", "expires": time.time() - 60},
+               {"name": "_ga", "domain": ".cars24.com", "expires": time.time() + 86400}]
+    assert health.status(expired)["healthy"] is False
+
+    health.record_probe(True, "sell flow reachable")
+    assert health.status()["healthy"] is True and not health.needs_probe()
+
+    health.record_login_required()
+    status = health.status()
+    assert status["healthy"] is False and "setup_cars24_session.py" in status["reason"]
+
+    # Re-running setup writes a new session file: the old verdict no longer applies
+    os.utime(session_file, (time.time() + 5, time.time() + 5))
+    assert health.status()["healthy"] is None
+    print("✅ Expired, probed, login-required and re-login states all reported")
+
+
+if __name__ == "__main__":
+    test_session_health_tracks_expiry_probe_and_relogin()
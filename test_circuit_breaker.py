@@ -0,0 +1,50 @@
+import time
+
+import requests
+
+from src.circuit_breaker import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen,
+                                 get_breaker, guarded_get, host_key)
+
+
+def test_breaker_opens_then_recovers_through_half_open_probe():
+    print("🚀 Circuit breaker lifecycle...")
+    breaker = CircuitBreaker("carwale.com", failure_threshold=2, cooldown=0.2)
+    breaker.record_failure("timeout")
+    assert breaker.allow() and breaker.state == CLOSED
+    breaker.record_failure("timeout")
+    assert breaker.state == OPEN and not breaker.allow() and breaker.is_open()
+
+    time.sleep(0.25)
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # Only one probe at a time
+    breaker.record_failure("still down")
+    assert breaker.state == OPEN and breaker.cooldown == 0.4  # Backed off
+
+    time.sleep(0.45)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.cooldown == 0.2
+    print(f"✅ {breaker.snapshot()}")
+
+
+def test_guarded_get_fails_fast_while_host_is_down():
+    assert host_key("https://www.googleapis.com/customsearch/v1") == "googleapis.com"
+    assert host_key("https://example.com/") is None
+
+    breaker = get_breaker("spinny.com")
+    breaker.reset()
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure("connection refused")
+    started = time.time()
+    try:
+        guarded_get("https://www.spinny.com/buy-used-cars/", timeout=5)
+        assert False, "Open circuit should reject the call"
+    except requests.ConnectionError as e:
+        assert isinstance(e, CircuitOpen)
+    assert time.time() - started < 0.1
+    breaker.reset()
+
+
+if __name__ == "__main__":
+    test_breaker_opens_then_recovers_through_half_open_probe()
+    test_guarded_get_fails_fast_while_host_is_down()
@@ -0,0 +1,53 @@
+from src.extractors import Price, extract, first_price, to_rupees
+from src.harvester import clean_price
+from src.ingest_data import clean_currency, clean_quikr_price
+from src.listing_source import parse_listing_text
+
+
+def test_prices_in_rupees_across_formats():
+    print("🚀 Extractors: Lakh / Crore / Indian digit grouping...")
+    cases = {
+        "₹ 6.25 Lakh": 625000,
+        "Rs. 5,90,000": 590000,
+        "Rs850000": 850000,
+        "INR 12,50,000": 1250000,
+        "₹1.2 Cr": 12000000,
+        "ex-showroom 12.5 Lakh*": 1250000,
+        "starts at 1.05 Crore": 10500000,
+        "₹ 6.25L onwards": 625000,
+        "₹ 8,50,000.50": 850000,
+    }
+    for text, rupees in cases.items():
+        assert first_price(text) == rupees, (text, extract(text))
+    print("✅ Every format reads as rupees")
+
+
+def test_single_pass_keeps_km_and_year_apart_from_price():
+    print("🚀 Extractors: one scan, typed fields...")
+    found = extract("2019 Maruti Swift ZXI\n1,20,000 km · Petrol · 1.2L engine\n₹ 5.9 Lakh")
+    assert found.prices == [Price(590000, "lakh", True)]
+    assert found.years == [2019] and found.kms == [120000]
+    # "96,000 km" and engine sizes are never prices
+    assert extract("Creta 2017 96,000 kms 1.5L Diesel").prices == []
+    # EMI before the sticker price: prefer the Lakh figure
+    assert first_price("EMI ₹ 12,345/month · ₹ 6.25 Lakh", prefer_unit=True) == 625000
+    print("✅ km, year and price separated")
+
+
+def test_callers_share_the_same_rules():
+    print("🚀 Extractors: engines agree on the same text...")
+    listing = parse_listing_text("2020 Hyundai Creta SX\n35,000 km\n₹ 1.05 Cr", "CarWale")
+    assert listing["price"] == 105.0 and listing["year"] == 2020 and listing["km"] == 35000
+    assert parse_listing_text("2020 Swift\nEMI ₹ 9,999", "Spinny") is None
+    assert clean_price("2020 Hyundai Creta ₹ 10.5 Lakh") == 1050000  # Year no longer read as the price
+    assert clean_currency("5.5 Lakh") == 550000 and clean_currency("1.2 Crore") == 12000000
+    assert clean_currency(450000) == 450000 and clean_currency("8,50,000") == 850000
+    assert clean_quikr_price("Ask For Price") is None and clean_quikr_price("3,25,000") == 325000
+    assert to_rupees(float("nan")) is None
+    print("✅ Listing layer, harvester and ingest use one set of rules")
+
+
+if __name__ == "__main__":
+    test_prices_in_rupees_across_formats()
+    test_single_pass_keeps_km_and_year_apart_from_price()
+    test_callers_share_the_same_rules()
@@ -0,0 +1,142 @@
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from src.harvest_index import HarvestIndex
+from src.harvest_output import PartitionedOutput, read_partitions
+from src.harvester import harvest, parse_carwale_cards, write_database
+
+
+def test_async_harvest_is_polite_per_host_and_bounded():
+    print("🚀 Async harvester: per-host rate, bounded in-flight...")
+    calls = {}
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fake_fetch(source, city, make):
+        with lock:
+            calls.setdefault(source, []).append(time.monotonic())
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.15)
+        with lock:
+            active[0] -= 1
+        if city == "pune" and source == "Spinny":
+            raise ConnectionError("blocked")
+        return [{"make": make, "city": city, "source": source}] * 2
+
+    rate = 20.0  # One request per host every ~50 ms
+    rows, stats = harvest(cities=["mumbai", "pune"], makes=["kia", "mg", "tata"], rate=rate,
+                          max_in_flight=3, fetch=fake_fetch)
+
+    print(f"   📈 {stats}")
+    assert stats["pages"] == 9 and stats["failed"] == 3 and len(rows) == 18
+    assert stats["hosts"]["www.spinny.com"]["failed"] == 3
+    assert peak[0] <= 3
+    for source, times in calls.items():
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        assert min(gaps) >= 0.8 / rate - 0.01, (source, gaps)
+    # 12 requests x 150 ms run sequentially would take 1.8 s
+    assert stats["elapsed"] < 1.2 and stats["pages_per_sec"] > 0
+    print("✅ Hosts crawled in parallel within their rate limits")
+
+
+def test_repeat_crawls_only_write_new_or_changed_listings():
+    print("🚀 Harvest index: repeated crawl upserts...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cars.csv")
+        # A database written before listing IDs existed
+        pd.DataFrame([{"make": "kia", "model": "seltos", "year": 2019, "km": 50000, "city": "pune",
+                       "price": 900000, "source": "Cardekho"}]).to_csv(path, index=False)
+        index = HarvestIndex(os.path.join(tmp, "index.db"))
+
+        def crawl(swift_price):
+            return [
+                {"make": "maruti-suzuki", "model": "swift vxi", "year": 2020, "km": 30000, "city": "mumbai",
+                 "price": swift_price, "source": "CarWale", "url": "/used/swift-1/"},
+                {"make": "hyundai", "model": "creta sx", "year": 2021, "km": 20000, "city": "mumbai",
+                 "price": 1400000, "source": "Spinny", "url": "/buy-used-cars/creta-2/"},
+            ]
+
+        assert write_database(crawl(625000), path, index) == (2, 0)
+        assert write_database(crawl(625000), path, index) == (0, 0)
+        assert len(pd.read_csv(path)) == 3
+        assert index.last_seen("CarWale|/used/swift-1/") is not None
+
+        assert write_database(crawl(599000), path, index) == (0, 1)
+        df = pd.read_csv(path)
+        print(df[["source", "model", "price", "listing_id"]])
+        assert len(df) == 3 and df["listing_id"].is_unique
+        assert df[df["source"] == "CarWale"]["price"].tolist() == [599000]
+        assert index.summary()["n"] == 2
+
+        # A failed CSV write leaves the index alone, so the next run writes the rows
+        blocked = os.path.join(tmp, "missing-dir", "cars.csv")
+        rows = [dict(crawl(599000)[0], url="/used/swift-9/")]
+        try:
+            write_database(rows, blocked, index)
+            assert False, "Writing into a missing directory must fail"
+        except OSError:
+            pass
+        assert index.last_seen("CarWale|/used/swift-9/") is None
+        assert write_database(rows, path, index) == (1, 0)
+    print("✅ Unchanged listings are not rewritten")
+
+
+def test_harvested_links_are_absolute():
+    page = """<div><a href="/used/hyundai-creta-2020-1/">2020 Hyundai Creta SX</a><span>₹ 12.5 Lakh</span></div>"""
+    rows = parse_carwale_cards(page, "mumbai", "hyundai")
+    # Same URL, so the same ID, as the listing layer gives this car
+    assert rows[0]["url"] == "https://www.carwale.com/used/hyundai-creta-2020-1/"
+
+
+def test_interrupted_crawl_resumes_from_checkpoint():
+    print("🚀 Partitioned output: crash, then resume...")
+    with tempfile.TemporaryDirectory() as tmp:
+        fetched = []
+
+        def fetch(blocked):
+            def fake_fetch(source, city, make):
+                fetched.append((source, city, make))
+                if (city, make) in blocked:
+                    raise ConnectionError("blocked")
+                return [{"make": make, "model": "x", "year": 2020, "km": 1000, "city": city, "price": 500000,
+                         "source": source, "url": f"/{source}/{city}/{make}/"}]
+            return fake_fetch
+
+        kwargs = dict(cities=["mumbai", "pune"], makes=["kia", "mg"], sources=["CarWale"], rate=100.0)
+        first = PartitionedOutput(tmp, run_date="2024-06-10")
+        _, stats = harvest(fetch=fetch({("pune", "kia"), ("pune", "mg")}), output=first, **kwargs)
+        assert stats["pages"] == 2 and stats["failed"] == 2
+        assert len(first.read()) == 2
+
+        fetched.clear()
+        resumed = PartitionedOutput(tmp, run_date="2024-06-10")
+        rows, stats = harvest(fetch=fetch(set()), output=resumed, **kwargs)
+        assert sorted(fetched) == [("CarWale", "pune", "kia"), ("CarWale", "pune", "mg")]
+        assert stats["skipped"] == 2 and len(rows) == 2
+        assert resumed.pages_done() == 4 and len(resumed.read()) == 4
+
+        # Readers only load the partitions they ask for
+        pune = read_partitions(tmp, dates=["2024-06-10"], cities=["pune"])
+        assert sorted(pune["city"].unique()) == ["pune"] and len(pune) == 2
+        assert read_partitions(tmp, dates=["2024-06-11"]).empty
+        print(f"   📁 {sorted(p.name for p in first.run_dir.glob('city=*/*'))}")
+
+        # The checkpoint follows the run, not the calendar: a rerun after midnight continues it
+        after_midnight = PartitionedOutput(tmp)
+        assert after_midnight.run_id == first.run_id and after_midnight.pages_done() == 4
+        after_midnight.finish()
+        next_run = PartitionedOutput(tmp, run_date="2024-06-10")
+        assert next_run.run_id != first.run_id and next_run.pages_done() == 0
+    print("✅ Completed pages are not fetched again")
+
+
+if __name__ == "__main__":
+    test_async_harvest_is_polite_per_host_and_bounded()
+    test_repeat_crawls_only_write_new_or_changed_listings()
+    test_harvested_links_are_absolute()
+    test_interrupted_crawl_resumes_from_checkpoint()
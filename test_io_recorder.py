@@ -0,0 +1,91 @@
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import requests
+
+from concurrent.futures import ThreadPoolExecutor
+
+from src.io_recorder import IOArchive, bind, io_session
+
+
+class ListingHandler(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        ListingHandler.hits += 1
+        body = f"<div>2020 Hyundai Creta SX ₹ 11.5 Lakh (hit {ListingHandler.hits})</div>".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_record_then_replay_offline():
+    print("🚀 Record/Replay round trip against a local server...")
+    server = HTTPServer(("127.0.0.1", 0), ListingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/used/hyundai-creta-cars-in-hyderabad/"
+    archive_path = os.path.join(tempfile.mkdtemp(), "creta.json.gz")
+
+    with io_session("record", archive_path, meta={"make": "Hyundai", "model": "Creta"}):
+        first = requests.get(url, params={"key": "secret", "pn": 1}, timeout=5).text
+        second = requests.get(url, params={"pn": 1, "key": "other"}, timeout=5).text
+    server.shutdown()
+    server.server_close()
+
+    archive = IOArchive.load(archive_path)
+    print(f"   📼 Archive: {archive.summary()}")
+    assert archive.meta["model"] == "Creta"
+    assert all("secret" not in key for key in archive.entries)
+
+    # Server is gone: replay must serve both responses, in order, without the network
+    with io_session("replay", archive_path) as session:
+        assert requests.get(url, params={"key": "secret", "pn": 1}, timeout=5).text == first
+        assert requests.get(url, params={"pn": 1}, timeout=5).text == second
+        try:
+            requests.get(url + "?pn=2", timeout=5)
+            assert False, "Unrecorded request should fail in replay"
+        except requests.ConnectionError:
+            pass
+    assert len(session.misses) == 1
+    print("✅ Replay matched the recording")
+
+
+def test_session_records_only_its_own_threads():
+    print("🚀 Record/Replay isolation from other sessions and background threads...")
+    server = HTTPServer(("127.0.0.1", 0), ListingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    archive_path = os.path.join(tempfile.mkdtemp(), "mine.json.gz")
+    other = {}
+
+    def other_session():
+        # A second dashboard session: runs unrecorded instead of failing
+        with io_session("record", os.path.join(tempfile.mkdtemp(), "other.json.gz")) as session:
+            other["session"] = session
+            other["status"] = requests.get(base + "/other", timeout=5).status_code
+
+    with io_session("record", archive_path):
+        requests.get(base + "/mine", timeout=5)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(bind(requests.get), base + "/helper", timeout=5).result()
+        t = threading.Thread(target=other_session)
+        t.start()
+        t.join()
+    server.shutdown()
+    server.server_close()
+
+    keys = " ".join(IOArchive.load(archive_path).entries)
+    assert other["session"] is None and other["status"] == 200
+    assert "/mine" in keys and "/helper" in keys and "/other" not in keys
+    print("✅ Only the session's own traffic was recorded")
+
+
+if __name__ == "__main__":
+    test_record_then_replay_offline()
+    test_session_records_only_its_own_threads()
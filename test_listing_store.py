@@ -0,0 +1,42 @@
+import tempfile
+import time
+from pathlib import Path
+
+from src.listing_store import ListingStore, listing_id
+
+
+def test_store_upserts_and_serves_fresh_listings():
+    print("🚀 Listing store...")
+    store = ListingStore(Path(tempfile.mkdtemp()) / "listings.db")
+    swift = [{"source": "CarWale", "price": 6.25, "year": 2020, "km": 35000,
+              "title": "2020 Maruti Suzuki Swift VXI", "url": "https://www.carwale.com/used/swift-1/"}]
+    store.add(swift, "Maruti", "Swift", "Mumbai", scraped_at=time.time() - 7200)
+    store.add([dict(swift[0], price=6.1)], "maruti-suzuki", "swift", "mumbai")  # Re-scrape: price dropped
+
+    # Harvester rows carry rupees and their own make/model/city
+    store.add_harvested([{"make": "maruti-suzuki", "model": "swift dzire", "year": 2019, "km": 50000,
+                          "city": "mumbai", "price": 540000, "source": "CarWale", "variant": "VXI"},
+                         {"make": "maruti-suzuki", "model": "swift", "year": 2019, "km": 42000,
+                          "city": "pune", "price": 520000, "source": "CarWale", "variant": "VXI"}])
+    rows = store.query("Maruti", "Swift", "Mumbai")
+    assert [r["price"] for r in rows] == [6.1]  # Swift Dzire is a different car
+    assert store.query("Maruti", "Swift Dzire", "Mumbai")[0]["model"] == "swift-dzire"
+    assert store.query("Maruti", "Swift", "Delhi") == []
+
+    pages = store.fresh_pages("Maruti", "Swift", "Mumbai", ["CarWale", "Spinny"], max_age=3600)
+    assert list(pages) == ["CarWale"] and [l["price"] for l in pages["CarWale"]["listings"]] == [6.1]
+    assert store.fresh_pages("Maruti", "Swift", "Mumbai", ["CarWale"], max_age=0) == {}
+    # Harvested rows alone never count as a fresh model page
+    assert store.query("Maruti", "Swift", "Pune") and store.fresh_pages("Maruti", "Swift", "Pune", ["CarWale"]) == {}
+
+    # Each page is served for its own window: a pre-warmed page outlives a live scrape
+    assert list(store.fresh_pages("Maruti", "Swift", "Mumbai", ["CarWale"])) == ["CarWale"]
+    assert store.fresh_pages("Maruti", "Swift", "Mumbai", ["CarWale"], fresh_at=time.time() + 8 * 3600) == {}
+    store.add(swift, "Maruti", "Swift", "Mumbai", fresh_for=24 * 3600)
+    assert store.fresh_pages("Maruti", "Swift", "Mumbai", ["CarWale"], fresh_at=time.time() + 8 * 3600)
+    assert listing_id({"source": "CarWale", "url": "/x"}) == "CarWale|/x"
+    print("✅ Upserted by listing ID, exact models, served per fresh page")
+
+
+if __name__ == "__main__":
+    test_store_upserts_and_serves_fresh_listings()
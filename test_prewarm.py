@@ -0,0 +1,58 @@
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import src.engine_logic as engine_logic
+import src.listing_store as listing_store
+from src.prewarm import PREWARM_FRESHNESS, PrewarmScheduler, RequestHistory, in_window
+
+
+def test_scheduler_plans_hot_misses_within_quota():
+    print("🚀 Pre-warm planning from request history...")
+    tmp = Path(tempfile.mkdtemp())
+    history = RequestHistory(tmp / "prewarm.db")
+    for _ in range(5):
+        history.record("Hyundai", "Creta", 2020, "SX", "Petrol", "Manual", 42000, "Mumbai")
+    for _ in range(3):
+        history.record("Maruti", "Swift", 2019, "VXI", "Petrol", "Manual", 35000, "Pune")
+    history.record("Tata", "Nexon", 2021, "XZ", "Diesel", "Manual", 20000, "Delhi")
+    history.record("Tata", "Nexon", 2021, "XZ", "Diesel", "Manual", 20000, "Delhi", requested_at=time.time() - 30 * 86400)
+
+    listing_store._STORE = listing_store.ListingStore(tmp / "listings.db")
+    original_cache_file = engine_logic.BASE_PRICE_CACHE_FILE
+    engine_logic.BASE_PRICE_CACHE_FILE, engine_logic._BASE_CACHE = tmp / "base_prices.json", None
+    try:
+        # Creta was pre-warmed last pass and its launch price is cached: nothing to do for it
+        for source in ("CarWale", "Spinny"):
+            listing_store._STORE.add([{"source": source, "price": 12.5, "year": 2020, "km": 40000,
+                                       "url": f"https://{source}/creta"}], "Hyundai", "Creta", "Mumbai",
+                                     fresh_for=PREWARM_FRESHNESS)
+        # Swift was scraped live this evening: fresh now, but gone before tomorrow's peak
+        listing_store._STORE.add([{"source": "CarWale", "price": 5.5, "year": 2019, "km": 35000,
+                                   "url": "https://CarWale/swift"}], "Maruti", "Swift", "Pune")
+        engine_logic._store_base_price("Hyundai", "Creta", "SX", 2020, 1600000)
+
+        scheduler = PrewarmScheduler(history, google_quota=2, cars24_quota=0)
+        tasks = scheduler.plan()
+    finally:
+        listing_store._STORE = None
+        engine_logic.BASE_PRICE_CACHE_FILE, engine_logic._BASE_CACHE = original_cache_file, None
+
+    summary = [(t["kind"], t["model"], t["hits"]) for t in tasks]
+    print(f"   📋 {summary}")
+    # Hottest misses first; one Google quota unit pair -> one base price; old Nexon request ignored
+    assert summary == [("listings", "Swift", 3), ("listings", "Nexon", 1), ("base_price", "Swift", 3)]
+    print("✅ Only hot, stale entries are planned, trimmed to quota")
+
+
+def test_off_peak_window_wraps_midnight():
+    assert in_window("1-6", datetime(2024, 1, 1, 3))
+    assert not in_window("1-6", datetime(2024, 1, 1, 6))
+    assert in_window("22-4", datetime(2024, 1, 1, 23)) and in_window("22-4", datetime(2024, 1, 1, 2))
+    assert not in_window("22-4", datetime(2024, 1, 1, 12))
+
+
+if __name__ == "__main__":
+    test_scheduler_plans_hot_misses_within_quota()
+    test_off_peak_window_wraps_midnight()
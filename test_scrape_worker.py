@@ -0,0 +1,36 @@
+import os
+import signal
+import time
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+from src.scrape_worker import ScrapeWorkerClient
+
+
+def test_worker_runs_out_of_process_and_survives_a_crash():
+    print("🚀 Out-of-process scrape worker...")
+    client = ScrapeWorkerClient(concurrency=2, memory_mb=0)
+    try:
+        first = client.call("ping", timeout=60)
+        assert first["pid"] != os.getpid()
+        print(f"   🛠️ Worker pid {first['pid']}")
+
+        # Chromium or the worker dying must not take the caller down
+        os.kill(first["pid"], signal.SIGKILL)
+        time.sleep(0.5)
+        second = client.call("ping", timeout=60)
+        assert second["pid"] != first["pid"]
+        assert client.stats()["restarts"] == 1
+        print(f"✅ Replacement worker pid {second['pid']}")
+
+        # A caller that gave up leaves nothing pending behind
+        try:
+            client.call("ping", timeout=0)
+        except FuturesTimeout:
+            pass
+        assert client.stats()["pending"] == 0
+    finally:
+        client.shutdown()
+
+
+if __name__ == "__main__":
+    test_worker_runs_out_of_process_and_survives_a_crash()
@@ -0,0 +1,68 @@
+import time
+
+import src.engine_sniper as engine_sniper
+
+
+class FakeResponse:
+    def __init__(self, items):
+        self.items = items
+
+    def json(self):
+        return {"items": self.items}
+
+
+def _empty_pages(make, model, city):
+    return {source: {"listings": [], "url": f"https://{source.lower()}.example/", "method": "http"}
+            for source in ("CarWale", "Spinny")}
+
+
+def test_google_fallbacks_run_in_parallel_within_deadline():
+    print("🚀 Sniper: parallel Google fallback under one deadline...")
+    queries = []
+
+    def slow_google(url, params=None, timeout=None):
+        queries.append(params["q"])
+        assert timeout and timeout <= engine_sniper.GOOGLE_TIMEOUT
+        time.sleep(0.5)
+        site = "CarWale" if "carwale" in params["q"] else "Spinny"
+        price = "6.5 Lakh" if site == "CarWale" else "6.8 Lakh"
+        return FakeResponse([{"title": f"2020 Maruti Swift VXI - {site}", "snippet": price, "link": f"https://{site}/1"}])
+
+    original = engine_sniper.fetch_listing_pages, engine_sniper.guarded_get
+    engine_sniper.fetch_listing_pages, engine_sniper.guarded_get = _empty_pages, slow_google
+    try:
+        started = time.time()
+        price, sources, _ = engine_sniper.fetch_closest_match("Maruti", "Swift", 2020, "VXI", 30000, "Mumbai", "key", "cx")
+        elapsed = time.time() - started
+    finally:
+        engine_sniper.fetch_listing_pages, engine_sniper.guarded_get = original
+
+    print(f"   ⏱️ {elapsed:.2f}s for {len(queries)} queries")
+    assert len(queries) == 2 and elapsed < 0.9  # One round trip, not two
+    assert sources["carwale"]["price"] == 650000 and sources["spinny"]["price"] == 680000
+    assert price in (650000, 680000)
+    print("✅ Both fallbacks answered in one round trip")
+
+
+def test_slow_direct_fetch_is_cut_at_the_deadline():
+    def hung_pages(make, model, city):
+        time.sleep(2)
+        return _empty_pages(make, model, city)
+
+    original = engine_sniper.fetch_listing_pages
+    engine_sniper.fetch_listing_pages = hung_pages
+    try:
+        started = time.time()
+        price, sources, debug = engine_sniper.fetch_closest_match("Maruti", "Swift", 2020, "VXI", 30000, "Mumbai",
+                                                                  None, None, deadline=0.5)
+        elapsed = time.time() - started
+    finally:
+        engine_sniper.fetch_listing_pages = original
+    assert price is None and elapsed < 1.0
+    assert "carwale.com" in sources["carwale"]["url"] and "deadline" in debug
+    print(f"✅ Hung fetch abandoned after {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    test_google_fallbacks_run_in_parallel_within_deadline()
+    test_slow_direct_fetch_is_cut_at_the_deadline()
@@ -0,0 +1,33 @@
+import time
+
+from src import webhook_jobs
+from src.webhook_stub import start_stub
+
+
+def test_jobs_run_in_background_against_stub():
+    print("🚀 Submitting Cars24 webhook jobs to the local stub...")
+    webhook_jobs.POLL_INTERVAL = 0.1
+    server = start_stub(delay=0.5)
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    started = time.time()
+    details = [webhook_jobs.submit(f"{base}/webhook-test/car-details", {"mobile": str(9000000000 + i)}, timeout=10)
+               for i in range(5)]
+    # submit() hands back job IDs immediately, not after the 0.5 s automation
+    assert time.time() - started < 0.3
+    assert webhook_jobs.get(details[0])["status"] in ("queued", "running")
+
+    results = [webhook_jobs.wait(job_id, 10) for job_id in details]
+    assert all(job["status"] == "done" for job in results)
+    assert results[0]["result"]["browserWSEndpoint"].startswith("ws://")
+    # Five automations overlapped instead of queueing one after another
+    assert time.time() - started < 2.0
+
+    bad = webhook_jobs.wait(webhook_jobs.submit(f"{base}/webhook/otp-verification", {"otp": "0000"}, timeout=10), 10)
+    assert bad["status"] == "failed" and bad["error"] == "Invalid OTP"
+    server.shutdown()
+    print(f"✅ 5 concurrent jobs in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    test_jobs_run_in_background_against_stub()
@@ -0,0 +1,118 @@
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import src.harvester as harvester
+from src.scrape_fleet import FleetNode, _job_harvest, result_key
+from src.work_queue import SQLiteWorkQueue
+
+
+def test_leases_retries_and_idempotent_results():
+    print("🚀 SQLite work queue...")
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = SQLiteWorkQueue(os.path.join(tmp, "queue.db"), retry_backoff=0)
+        assert queue.enqueue("harvest", {"city": "pune", "make": "kia"}, key="harvest:pune:kia")
+        assert not queue.enqueue("harvest", {"city": "pune", "make": "kia"}, key="harvest:pune:kia")
+
+        # One node at a time holds a job; an expired lease is handed to the next node
+        job = queue.lease("node-a", lease_seconds=0.2)[0]
+        assert queue.lease("node-b") == []
+        time.sleep(0.3)
+        again = queue.lease("node-b")[0]
+        assert again["id"] == job["id"] and again["attempt"] == 2
+        assert not queue.complete(job["id"], "node-a")  # Stale lease cannot finish the job
+
+        # Results from both runs land once per listing
+        rows = {"a": {"price": 500000}, "b": {"price": 600000}}
+        queue.upsert_results(again["key"], rows)
+        queue.upsert_results(again["key"], dict(rows, b={"price": 610000}))
+        assert sorted(r["price"] for r in queue.results(again["key"])) == [500000, 610000]
+        assert queue.complete(again["id"], "node-b", items=2, busy_seconds=1.0)
+        print("✅ Leases expire and results are upserted")
+
+        queue.enqueue("harvest", {"city": "delhi", "make": "mg"}, key="harvest:delhi:mg", max_attempts=2)
+        bad = queue.lease("node-a")[0]
+        assert queue.fail(bad["id"], "node-a", "timeout") == "queued"
+        bad = queue.lease("node-a")[0]
+        assert queue.fail(bad["id"], "node-a", "timeout") == "dead"
+        assert queue.counts() == {"queued": 0, "leased": 0, "done": 1, "dead": 1}
+
+        metrics = {m["node"]: m for m in queue.node_metrics()}
+        assert metrics["node-b"]["jobs_done"] == 1 and metrics["node-b"]["items_per_sec"] == 2.0
+        assert metrics["node-a"]["jobs_failed"] == 2
+        print("✅ Retries end in dead-letter; per-node metrics recorded")
+
+        # A job whose node dies on every attempt is not handed out forever
+        queue.enqueue("harvest", {"city": "goa", "make": "bmw"}, key="harvest:goa:bmw", max_attempts=2)
+        for _ in range(2):
+            assert queue.lease("node-a", lease_seconds=0.05)
+            time.sleep(0.1)
+        assert queue.lease("node-b") == []
+        assert queue.counts()["dead"] == 2
+        print("✅ Crash-looping job parked as dead")
+
+
+def test_nodes_drain_the_queue_together():
+    print("🚀 Two fleet nodes on one queue...")
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = SQLiteWorkQueue(os.path.join(tmp, "queue.db"), retry_backoff=0)
+        for i in range(6):
+            queue.enqueue("fake", {"n": i}, key=f"fake:{i}")
+
+        processed = Counter()
+        counter_lock = threading.Lock()
+        go = threading.Barrier(2)
+
+        def fake(n):
+            with counter_lock:
+                processed[n] += 1
+            time.sleep(0.05)
+            return [{"source": "Test", "url": f"/car/{n}", "price": n}]
+
+        def run(node_id):
+            node = FleetNode(queue, node_id, concurrency=2, handlers={"fake": fake})
+            go.wait()  # Both nodes start leasing at the same moment
+            node.run(drain=True)
+
+        threads = [threading.Thread(target=run, args=(node_id,)) for node_id in ("node-a", "node-b")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(60)
+        assert processed == Counter(range(6)), processed  # Every job exactly once
+        assert queue.counts()["done"] == 6
+        assert all(m["jobs_done"] > 0 for m in queue.node_metrics())  # Both nodes took a share
+        assert len(queue.results()) == 6
+        assert result_key({"source": "Test", "url": "/car/1"}) == "Test|/car/1"
+        print(f"✅ Drained: {queue.node_metrics()}")
+
+
+def test_failed_harvest_is_retried_not_marked_done():
+    print("🚀 Harvest job with every source blocked...")
+    calls = []
+
+    def blocked(source, city, make):
+        calls.append(source)
+        raise ConnectionError("blocked")
+
+    original = harvester.fetch_source_page
+    harvester.fetch_source_page = blocked
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = SQLiteWorkQueue(os.path.join(tmp, "queue.db"), retry_backoff=0)
+            queue.enqueue("harvest", {"city": "pune", "make": "kia"}, key="harvest:pune:kia", max_attempts=2)
+            FleetNode(queue, "node-a", handlers={"harvest": _job_harvest}).run(drain=True)
+            FleetNode(queue, "node-a", handlers={"harvest": _job_harvest}).run(drain=True)
+            assert queue.counts()["dead"] == 1 and queue.counts()["done"] == 0
+    finally:
+        harvester.fetch_source_page = original
+    assert sorted(set(calls)) == sorted(harvester.HARVEST_SOURCES)  # Every source tried
+    print("✅ Blocked harvest retried, then dead-lettered")
+
+
+if __name__ == "__main__":
+    test_leases_retries_and_idempotent_results()
+    test_nodes_drain_the_queue_together()
+    test_failed_harvest_is_retried_not_marked_done()